@@ -1,23 +1,38 @@
 from __future__ import annotations
 
-import json
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Dict, List, Optional
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 
-from hero_loader import HeroProfile, hero_to_dict, load_heroes_from_txt
-from presets import RANK_PRESETS
-from scoring import (
-    build_team_state,
-    infer_missing_essentials,
-    pick_score,
-    ban_score,
-    build_warnings,
-    composition_score,
+from events import sse_stream
+from hotspicker.bulk_scoring import batched, iter_scored_lines, parse_ndjson_teams
+from hotspicker.data import load_map_file, load_map_ids
+from hotspicker.draft_codec import DraftCodec, DraftCodeError
+from hotspicker.hero_loader import HeroProfile, hero_to_dict, load_heroes_from_txt
+from hotspicker.matrices import HeroMatrices
+from hotspicker.opponent import OpponentModel, load_pick_rates
+from hotspicker.player_pools import PoolError, parse_pools
+from hotspicker.presets import WeightPreset, load_presets
+from hotspicker.recommender import Recommender
+from hotspicker.scouting import ScoutingStore
+from hotspicker.sensitivity import SweepError, parse_top_n
+from hotspicker.whatif import WhatIfError
+from hotspicker.win_model import load_win_model
+from hotspicker.zobrist import draft_hash, hash_hex
+from rec_cache import (
+    MemoryCache,
+    RecommendationCache,
+    SqliteCacheStore,
+    canonical_draft_key,
+    data_version,
 )
+from sessions import DraftActionError, SessionStore
+from speculation import SpecState, Speculator
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -32,11 +47,113 @@ CORS(app)
 HEROES: List[HeroProfile] = load_heroes_from_txt(HERO_TXT)
 HERO_BY_ID: Dict[str, HeroProfile] = {h.hero_id: h for h in HEROES}
 
-# Load maps once on startup (optional)
-if MAPS_JSON.exists():
-    MAPS: Dict[str, Dict[str, float]] = json.loads(MAPS_JSON.read_text(encoding="utf-8"))
-else:
-    MAPS = {}
+# Load maps on startup (optional); reloaded when the file changes, see below
+MAPS, MAP_RESIDUALS = load_map_file(str(MAPS_JSON))
+
+# Calibrated weights (python -m hotspicker.calibrate) replace the built-in presets
+PRESETS_JSON = os.path.join(DATA_DIR, "presets.json")
+PRESETS: Dict[str, WeightPreset] = load_presets(PRESETS_JSON)
+
+# Win-probability model (python -m hotspicker.win_train); optional
+WIN_MODEL_JSON = os.path.join(DATA_DIR, "win_model.json")
+
+WIN_MODEL = load_win_model(WIN_MODEL_JSON)
+
+# Local draft log (draft-session histories, one per line); its pick rates
+# feed the opponent model. Optional.
+DRAFT_LOG = os.path.join(DATA_DIR, "draft_log.jsonl")
+PICK_RATES = load_pick_rates(DRAFT_LOG, HERO_BY_ID)
+
+# Opponent scouting profiles (python -m hotspicker.scouting ingest); read on
+# use and re-read when a profile file changes
+SCOUTING = ScoutingStore(os.path.join(DATA_DIR, "scouting"))
+
+RECOMMENDER = Recommender(HEROES, MAPS, PRESETS, WIN_MODEL, MAP_RESIDUALS, OpponentModel(PICK_RATES), SCOUTING)
+# One set of hero x hero tables per rank preset
+MATRICES: Dict[str, HeroMatrices] = {name: HeroMatrices(HEROES, preset) for name, preset in PRESETS.items()}
+
+# Recommendation cache: in-memory LRU, optionally backed by SQLite so a
+# restart does not start cold. Set HOTSPICKER_CACHE_DB to enable the disk tier.
+CACHE_DB = os.environ.get("HOTSPICKER_CACHE_DB", "").strip()
+DATA_VERSION = data_version(HERO_TXT, str(MAPS_JSON), PRESETS_JSON, WIN_MODEL_JSON, DRAFT_LOG)
+CACHE_SIZE = int(os.environ.get("HOTSPICKER_CACHE_SIZE", "2048"))
+CACHE_STORE = SqliteCacheStore(CACHE_DB, DATA_VERSION) if CACHE_DB else None
+REC_CACHE = RecommendationCache(DATA_VERSION, MemoryCache(CACHE_SIZE), CACHE_STORE)
+
+SESSIONS = SessionStore()
+
+
+def _cached_recommend(draft: Dict, settings: Dict) -> Dict:
+    return REC_CACHE.get_or_compute(
+        canonical_draft_key(draft, settings), lambda: RECOMMENDER.recommend(draft, settings)
+    )
+
+
+# Background precompute of likely next session states. HOTSPICKER_SPECULATION_CPU
+# is the share of one core it may use; 0 turns it off.
+SPECULATION_CPU = float(os.environ.get("HOTSPICKER_SPECULATION_CPU", "0.25"))
+SPECULATOR = Speculator(_cached_recommend, cpu_share=SPECULATION_CPU) if SPECULATION_CPU > 0 else None
+
+# GET /api/recommendations/<code>: codes are bound to the data version through
+# the ETag, so shared caches only need a short max-age before revalidating
+DRAFT_CODEC = DraftCodec([h.hero_id for h in HEROES], list(MAPS), load_map_ids(str(MAPS_JSON)))
+DRAFT_CODE_MAX_AGE = int(os.environ.get("HOTSPICKER_DRAFT_CODE_MAX_AGE", "300"))
+
+
+# -------------------------
+# MAPS HOT RELOAD
+# -------------------------
+# python -m hotspicker.map_fit rewrites maps.json (atomically). Requests check
+# its mtime at most once per MAPS_CHECK_SECONDS; on a change the recommender,
+# draft codec and data version are rebuilt and a fresh memory cache replaces
+# the old one, so nothing computed with the old weights is served again.
+MAPS_CHECK_SECONDS = float(os.environ.get("HOTSPICKER_MAPS_CHECK_SECONDS", "1.0"))
+_MAPS_LOCK = threading.Lock()
+_MAPS_CHECKED_AT = time.monotonic()
+
+
+def _maps_mtime() -> float:
+    try:
+        return MAPS_JSON.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+_MAPS_MTIME = _maps_mtime()
+
+
+def _reload_maps() -> None:
+    global MAPS, MAP_RESIDUALS, RECOMMENDER, DATA_VERSION, REC_CACHE, DRAFT_CODEC
+    maps, residuals = load_map_file(str(MAPS_JSON))
+    recommender = Recommender(HEROES, maps, PRESETS, WIN_MODEL, residuals, OpponentModel(PICK_RATES), SCOUTING)
+    version = data_version(HERO_TXT, str(MAPS_JSON), PRESETS_JSON, WIN_MODEL_JSON, DRAFT_LOG)
+
+    MAPS, MAP_RESIDUALS = maps, residuals
+    RECOMMENDER = recommender
+    DRAFT_CODEC = DraftCodec([h.hero_id for h in HEROES], list(maps), load_map_ids(str(MAPS_JSON)))
+    REC_CACHE = RecommendationCache(version, MemoryCache(CACHE_SIZE), CACHE_STORE)
+    DATA_VERSION = version
+
+
+@app.before_request
+def _check_maps_file():
+    global _MAPS_CHECKED_AT, _MAPS_MTIME
+    now = time.monotonic()
+    if now - _MAPS_CHECKED_AT < MAPS_CHECK_SECONDS:
+        return
+    with _MAPS_LOCK:
+        if now - _MAPS_CHECKED_AT < MAPS_CHECK_SECONDS:
+            return
+        _MAPS_CHECKED_AT = now
+        mtime = _maps_mtime()
+        if mtime == _MAPS_MTIME:
+            return
+        try:
+            _reload_maps()
+        except (OSError, ValueError) as e:
+            # Keep serving the weights already loaded
+            app.logger.warning("maps.json reload failed: %s", e)
+        _MAPS_MTIME = mtime
 
 
 @app.get("/api/heroes")
@@ -49,25 +166,96 @@ def api_maps():
     return jsonify({"maps": sorted(MAPS.keys())})
 
 
-def normalize_score(score: float, s_min: float, s_max: float) -> float:
-    if s_max <= s_min:
-        return 50.0
-    return 100.0 * (score - s_min) / (s_max - s_min)
+def _matrices(rank) -> HeroMatrices:
+    # Unknown ranks get Silver, as recommendations do
+    return MATRICES.get(rank) or MATRICES["Silver"]
+
+
+@app.get("/api/matrices")
+def api_matrices():
+    return jsonify(_matrices(request.args.get("rankPreset", "Silver")).to_dict())
 
 
-def norm_to_grade(norm: float) -> str:
-    # norm is 0..100 relative to this request's candidate pool
-    if norm >= 90:
-        return "S"
-    if norm >= 75:
-        return "A"
-    if norm >= 60:
-        return "B"
-    if norm >= 45:
-        return "C"
-    if norm >= 30:
-        return "D"
-    return "E"
+@app.post("/api/matrices/team")
+def api_matrices_team():
+    # {"ourPicks", "enemyPicks", "settings": {"rankPreset"}}
+    payload = request.get_json(force=True) or {}
+    settings = payload.get("settings", {}) or {}
+    our = _hero_list(payload.get("ourPicks"))
+    enemy = _hero_list(payload.get("enemyPicks"))
+    if our is None or enemy is None:
+        return jsonify({"error": "ourPicks and enemyPicks must be lists of hero ids"}), 400
+    return jsonify(_matrices(settings.get("rankPreset", "Silver")).team_report(our, enemy))
+
+
+def _bounded_int(value, default: int, lo: int, hi: int) -> Optional[int]:
+    # Request count fields (topK and friends), clamped to lo..hi; None when
+    # the value is not a whole number
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return None
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, float) and n != value:
+        return None
+    return max(lo, min(n, hi))
+
+
+def _hero_list(value) -> Optional[List[str]]:
+    # A request's list of hero ids (missing means empty); None when it is
+    # not a list of strings
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(hid, str) for hid in value):
+        return None
+    return value
+
+
+def _prepare_settings(settings: Dict) -> str:
+    # Checks deadlineMs, responseMode and playerPools and records the current
+    # revision of opponentProfile in settings, so cache keys follow
+    # re-ingested profiles; returns an error message for bad settings
+    deadline_ms = settings.get("deadlineMs")
+    if deadline_ms is not None and (
+        isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or deadline_ms < 0
+    ):
+        return "deadlineMs must be a non-negative number"
+    if settings.get("responseMode", "top") not in ("top", "pareto"):
+        return "responseMode must be top or pareto"
+    if settings.get("playerPools"):
+        try:
+            parse_pools(settings["playerPools"], RECOMMENDER.bits.index)
+        except PoolError as e:
+            return str(e)
+    name = settings.get("opponentProfile") or ""
+    if not isinstance(name, str):
+        return "opponentProfile must be a team name"
+    name = name.strip()
+    if not name:
+        settings.pop("opponentRevision", None)
+        return ""
+    try:
+        profile = SCOUTING.get(name)
+    except (OSError, ValueError) as e:
+        return f"opponent profile {name} could not be read: {e}"
+    if profile is None:
+        return f"unknown opponent profile: {name}"
+    settings["opponentRevision"] = profile.revision
+    return ""
+
+
+def _recommendation(draft: Dict, settings: Dict) -> Dict:
+    # Cached recommender output plus the per-state keys clients cache on
+    body = dict(_cached_recommend(draft, settings), stateHash=hash_hex(draft_hash(draft, settings)))
+    if not settings.get("deadlineMs"):
+        try:
+            body["draftCode"] = DRAFT_CODEC.encode(draft, settings)
+        except DraftCodeError:
+            pass
+    return body
 
 
 @app.post("/api/recommendations")
@@ -76,215 +264,285 @@ def api_recommendations():
     draft = payload.get("draft", {}) or {}
     settings = payload.get("settings", {}) or {}
 
-    rank = settings.get("rankPreset", "Silver")
-    preset = RANK_PRESETS.get(rank, RANK_PRESETS["Silver"])
-
-    simple = bool(settings.get("simpleComps", True))
-    phase = draft.get("phase", "pick")  # pick or ban
-    side_to_act = draft.get("sideToAct", "ally")  # ally or enemy
-    early_pick_window = bool(draft.get("earlyPickWindow", True))
-
-    map_name = (settings.get("mapName") or "").strip()
-    map_weights: Dict[str, float] = MAPS.get(map_name, {}) if map_name else {}
-
-    # Debug print (optional)
-    print(
-        "MAP:",
-        map_name,
-        "WEIGHTS_KEYS:",
-        list(map_weights.keys())[:5],
-        "COUNT:",
-        len(map_weights),
-    )
+    error = _prepare_settings(settings)
+    if error:
+        return jsonify({"error": error}), 400
 
-    our_picks = draft.get("ourPicks", []) or []
-    enemy_picks = draft.get("enemyPicks", []) or []
-    bans = set(draft.get("bans", []) or [])
-
-    our = build_team_state(HERO_BY_ID, our_picks)
-    enemy = build_team_state(HERO_BY_ID, enemy_picks)
-
-    # Team scores for UI
-    our_team_score = round(composition_score(our), 1)
-    enemy_team_score = round(composition_score(enemy), 1)
-
-    missing = infer_missing_essentials(our)
-
-    # Build candidate list
-    unavailable = set(our_picks) | set(enemy_picks) | bans
-    candidates = [h for h in HEROES if h.hero_id not in unavailable]
-
-    # Recommend for the side that is about to act.
-    acting_team = our if side_to_act == "ally" else enemy
-    opposing_team = enemy if side_to_act == "ally" else our
-    acting_missing = infer_missing_essentials(acting_team)
-
-    recs: List[Dict[str, Any]] = []
-
-    if phase == "pick":
-        base_team_score = composition_score(acting_team)
-
-        scored = []
-        for h in candidates:
-            s, contribs = pick_score(
-                h,
-                acting_team,
-                opposing_team,
-                acting_missing,
-                preset,
-                simple,
-                early_pick_window,
-                map_weights,
-            )
-            scored.append((s, h, contribs))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-
-        all_scores = [x[0] for x in scored] if scored else [0.0]
-        s_min, s_max = min(all_scores), max(all_scores)
-
-        top = []
-        seen_roles = set()
-
-        for s, h, contribs in scored:
-            role_key = ",".join(sorted(h.role))
-
-            top.append((s, h, contribs))
-            seen_roles.add(role_key)
-
-            # Stop when we have 5 OR at least 3 different roles represented
-            if len(top) >= 5 and len(seen_roles) >= 3:
-                break
-
-        for s, h, contribs in top:
-            tags = []
-            if early_pick_window and simple:
-                tags.append("safe early")
-            if h.contested == "H":
-                tags.append("must lock now")
-            if side_to_act == "enemy":
-                tags.append("enemy likely")
-
-            # Team score delta if we add this hero
-            new_team = build_team_state(HERO_BY_ID, acting_team.picks + [h.hero_id])
-            team_after = composition_score(new_team)
-            team_delta = team_after - base_team_score
-
-            reason = _reason_from_contribs(contribs)
-
-            norm = normalize_score(s, s_min, s_max)
-            grade = norm_to_grade(norm)
-
-            recs.append(
-                {
-                    "hero_id": h.hero_id,
-                    "hero_name": h.hero_name,
-                    "score": round(s, 1),              # keep raw for debugging
-                    "scoreNorm": round(norm, 1),       # 0..100 relative scale
-                    "grade": grade,                    # S..E
-                    "teamScoreAfter": round(team_after, 1),
-                    "teamScoreDelta": round(team_delta, 1),
-                    "tags": tags,
-                    "reason": reason,
-                }
-            )
-
-    if phase == "ban":
-        enemy_has_stealth = opposing_team.provides.get("Stealth", 0) > 0
-    we_lack_reveal = (not acting_team.has_reveal) and enemy_has_stealth
-
-    scored = []
-    for h in candidates:
-        s, contribs = ban_score(
-            h,
-            acting_team,
-            preset,
-            we_lack_reveal,
-            map_weights,
-        )
-        scored.append((s, h, contribs))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-
-    all_scores = [x[0] for x in scored] if scored else [0.0]
-    s_min, s_max = min(all_scores), max(all_scores)
-
-    for s, h, contribs in scored[:5]:
-        norm = normalize_score(s, s_min, s_max)
-        grade = norm_to_grade(norm)
-
-        recs.append(
-            {
-                "hero_id": h.hero_id,
-                "hero_name": h.hero_name,
-                "score": round(s, 1),
-                "scoreNorm": round(norm, 1),
-                "grade": grade,
-                "reason": _reason_from_contribs(contribs),
-            }
+    return jsonify(_recommendation(draft, settings))
+
+
+@app.get("/api/recommendations/<code>")
+def api_recommendations_by_code(code: str):
+    # Same result as the POST for the decoded state, but cacheable by anything
+    # between the browser and Flask; the code doubles as a share link.
+    try:
+        draft, settings = DRAFT_CODEC.decode(code)
+    except DraftCodeError as e:
+        return jsonify({"error": str(e)}), 400
+
+    body = dict(_recommendation(draft, settings), draft=draft, settings=settings)
+    resp = jsonify(body)
+    resp.set_etag(f"{DATA_VERSION}-{code}")
+    resp.headers["Cache-Control"] = f"public, max-age={DRAFT_CODE_MAX_AGE}"
+    return resp.make_conditional(request)
+
+
+@app.post("/api/completions")
+def api_completions():
+    payload = request.get_json(force=True) or {}
+    draft = payload.get("draft", {}) or {}
+    settings = payload.get("settings", {}) or {}
+    top_k = _bounded_int(payload.get("topK"), 10, 1, 50)
+    if top_k is None:
+        return jsonify({"error": "topK must be an integer"}), 400
+    error = _prepare_settings(settings)
+    if error:
+        return jsonify({"error": error}), 400
+
+    return jsonify(RECOMMENDER.complete(draft, settings, top_k))
+
+
+@app.post("/api/analysis/sensitivity")
+def api_analysis_sensitivity():
+    # {"draft", "settings", "grid": {field: [values]}, "presets": [names], "topN"}
+    payload = request.get_json(force=True) or {}
+    draft = payload.get("draft", {}) or {}
+    settings = payload.get("settings", {}) or {}
+    presets = payload.get("presets")
+    if presets is not None and (not isinstance(presets, list) or not all(isinstance(p, str) for p in presets)):
+        return jsonify({"error": "presets must be a list of preset names"}), 400
+    error = _prepare_settings(settings)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        top_n = parse_top_n(payload.get("topN"))
+        result = RECOMMENDER.sensitivity(draft, settings, payload.get("grid"), presets, top_n)
+    except SweepError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
+@app.post("/api/analysis/whatif")
+def api_analysis_whatif():
+    # {"history": [draft actions in order], "settings", "topK"}
+    payload = request.get_json(force=True) or {}
+    settings = payload.get("settings", {}) or {}
+    error = _prepare_settings(settings)
+    if error:
+        return jsonify({"error": error}), 400
+    top_k = _bounded_int(payload.get("topK"), 3, 1, 20)
+    if top_k is None:
+        return jsonify({"error": "topK must be an integer"}), 400
+
+    try:
+        result = RECOMMENDER.whatif(payload.get("history"), settings, top_k)
+    except WhatIfError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
+@app.post("/api/analysis/draft")
+def api_analysis_draft():
+    # {"history": [draft actions in order, as frontend state.draft.history], "settings"}
+    payload = request.get_json(force=True) or {}
+    settings = payload.get("settings", {}) or {}
+    error = _prepare_settings(settings)
+    if error:
+        return jsonify({"error": error}), 400
+    # Grading uses base scores, and deadline results cut short are never
+    # cached, so the replay runs without lookahead
+    settings = {k: v for k, v in settings.items() if k != "deadlineMs"}
+    recommender, cache = RECOMMENDER, REC_CACHE
+
+    def recommend(our, enemy, bans, draft):
+        return cache.get_or_compute(
+            canonical_draft_key(draft, settings), lambda: recommender.recommend_teams(our, enemy, bans, draft, settings)
         )
 
+    try:
+        result = recommender.review(payload.get("history"), settings, recommend)
+    except WhatIfError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
+@app.get("/api/scouting")
+def api_scouting():
+    return jsonify({"teams": SCOUTING.teams()})
 
-    
 
+@app.get("/api/scouting/<team>")
+def api_scouting_team(team: str):
+    try:
+        profile = SCOUTING.get(team)
+    except ValueError as e:
+        return jsonify({"error": f"opponent profile {team} could not be read: {e}"}), 400
+    except OSError:
+        profile = None
+    if profile is None:
+        return jsonify({"error": "Unknown opponent profile"}), 404
+    return jsonify(profile.summary())
 
-    warnings = build_warnings(our, enemy)
-    plan = build_plan_lines(our)
+
+@app.post("/api/compositions/maps")
+def api_compositions_maps():
+    # {"ourPicks", "enemyPicks", "settings": {"rankPreset"}}
+    payload = request.get_json(force=True) or {}
+    our = _hero_list(payload.get("ourPicks"))
+    enemy = _hero_list(payload.get("enemyPicks"))
+    if our is None or enemy is None:
+        return jsonify({"error": "ourPicks and enemyPicks must be lists of hero ids"}), 400
+    return jsonify(RECOMMENDER.compare_maps(our, enemy, payload.get("settings", {}) or {}))
+
+
+@app.post("/api/compositions/score")
+def api_compositions_score():
+    # Bulk scoring: {"teams": [[i, ...], ...]} or an NDJSON body with one team
+    # per line. Results stream back as NDJSON in input order.
+    if request.mimetype == "application/x-ndjson":
+        teams = parse_ndjson_teams(request.stream)
+    else:
+        payload = request.get_json(force=True, silent=True) or {}
+        teams = payload.get("teams")
+        if not isinstance(teams, list):
+            return jsonify({"error": "teams must be a list"}), 400
+
+    lines = iter_scored_lines(RECOMMENDER.bits, teams)
+    return Response(stream_with_context(batched(lines)), mimetype="application/x-ndjson")
+
+
+# -------------------------
+# DRAFT SESSIONS
+# -------------------------
+def _speculate(session) -> None:
+    if SPECULATOR is not None and session.current_step() is not None:
+        root = SpecState(session.sequence, len(session.history), session.draft_payload())
+        SPECULATOR.schedule(session.session_id, root, session.last_result, session.settings)
+
+
+@app.post("/api/drafts")
+def api_create_draft():
+    payload = request.get_json(force=True) or {}
+    settings = payload.get("settings", {}) or {}
+    error = _prepare_settings(settings)
+    if error:
+        return jsonify({"error": error}), 400
+    session = SESSIONS.create(settings, payload.get("firstBanSide", "ally"))
+
+    # Optional replay of an existing history, e.g. after a page reload
+    with session.lock:
+        try:
+            for action in payload.get("history", []) or []:
+                session.apply_action(HERO_BY_ID, action)
+        except DraftActionError as e:
+            SESSIONS.delete(session.session_id)
+            return jsonify({"error": str(e)}), 400
+
+        session.refresh(RECOMMENDER, REC_CACHE)
+        _speculate(session)
+        body = session.describe()
+        body["state"] = session.last_result
+    return jsonify(body), 201
+
+
+@app.get("/api/drafts/<session_id>")
+def api_get_draft(session_id: str):
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown draft session"}), 404
+
+    with session.lock:
+        body = session.describe()
+        body["state"] = session.last_result
+    return jsonify(body)
+
+
+@app.post("/api/drafts/<session_id>/actions")
+def api_draft_action(session_id: str):
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown draft session"}), 404
+
+    action = request.get_json(force=True) or {}
+    if SPECULATOR is not None:
+        SPECULATOR.cancel(session_id)
+    with session.lock:
+        error = _prepare_settings(session.settings)
+        if error:
+            return jsonify({"error": error}), 400
+        try:
+            entry = session.apply_action(HERO_BY_ID, action)
+        except DraftActionError as e:
+            return jsonify({"error": str(e)}), 400
+        session.publish_step()
+        changes = session.refresh(RECOMMENDER, REC_CACHE, stream_depths=True)
+        session.publish_changes(changes)
+        _speculate(session)
+        step = len(session.history)
+        state_hash = session.state_hash()
 
     return jsonify(
-        {
-            "phase": phase,
-            "sideToAct": side_to_act,
-            "recommendations": recs,
-            "warnings": warnings,
-            "endPlan": plan,
-            "missing": sorted(list(missing)),
-            "ourTeamScore": our_team_score,
-            "enemyTeamScore": enemy_team_score,
-            "mapName": map_name,
-        }
+        {"sessionId": session_id, "step": step, "stateHash": state_hash, "action": entry, "changes": changes}
     )
 
 
-def _reason_from_contribs(contribs):
-    # pick top 2 positives and top 1 negative
-    pos = sorted([c for c in contribs if c[1] > 0], key=lambda x: x[1], reverse=True)[:2]
-    neg = sorted([c for c in contribs if c[1] < 0], key=lambda x: x[1])[:1]
-
-    parts = []
+@app.delete("/api/drafts/<session_id>/actions/last")
+def api_draft_undo(session_id: str):
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown draft session"}), 404
+
+    if SPECULATOR is not None:
+        SPECULATOR.cancel(session_id)
+    with session.lock:
+        error = _prepare_settings(session.settings)
+        if error:
+            return jsonify({"error": error}), 400
+        try:
+            entry = session.undo_last(HERO_BY_ID)
+        except DraftActionError as e:
+            return jsonify({"error": str(e)}), 400
+        session.publish_step()
+        changes = session.refresh(RECOMMENDER, REC_CACHE, stream_depths=True)
+        session.publish_changes(changes)
+        _speculate(session)
+        step = len(session.history)
+        state_hash = session.state_hash()
 
-    if pos:
-        seen = set()
-        pos_labels = []
-        for label, _val in pos:
-            if label in seen:
-                continue
-            seen.add(label)
-            pos_labels.append(label)
-        parts.append(" + ".join(pos_labels))
+    return jsonify(
+        {"sessionId": session_id, "step": step, "stateHash": state_hash, "undone": entry, "changes": changes}
+    )
 
-    if neg:
-        parts.append(f"Warning: {neg[0][0]}")
 
-    return " | ".join(parts) if parts else "No strong signal"
+@app.get("/api/drafts/<session_id>/events")
+def api_draft_events(session_id: str):
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown draft session"}), 404
+    return _event_stream(session)
 
 
-def build_plan_lines(our):
-    who_starts = "Start fights with your engage"
-    if our.provides.get("Engage", 0) == 0:
-        who_starts = "Look for picks, avoid hard 5v5 starts"
+@app.get("/api/broadcasts/<spectate_id>/events")
+def api_broadcast_events(spectate_id: str):
+    session = SESSIONS.get_by_spectate_id(spectate_id)
+    if session is None:
+        return jsonify({"error": "Unknown broadcast"}), 404
+    return _event_stream(session)
 
-    kill_pattern = "Burst the first target caught by CC"
-    if our.provides.get("SustainDmg", 0) > our.provides.get("Burst", 0):
-        kill_pattern = "Wear down frontline then collapse"
-    if our.provides.get("Pick", 0) > 0:
-        kill_pattern = "Play for picks, then convert to objective"
 
-    macro_rule = "Keep lanes soaked and take camps on cooldown"
-    if our.provides.get("Macro", 0) == 0:
-        macro_rule = "Group earlier and avoid losing soak"
+def _event_stream(session):
+    # Subscribe under the session lock so no update lands between the
+    # snapshot and the first queued event.
+    with session.lock:
+        sub = session.channel.subscribe()
+        initial = session.snapshot_events()
 
-    return [who_starts, kill_pattern, macro_rule]
+    return Response(
+        sse_stream(session.channel, sub, initial),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/")
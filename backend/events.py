@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+def sse_format(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    # Bounded queue of encoded SSE frames. Every event carries the full state
+    # of its group, so a new frame replaces a queued frame of the same event
+    # name and a slow reader only ever has the latest frame of each group
+    # waiting. With fewer event names than queue slots nothing is lost; the
+    # oldest frame is only dropped if the queue still fills up.
+
+    def __init__(self, max_queue: int = 32):
+        self._frames: Deque[Tuple[str, str]] = deque(maxlen=max_queue)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+
+    def push(self, frame: str, event: str = "") -> None:
+        with self._cond:
+            if event:
+                for queued in self._frames:
+                    if queued[0] == event:
+                        self._frames.remove(queued)
+                        self.coalesced += 1
+                        break
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append((event, frame))
+            self._cond.notify()
+
+    def pop(self, timeout: float) -> Optional[str]:
+        with self._cond:
+            if not self._frames and not self.closed:
+                self._cond.wait(timeout)
+            if self._frames:
+                return self._frames.popleft()[1]
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class EventChannel:
+    # Per-draft pub/sub hub. Each event is encoded once and the same frame is
+    # fanned out to the captain's stream and every spectator.
+
+    def __init__(self, max_queue: int = 32):
+        self.max_queue = max_queue
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self.max_queue)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+        sub.close()
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            frame = sse_format(event, data, self._next_id)
+            self._next_id += 1
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.push(frame, event)
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers = self._subscribers
+            self._subscribers = []
+        for sub in subscribers:
+            sub.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "dropped": sum(s.dropped for s in self._subscribers),
+                "coalesced": sum(s.coalesced for s in self._subscribers),
+            }
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+def sse_stream(
+    channel: EventChannel,
+    sub: Subscription,
+    initial: List[Tuple[str, Dict[str, Any]]],
+    keepalive_seconds: float = 15.0,
+) -> Iterator[str]:
+    try:
+        for event, data in initial:
+            yield sse_format(event, data)
+        while not sub.closed:
+            frame = sub.pop(keepalive_seconds)
+            if frame is None:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            yield frame
+    finally:
+        channel.unsubscribe(sub)
@@ -0,0 +1,4 @@
+# Draft scoring core: hero data, presets, scoring and the recommender.
+# Pure standard library, so scripts and the CLI can import it without Flask.
+# Submodules are imported by name (hotspicker.scoring, hotspicker.recommender)
+# to keep `python -m hotspicker` startup cheap.
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from .team_bits import HeroBits
+
+
+# Bulk composition scoring for analytics jobs: many complete (or partial)
+# teams in, one NDJSON line per team out, in input order.
+#
+# Teams are lists of hero indices into /api/heroes order; hero ids are
+# accepted too. Everything runs on HeroBits. JSON encoding costs more than the
+# scoring itself, so encoded results are memoized on (score, missing,
+# warnings): any number of distinct teams lands on a few hundred of those.
+
+TEAM_SIZE = 5
+MEMO_LIMIT = 50_000
+
+
+def parse_ndjson_teams(lines: Iterable[bytes]) -> Iterator[Any]:
+    for raw in lines:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            yield json.loads(raw)
+        except ValueError:
+            yield None
+
+
+def _resolve(bits: HeroBits, team: Any) -> Tuple[Tuple[int, ...], str]:
+    if not isinstance(team, list) or not team:
+        return (), "team must be a non-empty list"
+    if len(team) > TEAM_SIZE:
+        return (), f"team has more than {TEAM_SIZE} heroes"
+
+    n = len(bits.heroes)
+    if all(type(h) is int and 0 <= h < n for h in team):
+        idxs = team
+        if len(set(idxs)) != len(idxs):
+            return (), "duplicate hero in team"
+        return tuple(idxs), ""
+
+    idxs = []
+    for h in team:
+        if isinstance(h, int) and not isinstance(h, bool):
+            if not 0 <= h < n:
+                return (), f"hero index out of range: {h}"
+            idxs.append(h)
+        elif isinstance(h, str) and h in bits.index:
+            idxs.append(bits.index[h])
+        else:
+            return (), f"unknown hero: {h}"
+    if len(set(idxs)) != len(idxs):
+        return (), "duplicate hero in team"
+    return tuple(idxs), ""
+
+
+def iter_scored_lines(bits: HeroBits, teams: Iterable[Any]) -> Iterator[str]:
+    # Lines carry the input position as "i" so clients can zip results back
+    memo: Dict[Tuple[int, ...], str] = {}
+    for pos, team in enumerate(teams):
+        idxs, err = _resolve(bits, team)
+        if err:
+            yield json.dumps({"i": pos, "error": err}, separators=(",", ":")) + "\n"
+            continue
+
+        t = bits.team_of(idxs)
+        score = bits.composition_score(t)
+        missing = bits.missing(t)
+        warnings = bits.warnings(t, idxs)
+        key = (score, tuple(missing), tuple(warnings))
+        body = memo.get(key)
+        if body is None:
+            result = {"compositionScore": score, "missing": missing, "warnings": warnings}
+            body = json.dumps(result, separators=(",", ":"))[1:]
+            if len(memo) < MEMO_LIMIT:
+                memo[key] = body
+        yield '{"i":%d,%s\n' % (pos, body)
+
+
+def batched(lines: Iterator[str], size: int = 512) -> Iterator[str]:
+    # Fewer, larger writes: one chunk per `size` teams
+    buf: List[str] = []
+    for line in lines:
+        buf.append(line)
+        if len(buf) >= size:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
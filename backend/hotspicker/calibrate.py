@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data import DATA_DIR, load_data, write_json_atomic
+from .hero_loader import HeroProfile
+from .map_bonus import MapTable
+from .presets import PRESETS_FILE_VERSION, RANK_PRESETS, ScoringWeights, WeightPreset, preset_to_dict
+from .scoring import TeamState, add_hero, infer_missing_essentials, pick_features
+
+
+# Fit pick_score weights to historical drafts with known outcomes.
+#
+#   python -m hotspicker.calibrate drafts.jsonl --out data/presets.json --report fit.json
+#
+# One draft per line, in the shape of a draft-session history:
+#   {"history": [{"hero_id": "...", "side": "ally", "type": "pick"}, ...],
+#    "mapName": "...", "rankPreset": "Gold", "simpleComps": true, "win": true}
+#
+# pick_score is linear in its weights (scoring.pick_features), so every draft
+# is reduced once to a feature vector: the sum over our picks minus the sum
+# over enemy picks, each taken in the state the pick was made in. The model is
+# P(win) = sigmoid(scale * sum(coef * x)). Coordinate search over log-weights
+# minimises log loss plus a pull towards the hand-tuned values; changing one
+# weight only touches the rows that use it, so a step costs one pass over
+# those rows rather than a re-score of the dataset.
+
+SHARED_PARAMS = [f.name for f in fields(ScoringWeights) if f.name != "gate_penalty"]
+RANK_PARAMS = ["reliability_weight", "gate_penalty_weight", "weakness_stack_2_penalty", "weakness_stack_3_penalty"]
+
+# Feature key of each per-rank parameter (gate_penalty stays fixed so the
+# product gate_penalty * gate_penalty_weight keeps a single free factor)
+RANK_FEATURE = {
+    "reliability_weight": "reliability",
+    "gate_penalty_weight": "gate",
+    "weakness_stack_2_penalty": "weakness_stack_2",
+    "weakness_stack_3_penalty": "weakness_stack_3",
+}
+
+VALIDATION_EVERY = 5
+
+
+# -------------------------
+# FEATURES
+# -------------------------
+def draft_features(
+    record: Dict[str, Any],
+    hero_by_id: Dict[str, HeroProfile],
+    map_table: MapTable,
+    preset: WeightPreset,
+) -> Dict[str, float]:
+    our, enemy = TeamState(), TeamState()
+    map_bonus = map_table.bonus_for((record.get("mapName") or "").strip())
+    simple = bool(record.get("simpleComps", True))
+    x: Dict[str, float] = {}
+    picks_done = 0
+
+    for action in record.get("history", []) or []:
+        h = hero_by_id.get(action.get("hero_id") or "")
+        if h is None or action.get("type") != "pick":
+            continue
+        ally = action.get("side") == "ally"
+        acting, opposing = (our, enemy) if ally else (enemy, our)
+        sign = 1.0 if ally else -1.0
+
+        missing = infer_missing_essentials(acting)
+        for _label, key, amount in pick_features(
+            h, acting, opposing, missing, preset, simple, picks_done < 5, map_bonus
+        ):
+            x[key] = x.get(key, 0.0) + sign * amount
+
+        add_hero(acting, h)
+        picks_done += 1
+    return x
+
+
+class Dataset:
+    def __init__(self, rows: List[Dict[str, float]], ranks: List[str], wins: List[bool]):
+        self.n = len(rows)
+        self.ranks = ranks
+        self.y = [1.0 if w else -1.0 for w in wins]
+
+        # Sparse columns: key -> [(row, value)], and per (key, rank)
+        self.cols: Dict[str, List[Tuple[int, float]]] = {}
+        self.rank_cols: Dict[Tuple[str, str], List[Tuple[int, float]]] = {}
+        for i, row in enumerate(rows):
+            for key, v in row.items():
+                if v:
+                    self.cols.setdefault(key, []).append((i, v))
+                    self.rank_cols.setdefault((key, ranks[i]), []).append((i, v))
+
+
+# -------------------------
+# MODEL
+# -------------------------
+class Params:
+    # Log-space parameter vector over the shared weights, the per-rank preset
+    # fields and the logistic scale
+
+    def __init__(self, presets: Dict[str, WeightPreset], ranks: List[str], base_rank: str):
+        base = presets[base_rank]
+        self.gate_base = base.weights.gate_penalty
+        self.rank_param = {feat: k for k, feat in RANK_FEATURE.items()}
+        self.names: List[Tuple[str, str]] = [("shared", k) for k in SHARED_PARAMS]
+        self.names += [(r, k) for r in ranks for k in RANK_PARAMS]
+        self.names.append(("model", "scale"))
+
+        self.prior: Dict[Tuple[str, str], float] = {}
+        for scope, k in self.names:
+            if scope == "shared":
+                self.prior[(scope, k)] = float(getattr(base.weights, k))
+            elif scope == "model":
+                self.prior[(scope, k)] = 0.01
+            else:
+                self.prior[(scope, k)] = float(getattr(presets[scope], k))
+        self.value = dict(self.prior)
+
+    def coef(self, key: str, rank: str) -> float:
+        k = self.rank_param.get(key)
+        if k is None:
+            return self.value[("shared", key)]
+        v = self.value[(rank, k)]
+        return v * self.gate_base if key == "gate" else v
+
+
+class Fitter:
+    def __init__(self, data: Dataset, params: Params, l2: float):
+        self.data = data
+        self.p = params
+        self.l2 = l2
+        self.train_rows = [i for i in range(data.n) if i % VALIDATION_EVERY]
+        self.validation_rows = [i for i in range(data.n) if not i % VALIDATION_EVERY]
+        self.margins = self._margins()
+        self.evals = 0
+        self.eval_seconds = 0.0
+
+    def _margins(self) -> List[float]:
+        m = [0.0] * self.data.n
+        for (key, rank), col in self.data.rank_cols.items():
+            c = self.p.coef(key, rank)
+            for i, v in col:
+                m[i] += c * v
+        return m
+
+    def _column(self, name: Tuple[str, str]) -> List[Tuple[int, float]]:
+        scope, k = name
+        if scope == "shared":
+            return self.data.cols.get(k, [])
+        return self.data.rank_cols.get((RANK_FEATURE[k], scope), [])
+
+    def log_loss(self, margins: List[float], scale: float, rows: List[int]) -> float:
+        y = self.data.y
+        total = 0.0
+        for i in rows:
+            z = -y[i] * scale * margins[i]
+            total += z + math.log1p(math.exp(-z)) if z > 0 else math.log1p(math.exp(z))
+        return total / max(len(rows), 1)
+
+    def accuracy(self, rows: List[int]) -> float:
+        y = self.data.y
+        return sum(1 for i in rows if y[i] * self.margins[i] > 0) / max(len(rows), 1)
+
+    def penalty(self) -> float:
+        return self.l2 * sum(
+            math.log(self.p.value[n] / self.p.prior[n]) ** 2 for n in self.p.names if n[0] != "model"
+        )
+
+    def objective(self, margins: List[float], scale: float, value_override: Tuple[Tuple[str, str], float]) -> float:
+        started = time.perf_counter()
+        name, v = value_override
+        old = self.p.value[name]
+        self.p.value[name] = v
+        obj = self.log_loss(margins, scale, self.train_rows) + self.penalty()
+        self.p.value[name] = old
+        self.evals += 1
+        self.eval_seconds += time.perf_counter() - started
+        return obj
+
+    def fit(self, max_sweeps: int = 60, step: float = 0.4, min_step: float = 0.005) -> int:
+        scale_name = ("model", "scale")
+        current = self.objective(self.margins, self.p.value[scale_name], (scale_name, self.p.value[scale_name]))
+        sweeps = 0
+        while sweeps < max_sweeps and step >= min_step:
+            sweeps += 1
+            improved = False
+            for name in self.p.names:
+                old = self.p.value[name]
+                col = [] if name == scale_name else self._column(name)
+                if name != scale_name and not col:
+                    continue
+                for direction in (1.0, -1.0):
+                    new = old * math.exp(direction * step)
+                    if name == scale_name:
+                        margins, scale = self.margins, new
+                    else:
+                        margins = list(self.margins)
+                        delta = self._coef_delta(name, old, new)
+                        for i, v in col:
+                            margins[i] += delta * v
+                        scale = self.p.value[scale_name]
+                    obj = self.objective(margins, scale, (name, new))
+                    if obj < current - 1e-12:
+                        current = obj
+                        self.p.value[name] = new
+                        self.margins = margins
+                        improved = True
+                        break
+            if not improved:
+                step /= 2.0
+        return sweeps
+
+    def _coef_delta(self, name: Tuple[str, str], old: float, new: float) -> float:
+        if name[1] == "gate_penalty_weight":
+            return (new - old) * self.p.gate_base
+        return new - old
+
+
+# -------------------------
+# OUTPUT
+# -------------------------
+def calibrated_presets(params: Params, presets: Dict[str, WeightPreset], ranks: List[str]) -> Dict[str, WeightPreset]:
+    shared = {k: round(params.value[("shared", k)], 3) for k in SHARED_PARAMS}
+    out: Dict[str, WeightPreset] = {}
+    for name, preset in presets.items():
+        weights = replace(preset.weights, **shared)
+        per_rank = {k: round(params.value[(name, k)], 3) for k in RANK_PARAMS} if name in ranks else {}
+        out[name] = replace(preset, weights=weights, **per_rank)
+    return out
+
+
+def _summary(fitter: Fitter) -> Dict[str, float]:
+    scale = fitter.p.value[("model", "scale")]
+    return {
+        "trainLogLoss": round(fitter.log_loss(fitter.margins, scale, fitter.train_rows), 4),
+        "validationLogLoss": round(fitter.log_loss(fitter.margins, scale, fitter.validation_rows), 4),
+        "validationAccuracy": round(fitter.accuracy(fitter.validation_rows), 4),
+        "scale": round(scale, 5),
+    }
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                raise SystemExit(f"{path}:{n}: not valid JSON")
+            if "win" in rec and rec.get("history"):
+                records.append(rec)
+    return records
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="hotspicker.calibrate", description="Fit scoring weights to drafts")
+    parser.add_argument("drafts", help="NDJSON file of drafts with outcomes")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", default="presets.calibrated.json", help="presets file to write")
+    parser.add_argument("--report", default="", help="write the fit report here as JSON")
+    parser.add_argument("--l2", type=float, default=0.002, help="pull towards the current weights")
+    parser.add_argument("--max-sweeps", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    heroes, maps = load_data(args.data_dir)
+    hero_by_id = {h.hero_id: h for h in heroes}
+    map_table = MapTable(heroes, maps)
+    presets = dict(RANK_PRESETS)
+
+    t0 = time.perf_counter()
+    records = load_records(args.drafts)
+    if len(records) < 2 * VALIDATION_EVERY:
+        print(f"hotspicker.calibrate: need at least {2 * VALIDATION_EVERY} drafts with outcomes", file=sys.stderr)
+        return 2
+
+    ranks = [r.get("rankPreset") if r.get("rankPreset") in presets else "Silver" for r in records]
+    rows = [draft_features(r, hero_by_id, map_table, presets[rank]) for r, rank in zip(records, ranks)]
+    data = Dataset(rows, ranks, [bool(r["win"]) for r in records])
+    feature_seconds = time.perf_counter() - t0
+
+    rank_set = sorted(set(ranks))
+    params = Params(presets, rank_set, "Silver")
+    fitter = Fitter(data, params, args.l2)
+
+    # Baseline: hand-tuned weights, with only the logistic scale fitted
+    scale_only = Fitter(data, Params(presets, rank_set, "Silver"), args.l2)
+    scale_only.p.names = [("model", "scale")]
+    scale_only.fit(args.max_sweeps)
+    baseline = _summary(scale_only)
+
+    t_fit = time.perf_counter()
+    sweeps = fitter.fit(args.max_sweeps)
+    fit_seconds = time.perf_counter() - t_fit
+
+    calibrated = calibrated_presets(params, presets, rank_set)
+    write_json_atomic(
+        args.out, {"version": PRESETS_FILE_VERSION, "presets": {k: preset_to_dict(v) for k, v in calibrated.items()}}
+    )
+
+    report = {
+        "drafts": data.n,
+        "byRank": {r: ranks.count(r) for r in rank_set},
+        "validationEvery": VALIDATION_EVERY,
+        "baseline": baseline,
+        "calibrated": _summary(fitter),
+        "weights": {
+            f"{scope}.{k}": {"before": round(params.prior[(scope, k)], 3), "after": round(params.value[(scope, k)], 3)}
+            for scope, k in params.names
+            if scope != "model"
+        },
+        "sweeps": sweeps,
+        "evaluations": fitter.evals,
+        "msPerEvaluation": round(1000.0 * fitter.eval_seconds / max(fitter.evals, 1), 3),
+        "featureSeconds": round(feature_seconds, 3),
+        "fitSeconds": round(fit_seconds, 3),
+        "presetsFile": os.path.abspath(args.out),
+    }
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    b, c = report["baseline"], report["calibrated"]
+    print(
+        f"{data.n} drafts, validation log loss {b['validationLogLoss']} -> {c['validationLogLoss']}, "
+        f"accuracy {b['validationAccuracy']} -> {c['validationAccuracy']}, "
+        f"{report['evaluations']} evaluations at {report['msPerEvaluation']} ms; wrote {args.out}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .data import DATA_DIR
+
+
+# hotspicker recommend|score-team|bans
+#
+# Input is one JSON document on stdin, or with --ndjson one document per line
+# (one result line per input line, flushed as it goes). Documents use the same
+# shape as the HTTP API: {"draft": {...}, "settings": {...}} for recommend and
+# bans; {"ourPicks": [...], "enemyPicks": [...]} or a bare list of hero ids
+# for score-team.
+
+_IMPORTED_AT = time.time()
+
+
+def _ms(t: float) -> float:
+    return round((time.perf_counter() - t) * 1000.0, 1)
+
+
+def _process_start() -> float:
+    # Wall-clock start of this process, so startupMs includes interpreter
+    # start and imports. Linux only (/proc); elsewhere the cli import time.
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; starttime (field 22) is index 19
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORTED_AT
+
+
+def _read_docs(ndjson: bool) -> Iterator[Any]:
+    if not ndjson:
+        yield json.load(sys.stdin)
+        return
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _recommender(data_dir: str):
+    from .data import load_map_file
+    from .hero_loader import load_heroes_from_txt
+    from .opponent import OpponentModel, load_pick_rates
+    from .presets import load_presets
+    from .recommender import Recommender
+    from .scouting import ScoutingStore
+    from .win_model import load_win_model
+
+    heroes = load_heroes_from_txt(os.path.join(data_dir, "heroes.txt"))
+    maps, residuals = load_map_file(os.path.join(data_dir, "maps.json"))
+    rates = load_pick_rates(os.path.join(data_dir, "draft_log.jsonl"), {h.hero_id: h for h in heroes})
+    return Recommender(
+        heroes,
+        maps,
+        load_presets(os.path.join(data_dir, "presets.json")),
+        load_win_model(os.path.join(data_dir, "win_model.json")),
+        residuals,
+        OpponentModel(rates),
+        ScoutingStore(os.path.join(data_dir, "scouting")),
+    )
+
+
+def _cmd_recommend(data_dir: str) -> Callable[[Any], Dict[str, Any]]:
+    rec = _recommender(data_dir)
+
+    def run(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return rec.recommend(doc.get("draft", {}) or {}, doc.get("settings", {}) or {})
+
+    return run
+
+
+def _cmd_bans(data_dir: str) -> Callable[[Any], Dict[str, Any]]:
+    rec = _recommender(data_dir)
+
+    def run(doc: Dict[str, Any]) -> Dict[str, Any]:
+        draft = dict(doc.get("draft", {}) or {}, phase="ban")
+        result = rec.recommend(draft, doc.get("settings", {}) or {})
+        return {"banMode": result["banMode"], "recommendations": result["recommendations"]}
+
+    return run
+
+
+def _cmd_score_team(data_dir: str) -> Callable[[Any], Dict[str, Any]]:
+    from .hero_loader import load_heroes_from_txt
+    from .scoring import build_team_state, build_warnings, composition_score, infer_missing_essentials
+
+    hero_by_id = {h.hero_id: h for h in load_heroes_from_txt(os.path.join(data_dir, "heroes.txt"))}
+
+    def run(doc: Any) -> Dict[str, Any]:
+        # A list of hero ids, or {"ourPicks", "enemyPicks"}
+        if isinstance(doc, list):
+            doc = {"ourPicks": doc}
+        if not isinstance(doc, dict):
+            return {"error": "expected a list of hero ids or an object with ourPicks"}
+        our_ids = doc.get("ourPicks", []) or []
+        enemy_ids = doc.get("enemyPicks", []) or []
+        for ids in (our_ids, enemy_ids):
+            if not isinstance(ids, list) or not all(isinstance(hid, str) for hid in ids):
+                return {"error": "ourPicks and enemyPicks must be lists of hero ids"}
+        unknown = [hid for hid in our_ids + enemy_ids if hid not in hero_by_id]
+        if unknown:
+            return {"error": f"unknown heroes: {', '.join(unknown)}"}
+
+        our = build_team_state(hero_by_id, our_ids)
+        enemy = build_team_state(hero_by_id, enemy_ids)
+        return {
+            "compositionScore": composition_score(our),
+            "missing": sorted(infer_missing_essentials(our)),
+            "warnings": build_warnings(our, enemy),
+        }
+
+    return run
+
+
+COMMANDS = {
+    "recommend": _cmd_recommend,
+    "score-team": _cmd_score_team,
+    "bans": _cmd_bans,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="hotspicker", description="HotS draft scoring from the command line")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--ndjson", action="store_true", help="read one JSON document per line")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory holding heroes.txt and maps.json")
+    parser.add_argument("--timing", action="store_true", help="report startup and run times on stderr")
+    args = parser.parse_args(argv)
+
+    t_load = time.perf_counter()
+    run = COMMANDS[args.command](args.data_dir)
+    startup_ms = round((time.time() - _process_start()) * 1000.0, 1)
+    load_ms = _ms(t_load)
+
+    t_run = time.perf_counter()
+    count = 0
+    try:
+        for doc in _read_docs(args.ndjson):
+            result = run(doc)
+            if args.ndjson:
+                sys.stdout.write(json.dumps(result, separators=(",", ":")) + "\n")
+                sys.stdout.flush()
+            else:
+                json.dump(result, sys.stdout, indent=2)
+                sys.stdout.write("\n")
+            count += 1
+    except (ValueError, AttributeError) as e:
+        print(f"hotspicker: bad input: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Reader went away (e.g. piped into head)
+        return 0
+
+    if args.timing:
+        timing = {"startupMs": startup_ms, "loadMs": load_ms, "runMs": _ms(t_run), "documents": count}
+        print(json.dumps(timing), file=sys.stderr)
+    return 0
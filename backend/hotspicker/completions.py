@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import heapq
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .player_pools import PoolAssignment
+from .team_bits import HeroBits, TeamBits
+
+
+TEAM_SIZE = 5
+
+
+def best_completions(
+    bits: HeroBits,
+    team: TeamBits,
+    pick_values: Dict[str, float],
+    top_k: int = 10,
+    max_nodes: int = 2_000_000,
+    slots: Optional[int] = None,
+    deadline: Optional[float] = None,
+    assignment: Optional[PoolAssignment] = None,
+) -> Dict[str, Any]:
+    # Top-k ways to fill the team from the candidate pool, ranked by
+    # composition_score(final five) + summed pick value of the added heroes.
+    #
+    # Branch and bound over candidates sorted by pick value: the best the rest
+    # of a branch can add is the next `slots` values in that order, and the
+    # composition score can only lose its weakness penalties as heroes join.
+    #
+    # `slots` caps how many heroes are added (default: fill the team);
+    # `deadline` is a time.perf_counter() value after which the search stops
+    # and reports completed=False with the best found so far. With an
+    # `assignment` (player pools, holding the team's picks), only teams the
+    # players can cover are kept.
+    if slots is None:
+        slots = TEAM_SIZE - team.count
+    ranked = sorted(
+        ((v, bits.index[hid]) for hid, v in pick_values.items() if hid in bits.index),
+        reverse=True,
+    )
+    values = [v for v, _ in ranked]
+    order = [i for _, i in ranked]
+    n = len(order)
+
+    prefix = [0.0]
+    for v in values:
+        prefix.append(prefix[-1] + v)
+
+    heap: List[Tuple[float, int, Tuple[int, ...], float, float]] = []
+    seq = 0
+    nodes = 0
+    truncated = False
+
+    def dfs(start: int, t: TeamBits, value: float, left: int, chosen: Tuple[int, ...]) -> None:
+        nonlocal seq, nodes, truncated
+        if left == 0:
+            comp = bits.composition_score(t)
+            total = comp + value
+            seq += 1
+            item = (total, -seq, chosen, comp, value)
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif total > heap[0][0]:
+                heapq.heapreplace(heap, item)
+            return
+
+        for j in range(start, n - left + 1):
+            full = len(heap) >= top_k
+            if full:
+                # Ordering makes this bound non-increasing in j, so stop the loop
+                bound = value + prefix[j + left] - prefix[j] + 100 - bits.weakness_penalty(t)
+                if bound <= heap[0][0]:
+                    break
+
+            nodes += 1
+            if nodes > max_nodes:
+                truncated = True
+                return
+            if deadline is not None and not nodes & 255 and time.perf_counter() > deadline:
+                truncated = True
+                return
+
+            child = bits.add(t, order[j])
+            if full:
+                child_bound = (
+                    value + prefix[j + left] - prefix[j] + 100 - bits.weakness_penalty(child)
+                )
+                if child_bound <= heap[0][0]:
+                    continue
+            if assignment is None:
+                dfs(j + 1, child, value + values[j], left - 1, chosen + (order[j],))
+            else:
+                hid = bits.heroes[order[j]].hero_id
+                if assignment.add(hid):
+                    dfs(j + 1, child, value + values[j], left - 1, chosen + (order[j],))
+                assignment.remove(hid)
+            if truncated:
+                return
+
+    if slots > 0 and n >= slots:
+        dfs(0, team, 0.0, slots, ())
+
+    best = sorted(heap, reverse=True)
+    completions = []
+    appearances: Counter = Counter()
+    first_seen: Dict[str, int] = {}
+    for rank, (total, _, chosen, comp, value) in enumerate(best):
+        added = [bits.heroes[i].hero_id for i in chosen]
+        final = team
+        for i in chosen:
+            final = bits.add(final, i)
+        for hid in added:
+            appearances[hid] += 1
+            first_seen.setdefault(hid, rank)
+        completions.append(
+            {
+                "heroes": added,
+                "team": bits.ids(final),
+                "total": round(total, 1),
+                "compositionScore": round(comp, 1),
+                "pickValue": round(value, 1),
+                "missing": bits.missing(final),
+            }
+        )
+
+    # Next pick: the hero that shows up in the most top completions
+    next_pick = None
+    if appearances:
+        next_pick = min(appearances, key=lambda hid: (-appearances[hid], first_seen[hid]))
+
+    return {
+        "completions": completions,
+        "nextPick": next_pick,
+        "nextPickCount": appearances.get(next_pick, 0) if next_pick else 0,
+        "slots": max(slots, 0),
+        "nodes": nodes,
+        "completed": not truncated,
+    }
+
+
+def lookahead_values(
+    bits: HeroBits,
+    team: TeamBits,
+    pick_values: Dict[str, float],
+    beam: List[str],
+    deadline: float,
+    on_depth: Optional[Callable[[Dict[str, float], int], None]] = None,
+) -> Tuple[Dict[str, float], int, bool]:
+    # Iterative deepening over our own future picks for the candidates in
+    # `beam`: at depth d a candidate is worth its pick value plus the best
+    # composition_score + pick value reachable by adding d more heroes.
+    # Returns the values of the deepest depth finished before the deadline;
+    # on_depth(values, depth) is called as each depth finishes.
+    max_depth = TEAM_SIZE - team.count - 1
+    values: Dict[str, float] = {}
+    depth_reached = 0
+
+    for depth in range(1, max_depth + 1):
+        layer: Dict[str, float] = {}
+        for hid in beam:
+            if time.perf_counter() > deadline:
+                return values, depth_reached, False
+            rest = {k: v for k, v in pick_values.items() if k != hid}
+            result = best_completions(
+                bits, bits.add(team, bits.index[hid]), rest, top_k=1, slots=depth, deadline=deadline
+            )
+            if not result["completed"]:
+                return values, depth_reached, False
+            best = result["completions"][0]["total"] if result["completions"] else 0.0
+            layer[hid] = pick_values[hid] + best
+        values = layer
+        depth_reached = depth
+        if on_depth is not None:
+            on_depth(values, depth)
+
+    return values, depth_reached, True
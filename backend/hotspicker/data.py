@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from .hero_loader import HeroProfile, load_heroes_from_txt
+
+
+# heroes.txt and maps.json live in backend/data next to the package;
+# HOTSPICKER_DATA_DIR points scripts and the CLI at another copy.
+DATA_DIR = os.environ.get("HOTSPICKER_DATA_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
+)
+
+
+# maps.json: {map name: {tag: multiplier}}, plus "_mapIds" (see
+# load_map_ids). Files written by hotspicker.map_fit add "_version" and
+# "_meta" at the top level and a
+# "_heroes" table of per-hero residuals inside each map; "_" keys are never
+# tags, so a hand-written file and a fitted one load the same way.
+MAPS_FILE_VERSION = 1
+
+
+def load_map_file(path: str) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]:
+    # maps.json is optional: no file means no map-specific weighting
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    version = raw.get("_version", MAPS_FILE_VERSION)
+    if version != MAPS_FILE_VERSION:
+        raise ValueError(f"{path}: unsupported maps file version {version!r}")
+
+    maps: Dict[str, Dict[str, float]] = {}
+    residuals: Dict[str, Dict[str, float]] = {}
+    for name, entry in raw.items():
+        if name.startswith("_"):
+            continue
+        maps[name] = {tag: float(v) for tag, v in entry.items() if not tag.startswith("_")}
+        if entry.get("_heroes"):
+            residuals[name] = {hid: float(v) for hid, v in entry["_heroes"].items()}
+    return maps, residuals
+
+
+def load_map_ids(path: str) -> List[str]:
+    # "_mapIds": map names in the order draft codes number them. Append-only:
+    # a new map goes at the end and a removed one keeps its place.
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        ids = json.load(f).get("_mapIds", [])
+    if not isinstance(ids, list) or not all(isinstance(m, str) for m in ids):
+        raise ValueError(f"{path}: _mapIds must be a list of map names")
+    return ids
+
+
+def extend_map_ids(map_ids: List[str], map_names: List[str]) -> List[str]:
+    # map_ids plus the maps it does not list yet, appended in name order
+    listed = set(map_ids)
+    return list(map_ids) + sorted(m for m in set(map_names) if m not in listed)
+
+
+def load_maps(path: str) -> Dict[str, Dict[str, float]]:
+    return load_map_file(path)[0]
+
+
+def load_data(data_dir: str = DATA_DIR) -> Tuple[List[HeroProfile], Dict[str, Dict[str, float]]]:
+    heroes = load_heroes_from_txt(os.path.join(data_dir, "heroes.txt"))
+    maps = load_maps(os.path.join(data_dir, "maps.json"))
+    return heroes, maps
+
+
+def write_json_atomic(path: str, doc: Any, indent: int | None = 2) -> None:
+    # The server may be watching this file; never let it see half a write
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        if indent is None:
+            json.dump(doc, f, separators=(",", ":"))
+        else:
+            json.dump(doc, f, indent=indent)
+        f.write("\n")
+    os.replace(tmp, path)
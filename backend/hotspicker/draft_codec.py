@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data import extend_map_ids
+from .presets import RANK_PRESETS
+
+
+# Compact draft codes: a draft state plus the settings that change the
+# recommendation output, packed into bytes and base64url-encoded without
+# padding. Lists are sorted, so one state has exactly one code; a full
+# draft (5 + 5 picks, 6 bans) is 28 characters.
+#
+#   byte 0   codec version
+#   byte 1   bit 0 ban phase, bit 1 enemy to act, bit 2 early pick window,
+#            bit 3 simple comps, bit 4 denial ban mode, bits 5-6 rank preset,
+#            bit 7 anticipate enemy
+#   byte 2   map id (0 = no map)
+#   byte 3   our pick count << 4 | enemy pick count
+#   byte 4   ban count
+#   then     hero indices (our, enemy, bans), one byte each
+#
+# Hero indices follow heroes.txt order, so codes are tied to the data
+# version; the HTTP layer puts that version in the ETag. Map ids are
+# positions in the append-only "_mapIds" list of maps.json (see
+# data.load_map_ids), so adding a map does not re-point existing codes.
+
+CODEC_VERSION = 1
+TEAM_SIZE = 5
+MAX_BANS = 16
+
+RANK_NAMES: List[str] = list(RANK_PRESETS)
+
+
+class DraftCodeError(ValueError):
+    pass
+
+
+class DraftCodec:
+    def __init__(self, hero_ids: List[str], map_names: List[str], map_ids: Optional[List[str]] = None):
+        if len(hero_ids) > 255:
+            raise ValueError("draft codes hold at most 255 heroes")
+        self.hero_ids = list(hero_ids)
+        self.hero_index: Dict[str, int] = {hid: i for i, hid in enumerate(self.hero_ids)}
+        # Maps missing from map_ids are numbered after it in name order; ids
+        # of maps that were removed stay reserved
+        self.map_ids = extend_map_ids(map_ids or [], map_names)
+        if len(self.map_ids) > 255:
+            raise ValueError("draft codes hold at most 255 maps")
+        current = set(map_names)
+        self.map_index: Dict[str, int] = {m: i + 1 for i, m in enumerate(self.map_ids) if m in current}
+        self.map_of_index: Dict[int, str] = {i: m for m, i in self.map_index.items()}
+
+    def _indices(self, hero_ids: List[str], limit: int, what: str) -> List[int]:
+        ids = sorted(set(hero_ids or []))
+        if len(ids) > limit:
+            raise DraftCodeError(f"too many {what}")
+        try:
+            return sorted(self.hero_index[hid] for hid in ids)
+        except KeyError as e:
+            raise DraftCodeError(f"unknown hero: {e.args[0]}") from None
+
+    def encode(self, draft: Dict[str, Any], settings: Dict[str, Any]) -> str:
+        our = self._indices(draft.get("ourPicks", []), TEAM_SIZE, "picks")
+        enemy = self._indices(draft.get("enemyPicks", []), TEAM_SIZE, "picks")
+        bans = self._indices(draft.get("bans", []), MAX_BANS, "bans")
+        if len(set(our + enemy + bans)) < len(our) + len(enemy) + len(bans):
+            raise DraftCodeError("a hero appears more than once across picks and bans")
+
+        map_name = (settings.get("mapName") or "").strip()
+        if map_name and map_name not in self.map_index:
+            raise DraftCodeError(f"unknown map: {map_name}")
+        rank = settings.get("rankPreset", "Silver")
+        if rank not in RANK_NAMES:
+            raise DraftCodeError(f"unknown rank preset: {rank}")
+        if (settings.get("opponentProfile") or "").strip():
+            raise DraftCodeError("opponent profiles are not part of draft codes")
+        if settings.get("playerPools"):
+            raise DraftCodeError("player pools are not part of draft codes")
+        if settings.get("responseMode", "top") != "top":
+            raise DraftCodeError("only the default response mode has draft codes")
+
+        flags = (
+            (draft.get("phase", "pick") == "ban")
+            | (draft.get("sideToAct", "ally") == "enemy") << 1
+            | bool(draft.get("earlyPickWindow", True)) << 2
+            | bool(settings.get("simpleComps", True)) << 3
+            | (settings.get("banMode", "threat") == "denial") << 4
+            | RANK_NAMES.index(rank) << 5
+            | bool(settings.get("anticipateEnemy")) << 7
+        )
+        raw = bytes(
+            [CODEC_VERSION, flags, self.map_index.get(map_name, 0), len(our) << 4 | len(enemy), len(bans)]
+            + our
+            + enemy
+            + bans
+        )
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    def decode(self, code: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        try:
+            raw = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+        except (ValueError, TypeError):
+            raise DraftCodeError("malformed draft code") from None
+        if len(raw) < 5 or raw[0] != CODEC_VERSION:
+            raise DraftCodeError("unsupported draft code")
+
+        flags, map_idx = raw[1], raw[2]
+        n_our, n_enemy, n_bans = raw[3] >> 4, raw[3] & 0x0F, raw[4]
+        heroes = raw[5:]
+        if n_our > TEAM_SIZE or n_enemy > TEAM_SIZE or n_bans > MAX_BANS:
+            raise DraftCodeError("malformed draft code")
+        if len(heroes) != n_our + n_enemy + n_bans or len(set(heroes)) != len(heroes):
+            raise DraftCodeError("malformed draft code")
+        if any(i >= len(self.hero_ids) for i in heroes):
+            raise DraftCodeError("draft code refers to an unknown hero")
+        if (flags >> 5 & 3) >= len(RANK_NAMES):
+            raise DraftCodeError("malformed draft code")
+        if map_idx and map_idx not in self.map_of_index:
+            raise DraftCodeError("draft code refers to an unknown map")
+
+        ids = [self.hero_ids[i] for i in heroes]
+        draft = {
+            "phase": "ban" if flags & 1 else "pick",
+            "sideToAct": "enemy" if flags & 2 else "ally",
+            "earlyPickWindow": bool(flags & 4),
+            "ourPicks": ids[:n_our],
+            "enemyPicks": ids[n_our:n_our + n_enemy],
+            "bans": ids[n_our + n_enemy:],
+        }
+        settings = {
+            "rankPreset": RANK_NAMES[flags >> 5 & 3],
+            "simpleComps": bool(flags & 8),
+            "mapName": self.map_of_index[map_idx] if map_idx else "",
+            "banMode": "denial" if flags & 16 else "threat",
+        }
+        if flags & 128:
+            settings["anticipateEnemy"] = True
+        # Unsorted lists or stray bits would give a second URL for one state
+        if self.encode(draft, settings) != code:
+            raise DraftCodeError("non-canonical draft code")
+        return draft, settings
@@ -63,6 +63,9 @@ class HeroProfile:
 
     raw: Dict[str, str] = field(default_factory=dict)
 
+    # Tag bitmasks, built on first use by matrices.hero_masks
+    masks: Any = field(default=None, repr=False, compare=False)
+
 
 def hero_id_from_name(name: str) -> str:
     n = unicodedata.normalize("NFKD", name).lower()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from .hero_loader import HeroProfile
+from .presets import WeightPreset
+from .scoring import MapBonus, build_map_bonus
+
+
+# Per-map hero tables built once from maps.json.
+#
+# Each map gets a scoring.MapBonus: per hero, the functional values with the
+# map multiplier applied and the raw map fit (how far the boosted tags the
+# hero provides sit above 1.0, plus any learned per-hero residual).
+# pick_score, ban_score and the map comparison all read these instead of
+# walking the map weights per hero per request.
+
+
+class MapTable:
+    def __init__(
+        self,
+        heroes: List[HeroProfile],
+        maps: Dict[str, Dict[str, float]],
+        residuals: Dict[str, Dict[str, float]] | None = None,
+    ):
+        self.heroes = heroes
+        self.map_names: List[str] = sorted(maps)
+        residuals = residuals or {}
+        self.bonus: Dict[str, MapBonus] = {
+            m: build_map_bonus(m, maps[m], heroes, residuals.get(m)) for m in self.map_names
+        }
+        self.no_map = build_map_bonus("", {}, heroes)
+
+        # fit[map][hero_id], kept as its own table for whole-pool map comparisons
+        self.fit: Dict[str, Dict[str, float]] = {m: b.fit for m, b in self.bonus.items()}
+
+    def bonus_for(self, map_name: str) -> MapBonus:
+        return self.bonus.get(map_name, self.no_map)
+
+    def team_fit(self, map_name: str, hero_ids: List[str]) -> float:
+        fit = self.fit.get(map_name)
+        if not fit:
+            return 0.0
+        return sum(fit.get(hid, 0.0) for hid in hero_ids)
+
+    def compare(self, our_ids: List[str], enemy_ids: List[str], preset: WeightPreset) -> List[Dict[str, Any]]:
+        # Team map fit at the preset's late-draft map weight
+        weight = preset.coefficients["map_fit_late"]
+        rows = []
+        for m in self.map_names:
+            our_fit = self.team_fit(m, our_ids) * weight
+            enemy_fit = self.team_fit(m, enemy_ids) * weight
+            rows.append(
+                {
+                    "mapName": m,
+                    "ourMapFit": round(our_fit, 1),
+                    "enemyMapFit": round(enemy_fit, 1),
+                    "mapFitDelta": round(our_fit - enemy_fit, 1),
+                }
+            )
+        rows.sort(key=lambda r: (-r["mapFitDelta"], -r["ourMapFit"], r["mapName"]))
+        return rows
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .data import DATA_DIR, MAPS_FILE_VERSION, extend_map_ids, load_map_file, load_map_ids, write_json_atomic
+from .hero_loader import HeroProfile, load_heroes_from_txt
+from .win_train import match_teams
+
+
+# Learn maps.json from match results.
+#
+#   python -m hotspicker.map_fit matches.jsonl --out data/maps.json
+#
+# Same match file as hotspicker.win_train. The file is read in chunks and
+# only win/loss counts are kept, so memory does not grow with the file:
+#
+#   per (map, tag)   matches where exactly one team provides the tag, and how
+#                    often that team won
+#   per (map, hero)  appearances and wins from the hero's side
+#   plus the same counts over all maps
+#
+# A tag's multiplier is exp(log-odds edge on this map - edge over all maps),
+# blended in log space with the current value with --prior-strength matches
+# of weight, so maps with little data keep their hand-written numbers. A
+# hero's residual is what its own map edge shows beyond the tag fit the
+# scorer already gives it, shrunk towards 0 the same way.
+#
+# The output keeps the maps.json shape (see data.load_map_file) and is
+# written atomically; the server reloads maps.json when it changes.
+
+CHUNK_SIZE = 5000
+MULT_RANGE = (0.5, 2.0)
+RESIDUAL_LIMIT = 0.5
+
+
+def iter_chunks(path: str, size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                raise SystemExit(f"{path}:{n}: not valid JSON")
+            if "win" not in rec or not (rec.get("mapName") or "").strip():
+                continue
+            chunk.append(rec)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _edge(n: int, wins: int) -> float:
+    # Log-odds with one pseudo win and loss, so empty cells read as even
+    return math.log((wins + 1.0) / (n - wins + 1.0))
+
+
+class MapStats:
+    def __init__(self, hero_by_id: Dict[str, HeroProfile], tags: List[str]):
+        self.hero_by_id = hero_by_id
+        self.tags = tags
+        self.matches: Dict[str, int] = {}
+        # [n, wins]
+        self.tag: Dict[Tuple[str, str], List[int]] = {}
+        self.tag_all: Dict[str, List[int]] = {}
+        self.hero: Dict[Tuple[str, str], List[int]] = {}
+        self.hero_all: Dict[str, List[int]] = {}
+
+    def _provides(self, hero_ids: List[str]) -> Set[str]:
+        out: Set[str] = set()
+        for hid in hero_ids:
+            out.update(self.hero_by_id[hid].provides)
+        return out
+
+    def add_chunk(self, records: List[Dict[str, Any]]) -> None:
+        for rec in records:
+            map_name = rec["mapName"].strip()
+            win = 1 if rec["win"] else 0
+            our, enemy = match_teams(rec)
+            our = [hid for hid in our if hid in self.hero_by_id]
+            enemy = [hid for hid in enemy if hid in self.hero_by_id]
+            self.matches[map_name] = self.matches.get(map_name, 0) + 1
+
+            our_tags, enemy_tags = self._provides(our), self._provides(enemy)
+            for tag in self.tags:
+                ours, theirs = tag in our_tags, tag in enemy_tags
+                if ours == theirs:
+                    continue
+                won = win if ours else 1 - win
+                for cell in (self.tag.setdefault((map_name, tag), [0, 0]), self.tag_all.setdefault(tag, [0, 0])):
+                    cell[0] += 1
+                    cell[1] += won
+
+            for side, won in ((our, win), (enemy, 1 - win)):
+                for hid in side:
+                    for cell in (self.hero.setdefault((map_name, hid), [0, 0]), self.hero_all.setdefault(hid, [0, 0])):
+                        cell[0] += 1
+                        cell[1] += won
+
+
+def fit_maps(
+    stats: MapStats,
+    prior: Dict[str, Dict[str, float]],
+    prior_strength: float,
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]:
+    maps: Dict[str, Dict[str, float]] = {}
+    for map_name in sorted(set(prior) | set(stats.matches)):
+        weights = {}
+        for tag in stats.tags:
+            before = float(prior.get(map_name, {}).get(tag, 1.0))
+            n, wins = stats.tag.get((map_name, tag), [0, 0])
+            if n:
+                all_n, all_wins = stats.tag_all[tag]
+                log_m = (n * (_edge(n, wins) - _edge(all_n, all_wins)) + prior_strength * math.log(before)) / (
+                    n + prior_strength
+                )
+                weights[tag] = round(min(max(math.exp(log_m), MULT_RANGE[0]), MULT_RANGE[1]), 2)
+            else:
+                weights[tag] = before
+        maps[map_name] = weights
+
+    residuals: Dict[str, Dict[str, float]] = {}
+    for (map_name, hid), (n, wins) in stats.hero.items():
+        all_n, all_wins = stats.hero_all[hid]
+        hero = stats.hero_by_id[hid]
+        # Same sum as scoring._hero_map_fit
+        tag_fit = sum(m - 1.0 for tag, m in maps[map_name].items() if m > 1.0 and tag in hero.provides)
+        r = n / (n + prior_strength) * (_edge(n, wins) - _edge(all_n, all_wins) - tag_fit)
+        r = round(min(max(r, -RESIDUAL_LIMIT), RESIDUAL_LIMIT), 3)
+        if abs(r) >= 0.01:
+            residuals.setdefault(map_name, {})[hid] = r
+    return maps, residuals
+
+
+def maps_file(
+    maps: Dict[str, Dict[str, float]],
+    residuals: Dict[str, Dict[str, float]],
+    meta: Dict[str, Any],
+    map_ids: List[str],
+) -> Dict[str, Any]:
+    # map_ids: the current "_mapIds"; maps new to it are appended
+    out: Dict[str, Any] = {
+        "_version": MAPS_FILE_VERSION,
+        "_meta": meta,
+        "_mapIds": extend_map_ids(map_ids, list(maps)),
+    }
+    for map_name in sorted(maps):
+        entry: Dict[str, Any] = dict(maps[map_name])
+        if residuals.get(map_name):
+            entry["_heroes"] = {hid: residuals[map_name][hid] for hid in sorted(residuals[map_name])}
+        out[map_name] = entry
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="hotspicker.map_fit", description="Fit map tag weights to match results")
+    parser.add_argument("matches", help="NDJSON file of matches with outcomes and map names")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", default="maps.fitted.json", help="maps file to write")
+    parser.add_argument("--report", default="", help="write the fit report here as JSON")
+    parser.add_argument("--prior-strength", type=float, default=200.0, help="matches of weight on the current values")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    heroes = load_heroes_from_txt(os.path.join(args.data_dir, "heroes.txt"))
+    prior, _residuals = load_map_file(os.path.join(args.data_dir, "maps.json"))
+    map_ids = load_map_ids(os.path.join(args.data_dir, "maps.json"))
+    tags = list(dict.fromkeys(tag for weights in prior.values() for tag in weights))
+    if not tags:
+        print("hotspicker.map_fit: the current maps.json lists no tags to fit", file=sys.stderr)
+        return 2
+
+    stats = MapStats({h.hero_id: h for h in heroes}, tags)
+    t0 = time.perf_counter()
+    chunks = 0
+    for chunk in iter_chunks(args.matches, max(args.chunk_size, 1)):
+        stats.add_chunk(chunk)
+        chunks += 1
+    read_seconds = time.perf_counter() - t0
+
+    total = sum(stats.matches.values())
+    if not total:
+        print("hotspicker.map_fit: no matches with a map and an outcome", file=sys.stderr)
+        return 2
+
+    maps, residuals = fit_maps(stats, prior, args.prior_strength)
+    meta = {"matches": total, "priorStrength": args.prior_strength, "source": os.path.basename(args.matches)}
+    write_json_atomic(args.out, maps_file(maps, residuals, meta, map_ids))
+
+    report = {
+        "matches": total,
+        "chunks": chunks,
+        "readSeconds": round(read_seconds, 3),
+        "maps": {
+            m: {
+                "matches": stats.matches.get(m, 0),
+                "changed": {
+                    tag: {"before": prior.get(m, {}).get(tag, 1.0), "after": v}
+                    for tag, v in maps[m].items()
+                    if v != prior.get(m, {}).get(tag, 1.0)
+                },
+                "residuals": len(residuals.get(m, {})),
+            }
+            for m in sorted(maps)
+        },
+    }
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    changed = sum(len(r["changed"]) for r in report["maps"].values())
+    print(
+        f"{total} matches in {chunks} chunks ({read_seconds:.2f}s), {changed} tag weights changed, "
+        f"{sum(len(r) for r in residuals.values())} hero residuals; wrote {args.out}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from .hero_loader import HeroProfile
+from .presets import ScoringWeights, WeightPreset
+
+
+# Hero x tag incidence masks and the team-level interaction rules that
+# pick_score, ban_score and build_warnings score with.
+#
+# Every provide/need tag gets a bit (one registry, append-only, so a bit never
+# changes meaning within a process). Per hero:
+#   provides  tags the hero brings, Stealth included when stealth == "Y"
+#   needs     tags the hero wants from teammates
+# TeamState keeps the OR of its heroes' provide masks, so synergy is
+# popcount(needs & team provides) and the counter rules are mask tests on the
+# hero against the team's tag counts.
+#
+# The hero x hero tables apply the same rules to one-hero teams:
+# synergy[a][b]  what a scores for synergy with b as its only teammate
+# counter[a][b]  what a scores against b as the whole enemy team
+# and team_report applies them to whole teams.
+
+DIVE_TAGS = ("DiveEnable", "Engage")
+
+TAG_BIT: Dict[str, int] = {}
+
+
+def tag_bit(tag: str) -> int:
+    bit = TAG_BIT.get(tag)
+    if bit is None:
+        bit = TAG_BIT[tag] = 1 << len(TAG_BIT)
+    return bit
+
+
+def tag_mask(tags: Iterable[str]) -> int:
+    m = 0
+    for t in tags:
+        m |= tag_bit(t)
+    return m
+
+
+def popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+STEALTH = tag_bit("Stealth")
+PEEL = tag_bit("Peel")
+ANTI_DIVE = tag_bit("AntiDive")
+DIVE = tag_mask(DIVE_TAGS)
+
+
+class HeroMasks(NamedTuple):
+    provides: int
+    needs: int
+    # (tag, bit) per need, in heroes.txt order, for feature labels
+    need_bits: Tuple[Tuple[str, int], ...]
+
+
+def _provides(h: HeroProfile) -> List[str]:
+    p = list(h.provides)
+    if h.stealth == "Y":
+        p.append("Stealth")
+    return p
+
+
+def hero_masks(h: HeroProfile) -> HeroMasks:
+    m = h.masks
+    if m is None:
+        m = h.masks = HeroMasks(
+            provides=tag_mask(_provides(h)),
+            needs=tag_mask(h.needs),
+            need_bits=tuple((t, tag_bit(t)) for t in h.needs),
+        )
+    return m
+
+
+# -------------------------
+# TEAM-LEVEL RULES
+# -------------------------
+# Team tag counts are TeamState.provides / TeamState.weaknesses.
+
+STEALTH_THREAT = 30.0
+DIVE_THREAT = 15.0
+
+# (feature label, pick_score weight key, hero provide bit); scored when the
+# enemy stacks dive
+DIVE_ANSWERS: List[Tuple[str, str, int]] = [
+    ("Answers dive", "answers_dive", ANTI_DIVE),
+    ("Extra peel vs dive", "peel_vs_dive", PEEL),
+]
+DIVE_ANSWER_MASK = ANTI_DIVE | PEEL
+
+
+def dive_stacked(provides: Dict[str, int]) -> bool:
+    return sum(provides.get(t, 0) for t in DIVE_TAGS) >= 2
+
+
+def low_mobility_stacked(weaknesses: Dict[str, int]) -> bool:
+    return weaknesses.get("LowMobility", 0) >= 2
+
+
+def synergy_hits(masks: HeroMasks, team_provides: int) -> int:
+    # Needs the team already covers
+    return masks.needs & team_provides
+
+
+def counter_features(masks: HeroMasks, enemy_provides: Dict[str, int]) -> List[Tuple[str, str, float]]:
+    # pick_score's enemy context, as (label, weight key, amount)
+    if not masks.provides & DIVE_ANSWER_MASK or not dive_stacked(enemy_provides):
+        return []
+    return [(label, key, 1.0) for label, key, bit in DIVE_ANSWERS if masks.provides & bit]
+
+
+def threat_contribs(
+    masks: HeroMasks, lacks_reveal: bool, weaknesses: Dict[str, int]
+) -> List[Tuple[str, float]]:
+    # ban_score's counter rules: what the hero exploits in the team it would
+    # face. lacks_reveal: that team has no reveal against stealth.
+    out: List[Tuple[str, float]] = []
+    if masks.provides & STEALTH and lacks_reveal:
+        out.append(("Stealth threat and you lack Reveal", STEALTH_THREAT))
+    if masks.provides & DIVE and low_mobility_stacked(weaknesses):
+        out.append(("Punishes LowMobility stack", DIVE_THREAT))
+    return out
+
+
+class _Team(NamedTuple):
+    provides: Dict[str, int]
+    weaknesses: Dict[str, int]
+    provide_mask: int
+    has_reveal: bool
+
+
+class HeroMatrices:
+    def __init__(self, heroes: List[HeroProfile], preset: WeightPreset | None = None):
+        self.heroes = heroes
+        self.index: Dict[str, int] = {h.hero_id: i for i, h in enumerate(heroes)}
+        # pick_score weights for synergy and the dive answers
+        coef = preset.coefficients if preset is not None else vars(ScoringWeights())
+        self.synergy_weight: float = coef["synergy"]
+        self.answer_weights: Dict[str, float] = {key: coef[key] for _label, key, _bit in DIVE_ANSWERS}
+
+        self.masks: List[HeroMasks] = [hero_masks(h) for h in heroes]
+        solo = [self._team([i]) for i in range(len(heroes))]
+        n = len(heroes)
+
+        self.synergy: List[List[float]] = [
+            [0.0 if a == b else self.synergy_score(a, solo[b]) for b in range(n)] for a in range(n)
+        ]
+        self.counter: List[List[float]] = [
+            [0.0 if a == b else self.counter_score(a, solo[b]) for b in range(n)] for a in range(n)
+        ]
+
+    def indices(self, hero_ids: List[str]) -> List[int]:
+        return [self.index[hid] for hid in hero_ids if hid in self.index]
+
+    def _team(self, idxs: Iterable[int]) -> _Team:
+        provides: Dict[str, int] = {}
+        weaknesses: Dict[str, int] = {}
+        mask = 0
+        reveal = False
+        for i in idxs:
+            h = self.heroes[i]
+            for t in _provides(h):
+                provides[t] = provides.get(t, 0) + 1
+            for w in h.weaknesses:
+                weaknesses[w] = weaknesses.get(w, 0) + 1
+            mask |= self.masks[i].provides
+            reveal = reveal or h.reveal == "Y"
+        return _Team(provides, weaknesses, mask, reveal)
+
+    def synergy_score(self, i: int, mates: _Team) -> float:
+        return self.synergy_weight * popcount(synergy_hits(self.masks[i], mates.provide_mask))
+
+    def counter_score(self, i: int, foes: _Team) -> float:
+        # Dive answers as pick_score weighs them, threats as ban_score does
+        masks = self.masks[i]
+        score = 0.0
+        for _label, key, amount in counter_features(masks, foes.provides):
+            score += self.answer_weights[key] * amount
+        for _label, value in threat_contribs(masks, not foes.has_reveal, foes.weaknesses):
+            score += value
+        return score
+
+    def team_report(self, our_ids: List[str], enemy_ids: List[str]) -> Dict[str, Any]:
+        our = self.indices(our_ids)
+        enemy = self.indices(enemy_ids)
+
+        def per_hero(idxs: List[int], foes: List[int]) -> List[Dict[str, Any]]:
+            foe_team = self._team(foes)
+            return [
+                {
+                    "hero_id": self.heroes[i].hero_id,
+                    "synergy": self.synergy_score(i, self._team(j for j in idxs if j != i)),
+                    "counters": self.counter_score(i, foe_team),
+                }
+                for i in idxs
+            ]
+
+        our_rows = per_hero(our, enemy)
+        enemy_rows = per_hero(enemy, our)
+        return {
+            "our": our_rows,
+            "enemy": enemy_rows,
+            "ourSynergy": sum(r["synergy"] for r in our_rows),
+            "enemySynergy": sum(r["synergy"] for r in enemy_rows),
+            "ourCounterPressure": sum(r["counters"] for r in our_rows),
+            "enemyCounterPressure": sum(r["counters"] for r in enemy_rows),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "heroes": [h.hero_id for h in self.heroes],
+            "synergyPerNeed": self.synergy_weight,
+            "counterRules": [
+                {"label": "Stealth vs no reveal", "weight": STEALTH_THREAT},
+                {"label": "Dive vs LowMobility stack", "weight": DIVE_THREAT},
+            ]
+            + [{"label": label, "weight": self.answer_weights[key]} for label, key, _bit in DIVE_ANSWERS],
+            "synergy": self.synergy,
+            "counter": self.counter,
+        }
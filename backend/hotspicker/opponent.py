@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .hero_loader import HeroProfile
+from .scouting import ScoutingProfile
+from .scoring import TeamState, add_hero
+
+
+# Opponent model: how likely each available hero is to be the other side's
+# next pick.
+#
+# A softmax over that side's pick scores (pick_score from its perspective),
+# blended with empirical pick rates from a local draft log when one exists.
+# Pick rates are counted per state abstraction (map, how many heroes the
+# picking team has, which roles it already holds) and fall back to coarser
+# abstractions when a cell has too few picks. The blend weight grows with
+# the number of picks behind the cell.
+#
+# With a scouting profile for the opponent (hotspicker.scouting), its own pick
+# habits are blended in as well, weighted by how many of its drafts were seen.
+#
+# Distributions are cached per draft state, so the expectimax pass for an
+# ally pick and the enemy-to-act request that follows it share one entry.
+
+TEMPERATURE = 10.0      # pick-score points per e-fold of odds
+MAX_RATE_BLEND = 0.5
+RATE_PRIOR = 50.0       # picks at which the log gets half of MAX_RATE_BLEND
+MIN_CELL_PICKS = 20
+MAX_PROFILE_BLEND = 0.5
+PROFILE_PRIOR = 10.0    # scouted drafts at which a profile gets half of MAX_PROFILE_BLEND
+CACHE_SIZE = 4096
+
+Abstraction = Tuple[Any, ...]
+
+
+def abstractions(map_name: str, team: TeamState) -> List[Abstraction]:
+    # Most specific first
+    roles = tuple(sorted(team.roles))
+    count = len(team.picks)
+    return [(map_name, count, roles), ("", count, roles), ("", count, ())]
+
+
+class PickRates:
+    def __init__(self) -> None:
+        self.counts: Dict[Abstraction, Dict[str, int]] = {}
+        self.totals: Dict[Abstraction, int] = {}
+        self.drafts = 0
+        # Log lines that were not a draft record
+        self.skipped = 0
+
+    def add_pick(self, map_name: str, team: TeamState, hero_id: str) -> None:
+        for cell in set(abstractions(map_name, team)):
+            row = self.counts.setdefault(cell, {})
+            row[hero_id] = row.get(hero_id, 0) + 1
+            self.totals[cell] = self.totals.get(cell, 0) + 1
+
+    def lookup(self, map_name: str, team: TeamState) -> Tuple[Dict[str, int], int]:
+        for cell in abstractions(map_name, team):
+            n = self.totals.get(cell, 0)
+            if n >= MIN_CELL_PICKS:
+                return self.counts[cell], n
+        return {}, 0
+
+
+def load_pick_rates(path: str, hero_by_id: Dict[str, HeroProfile]) -> Optional[PickRates]:
+    # Draft log in the draft-session history shape (see hotspicker.calibrate);
+    # no file means softmax only. Bad lines are skipped, so a damaged log
+    # never keeps the server from starting
+    if not os.path.exists(path):
+        return None
+    rates = PickRates()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                rec = None
+            if not isinstance(rec, dict) or not isinstance(rec.get("history") or [], list):
+                rates.skipped += 1
+                continue
+            map_name = rec.get("mapName")
+            map_name = map_name.strip() if isinstance(map_name, str) else ""
+            teams = {"ally": TeamState(), "enemy": TeamState()}
+            for action in rec.get("history") or []:
+                if not isinstance(action, dict):
+                    continue
+                hero_id = action.get("hero_id")
+                h = hero_by_id.get(hero_id) if isinstance(hero_id, str) else None
+                if h is None or action.get("type") != "pick":
+                    continue
+                team = teams["ally" if action.get("side") == "ally" else "enemy"]
+                rates.add_pick(map_name, team, h.hero_id)
+                add_hero(team, h)
+            rates.drafts += 1
+    if rates.skipped:
+        print(f"hotspicker.opponent: skipped {rates.skipped} bad lines in {path}", file=sys.stderr)
+    return rates
+
+
+def softmax(scores: Dict[str, float], temperature: float = TEMPERATURE) -> Dict[str, float]:
+    if not scores:
+        return {}
+    top = max(scores.values())
+    weights = {hid: math.exp((s - top) / temperature) for hid, s in scores.items()}
+    total = sum(weights.values())
+    return {hid: w / total for hid, w in weights.items()}
+
+
+class OpponentModel:
+    def __init__(self, rates: Optional[PickRates] = None, temperature: float = TEMPERATURE):
+        self.rates = rates
+        self.temperature = temperature
+        self._cache: "OrderedDict[Hashable, Tuple[Dict[str, float], Dict[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def distribution(
+        self,
+        key: Hashable,
+        scores_fn: Callable[[], Dict[str, float]],
+        map_name: str,
+        team: TeamState,
+        profile: Optional[ScoutingProfile] = None,
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        # (probabilities, pick scores) over every available hero for the side
+        # about to pick. key identifies the draft state and settings (profile
+        # revision included); scores_fn only runs on a cache miss.
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+
+        scores = scores_fn()
+        probs = softmax(scores, self.temperature)
+        if self.rates is not None:
+            counts, n = self.rates.lookup(map_name, team)
+            seen = sum(counts.get(hid, 0) for hid in scores)
+            if seen:
+                blend = MAX_RATE_BLEND * n / (n + RATE_PRIOR)
+                probs = {
+                    hid: (1.0 - blend) * p + blend * counts.get(hid, 0) / seen for hid, p in probs.items()
+                }
+        if profile is not None and profile.drafts:
+            habits = profile.pick_distribution(scores, map_name, len(team.picks))
+            if habits:
+                blend = MAX_PROFILE_BLEND * profile.drafts / (profile.drafts + PROFILE_PRIOR)
+                probs = {hid: (1.0 - blend) * p + blend * habits.get(hid, 0.0) for hid, p in probs.items()}
+
+        with self._lock:
+            self._cache[key] = (probs, scores)
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return probs, scores
+
+
+def state_key(
+    acting: Iterable[str],
+    opposing: Iterable[str],
+    bans: Iterable[str],
+    preset_name: str,
+    simple: bool,
+    early: bool,
+    map_name: str,
+    profile: Optional[ScoutingProfile] = None,
+) -> Hashable:
+    scouted = (profile.team, profile.revision) if profile is not None else None
+    return (frozenset(acting), frozenset(opposing), frozenset(bans), preset_name, simple, early, map_name, scouted)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+
+# Multi-objective view of pick_score. The weighted features are summed per
+# objective instead of into one scalar (the objectives still add up to the
+# pick score), and candidates are sorted into Pareto fronts.
+#
+# Non-dominated sorting works on bitsets over candidate indices: for each
+# objective, ge[k][i] has a bit for every candidate at least as good as i.
+# The candidates that dominate i are the AND of its ge masks minus those
+# equal to i everywhere, so the whole pool is sorted with n * k big-int ANDs
+# and no pairwise comparison loop.
+
+OBJECTIVES: Dict[str, Tuple[str, ...]] = {
+    "roleFit": ("role_fill", "offlane_fill"),
+    "functional": ("functional_primary", "functional_secondary", "core_early", "core_late"),
+    "synergy": ("synergy",),
+    "reliability": ("reliability",),
+    "weakness": ("weakness_stack_2", "weakness_stack_3", "gate", "dependency_penalty"),
+    "counter": ("answers_dive", "peel_vs_dive"),
+    "mapFit": ("map_fit_early", "map_fit_late"),
+}
+OBJECTIVE_NAMES = list(OBJECTIVES)
+OBJECTIVE_OF_KEY = {key: n for n, keys in enumerate(OBJECTIVES.values()) for key in keys}
+
+
+def objective_vector(feats: List[Tuple[str, str, float]], coef: Dict[str, float]) -> List[float]:
+    # pick_features output -> weighted contribution per objective
+    out = [0.0] * len(OBJECTIVE_NAMES)
+    for _label, key, amount in feats:
+        out[OBJECTIVE_OF_KEY[key]] += coef[key] * amount
+    return out
+
+
+def _order_masks(column: Sequence[float]) -> Tuple[List[int], List[int]]:
+    # Per candidate: mask of candidates >= it, and of candidates == it
+    n = len(column)
+    order = sorted(range(n), key=column.__getitem__, reverse=True)
+    ge = [0] * n
+    eq = [0] * n
+    seen = 0
+    start = 0
+    while start < n:
+        value = column[order[start]]
+        end = start
+        tie = 0
+        while end < n and column[order[end]] == value:
+            tie |= 1 << order[end]
+            end += 1
+        seen |= tie
+        for j in range(start, end):
+            ge[order[j]] = seen
+            eq[order[j]] = tie
+        start = end
+    return ge, eq
+
+
+def pareto_fronts(vectors: List[List[float]]) -> List[int]:
+    # Front index per candidate; 0 is the Pareto-optimal set
+    n = len(vectors)
+    if not n:
+        return []
+    everyone = (1 << n) - 1
+    weak = [everyone] * n
+    same = [everyone] * n
+    for column in zip(*vectors):
+        ge, eq = _order_masks(column)
+        for i in range(n):
+            weak[i] &= ge[i]
+            same[i] &= eq[i]
+    dominators = [weak[i] & ~same[i] for i in range(n)]
+
+    fronts = [0] * n
+    placed = 0
+    remaining = list(range(n))
+    front = 0
+    while remaining:
+        current = [i for i in remaining if not dominators[i] & ~placed]
+        for i in current:
+            fronts[i] = front
+            placed |= 1 << i
+        remaining = [i for i in remaining if not placed >> i & 1]
+        front += 1
+    return fronts
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set
+
+from .team_bits import HeroBits
+
+
+# Player hero pools: which heroes each of our five players can play, as one
+# bitmask per player over HeroBits indices. An empty pool means the player
+# can play anything.
+#
+# Our picks are kept matched to players (Kuhn's augmenting paths; five
+# players make each search a handful of steps). A hero can still be picked
+# when some player who could take it is open: unmatched, or matched to a
+# hero that an alternating path can move to an unmatched player. The open
+# players are a fixed point over at most five masks, so checking every
+# candidate costs one AND per hero.
+
+TEAM_SIZE = 5
+
+
+class PoolError(ValueError):
+    pass
+
+
+def parse_pools(raw: Any, known: Dict[str, int]) -> List[List[str]]:
+    if not isinstance(raw, list) or len(raw) != TEAM_SIZE:
+        raise PoolError(f"playerPools must be a list of {TEAM_SIZE} hero lists")
+    pools = []
+    for n, pool in enumerate(raw, 1):
+        if not isinstance(pool, list) or not all(isinstance(hid, str) for hid in pool):
+            raise PoolError(f"player {n}'s pool must be a list of hero ids")
+        unknown = [hid for hid in pool if hid not in known]
+        if unknown:
+            raise PoolError(f"player {n}'s pool has unknown heroes: {', '.join(unknown)}")
+        pools.append(sorted(set(pool)))
+    return pools
+
+
+class PoolAssignment:
+    def __init__(self, bits: HeroBits, pools: List[List[str]]):
+        self.bits = bits
+        everyone = (1 << len(bits.heroes)) - 1
+        self.masks: List[int] = [self._mask(pool) if pool else everyone for pool in pools]
+        self.hero_of: List[Optional[str]] = [None] * len(pools)
+        self.player_of: Dict[str, int] = {}
+        # Our picks no open player could take
+        self.unassigned: Set[str] = set()
+
+    def _mask(self, hero_ids: List[str]) -> int:
+        m = 0
+        for hid in hero_ids:
+            m |= 1 << self.bits.index[hid]
+        return m
+
+    def _augment(self, hid: str, seen: List[bool]) -> bool:
+        bit = 1 << self.bits.index[hid]
+        for p, mask in enumerate(self.masks):
+            if seen[p] or not mask & bit:
+                continue
+            seen[p] = True
+            other = self.hero_of[p]
+            if other is None or self._augment(other, seen):
+                self.hero_of[p] = hid
+                self.player_of[hid] = p
+                return True
+        return False
+
+    def add(self, hid: str) -> bool:
+        if hid not in self.bits.index:
+            return False
+        if self._augment(hid, [False] * len(self.masks)):
+            return True
+        self.unassigned.add(hid)
+        return False
+
+    def remove(self, hid: str) -> None:
+        if hid in self.unassigned:
+            self.unassigned.discard(hid)
+            return
+        p = self.player_of.pop(hid, None)
+        if p is None:
+            return
+        self.hero_of[p] = None
+        # The freed player may fit a pick that had no one before
+        for other in sorted(self.unassigned):
+            if self._augment(other, [False] * len(self.masks)):
+                self.unassigned.discard(other)
+
+    def open_players(self) -> int:
+        # Bit per player that can take one more hero without breaking the
+        # assignment of the current picks
+        open_ = 0
+        for p, hid in enumerate(self.hero_of):
+            if hid is None:
+                open_ |= 1 << p
+        reach = 0
+        for p, mask in enumerate(self.masks):
+            if open_ >> p & 1:
+                reach |= mask
+        changed = True
+        while changed:
+            changed = False
+            for p, hid in enumerate(self.hero_of):
+                if open_ >> p & 1 or hid is None:
+                    continue
+                if reach >> self.bits.index[hid] & 1:
+                    open_ |= 1 << p
+                    reach |= self.masks[p]
+                    changed = True
+        return open_
+
+    def allowed(self, open_: Optional[int] = None) -> int:
+        # Heroes (HeroBits indices) that keep a full assignment possible
+        if open_ is None:
+            open_ = self.open_players()
+        m = 0
+        for p, mask in enumerate(self.masks):
+            if open_ >> p & 1:
+                m |= mask
+        return m
+
+    def players_for(self, hid: str, open_: int) -> List[int]:
+        bit = 1 << self.bits.index[hid]
+        return [p for p, mask in enumerate(self.masks) if open_ >> p & 1 and mask & bit]
+
+    def describe(self) -> Dict[str, Any]:
+        return {"players": list(self.hero_of), "unassigned": sorted(self.unassigned)}
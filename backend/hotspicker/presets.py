@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field, fields, replace
+from functools import cached_property
+from typing import Any, Dict
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    # The constants pick_score multiplies its features by (see pick_features)
+    role_fill: float = 45.0
+    offlane_fill: float = 25.0
+    functional_primary: float = 18.0  # Waveclear, Engage, Peel
+    functional_secondary: float = 12.0
+    synergy: float = 8.0
+    core_early: float = 6.0
+    core_late: float = 10.0
+    gate_penalty: float = 8.0
+    dependency_penalty: float = 12.0
+    answers_dive: float = 10.0
+    peel_vs_dive: float = 8.0
+    map_fit_early: float = 15.0
+    map_fit_late: float = 22.0
+
+
+@dataclass(frozen=True)
+class WeightPreset:
+    name: str
+    reliability_weight: float
+    gate_penalty_weight: float
+    early_pick_dependency_cap: int  # max dependency allowed when "simple comps"
+    weakness_stack_2_penalty: float
+    weakness_stack_3_penalty: float
+    weights: ScoringWeights = field(default_factory=ScoringWeights)
+
+    @cached_property
+    def coefficients(self) -> Dict[str, float]:
+        # Feature key -> multiplier, for every key pick_features can emit
+        coef = dict(vars(self.weights))
+        coef["reliability"] = self.reliability_weight
+        coef["gate"] = self.weights.gate_penalty * self.gate_penalty_weight
+        coef["weakness_stack_2"] = self.weakness_stack_2_penalty
+        coef["weakness_stack_3"] = self.weakness_stack_3_penalty
+        return coef
+
+
+RANK_PRESETS: Dict[str, WeightPreset] = {
+    "Bronze": WeightPreset(
+        name="Bronze",
+        reliability_weight=1.4,
+        gate_penalty_weight=1.3,
+        early_pick_dependency_cap=3,
+        weakness_stack_2_penalty=10,
+        weakness_stack_3_penalty=20,
+    ),
+    "Silver": WeightPreset(
+        name="Silver",
+        reliability_weight=1.25,
+        gate_penalty_weight=1.2,
+        early_pick_dependency_cap=4,
+        weakness_stack_2_penalty=10,
+        weakness_stack_3_penalty=18,
+    ),
+    "Gold": WeightPreset(
+        name="Gold",
+        reliability_weight=1.1,
+        gate_penalty_weight=1.0,
+        early_pick_dependency_cap=5,
+        weakness_stack_2_penalty=9,
+        weakness_stack_3_penalty=16,
+    ),
+    "Plat+": WeightPreset(
+        name="Plat+",
+        reliability_weight=1.0,
+        gate_penalty_weight=0.9,
+        early_pick_dependency_cap=6,
+        weakness_stack_2_penalty=8,
+        weakness_stack_3_penalty=14,
+    ),
+}
+
+
+# -------------------------
+# PRESET FILES
+# -------------------------
+# data/presets.json, as written by `python -m hotspicker.calibrate`:
+#   {"version": 1, "presets": {"Silver": {"reliability_weight": ..., "weights": {...}}}}
+# Missing presets or fields fall back to the built-in values above.
+
+PRESETS_FILE_VERSION = 1
+
+
+def preset_to_dict(preset: WeightPreset) -> Dict[str, Any]:
+    d = asdict(preset)
+    d.pop("name")
+    return d
+
+
+def presets_from_dict(data: Dict[str, Any], base: Dict[str, WeightPreset] = RANK_PRESETS) -> Dict[str, WeightPreset]:
+    if data.get("version") != PRESETS_FILE_VERSION:
+        raise ValueError(f"unsupported presets file version: {data.get('version')}")
+
+    known = {f.name for f in fields(WeightPreset)} - {"name", "weights"}
+    known_weights = {f.name for f in fields(ScoringWeights)}
+    out = dict(base)
+    for name, raw in (data.get("presets") or {}).items():
+        start = out.get(name) or WeightPreset(name, 1.0, 1.0, 5, 10, 18)
+        weights = replace(
+            start.weights, **{k: float(v) for k, v in (raw.get("weights") or {}).items() if k in known_weights}
+        )
+        values = {k: int(v) if k == "early_pick_dependency_cap" else float(v) for k, v in raw.items() if k in known}
+        out[name] = replace(start, weights=weights, **values)
+    return out
+
+
+def load_presets(path: str) -> Dict[str, WeightPreset]:
+    # Built-in presets unless a calibrated file exists at path
+    if not os.path.exists(path):
+        return dict(RANK_PRESETS)
+    with open(path, "r", encoding="utf-8") as f:
+        return presets_from_dict(json.load(f))
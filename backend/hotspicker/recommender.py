@@ -0,0 +1,869 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from .completions import best_completions, lookahead_values
+from .hero_loader import HeroProfile
+from .map_bonus import MapTable
+from .opponent import OpponentModel, state_key
+from .pareto import OBJECTIVE_NAMES, objective_vector, pareto_fronts
+from .player_pools import PoolAssignment, parse_pools
+from .scouting import ScoutingError, ScoutingProfile, ScoutingStore
+from .sensitivity import DEPENDENCY_KEY, SweepError, parse_grid, sweep
+from .presets import RANK_PRESETS, WeightPreset
+from .scoring import (
+    MapBonus,
+    TeamState,
+    add_hero,
+    build_team_state,
+    copy_team_state,
+    dependency_excess,
+    infer_missing_essentials,
+    pick_features,
+    pick_score,
+    ban_score,
+    ban_denial_scores,
+    build_warnings,
+    composition_score,
+)
+from .team_bits import HeroBits
+from .whatif import composition_deltas, parse_history
+from .win_model import WinModel
+
+
+def normalize_score(score: float, s_min: float, s_max: float) -> float:
+    if s_max <= s_min:
+        return 50.0
+    return 100.0 * (score - s_min) / (s_max - s_min)
+
+
+def norm_to_grade(norm: float) -> str:
+    # norm is 0..100 relative to this request's candidate pool
+    if norm >= 90:
+        return "S"
+    if norm >= 75:
+        return "A"
+    if norm >= 60:
+        return "B"
+    if norm >= 45:
+        return "C"
+    if norm >= 30:
+        return "D"
+    return "E"
+
+
+# Candidates re-ranked by lookahead when a request carries deadlineMs
+LOOKAHEAD_BEAM = 8
+
+# anticipateEnemy: ally candidates re-ranked by pick score minus the expected
+# score of the enemy's reply, when the enemy picks next
+REPLY_BEAM = 8
+REPLY_WEIGHT = 1.0
+
+# Enemy-side recommendations below this pick probability lose "enemy likely"
+LIKELY_PICK_PROB = 0.1
+
+# opponentProfile: ban scores gain this times the share of the scouted team's
+# drafts featuring the hero (as their pick when we ban, their ban when they do)
+SCOUT_BAN_WEIGHT = 40.0
+
+
+class Recommender:
+    def __init__(
+        self,
+        heroes: List[HeroProfile],
+        maps: Dict[str, Dict[str, float]],
+        presets: Dict[str, WeightPreset] | None = None,
+        win_model: WinModel | None = None,
+        map_residuals: Dict[str, Dict[str, float]] | None = None,
+        opponent: OpponentModel | None = None,
+        scouting: ScoutingStore | None = None,
+    ):
+        self.heroes = heroes
+        self.presets = presets if presets is not None else RANK_PRESETS
+        self.win_model = win_model
+        self.opponent = opponent if opponent is not None else OpponentModel()
+        self.scouting = scouting
+        self.hero_by_id: Dict[str, HeroProfile] = {h.hero_id: h for h in heroes}
+        self.maps = maps
+        self.bits = HeroBits(heroes)
+        self.map_table = MapTable(heroes, maps, map_residuals)
+
+    def _resolve_settings(self, settings: Dict[str, Any]) -> Tuple[WeightPreset, bool, str, MapBonus]:
+        rank = settings.get("rankPreset", "Silver")
+        preset = self.presets.get(rank) or self.presets.get("Silver") or RANK_PRESETS["Silver"]
+        simple = bool(settings.get("simpleComps", True))
+        map_name = (settings.get("mapName") or "").strip()
+        return preset, simple, map_name, self.map_table.bonus_for(map_name)
+
+    def _profile(self, settings: Dict[str, Any]) -> ScoutingProfile | None:
+        name = (settings.get("opponentProfile") or "").strip()
+        if not name:
+            return None
+        profile = self.scouting.get(name) if self.scouting is not None else None
+        if profile is None:
+            raise ScoutingError(f"unknown opponent profile: {name}")
+        return profile
+
+    def pool_assignment(self, settings: Dict[str, Any], our_picks: List[str]) -> PoolAssignment | None:
+        # playerPools: five lists of hero ids, one per player on our side
+        raw = settings.get("playerPools")
+        if not raw:
+            return None
+        assignment = PoolAssignment(self.bits, parse_pools(raw, self.bits.index))
+        for hid in our_picks:
+            assignment.add(hid)
+        return assignment
+
+    def recommend(self, draft: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+        our = build_team_state(self.hero_by_id, draft.get("ourPicks", []) or [])
+        enemy = build_team_state(self.hero_by_id, draft.get("enemyPicks", []) or [])
+        bans = set(draft.get("bans", []) or [])
+        return self.recommend_teams(our, enemy, bans, draft, settings)
+
+    def recommend_teams(
+        self,
+        our: TeamState,
+        enemy: TeamState,
+        bans: Set[str],
+        draft: Dict[str, Any],
+        settings: Dict[str, Any],
+        assignment: PoolAssignment | None = None,
+        on_depth: Callable[[Dict[str, Any]], None] | None = None,
+    ) -> Dict[str, Any]:
+        # Team states (and the player assignment) are passed in so draft
+        # sessions can maintain them incrementally. With deadlineMs, on_depth
+        # gets the pick recommendations re-ranked by each lookahead depth as it
+        # finishes, before the final result is returned.
+        started = time.perf_counter()
+        preset, simple, map_name, map_bonus = self._resolve_settings(settings)
+        profile = self._profile(settings)
+        if assignment is None:
+            assignment = self.pool_assignment(settings, our.picks)
+        deadline_ms = float(settings.get("deadlineMs") or 0)
+        depth_reached, completed = 0, True
+        phase = draft.get("phase", "pick")  # pick or ban
+        side_to_act = draft.get("sideToAct", "ally")  # ally or enemy
+        # "pareto": pick recommendations are the Pareto-optimal candidates over
+        # the pick-score objectives rather than the top scores
+        pareto = settings.get("responseMode") == "pareto"
+        early_pick_window = bool(draft.get("earlyPickWindow", True))
+
+        # Team scores for UI
+        our_team_score = round(composition_score(our), 1)
+        enemy_team_score = round(composition_score(enemy), 1)
+
+        missing = infer_missing_essentials(our)
+
+        # Build candidate list
+        unavailable = set(our.picks) | set(enemy.picks) | bans
+        candidates = [h for h in self.heroes if h.hero_id not in unavailable]
+
+        # Recommend for the side that is about to act.
+        acting_team = our if side_to_act == "ally" else enemy
+        opposing_team = enemy if side_to_act == "ally" else our
+        acting_missing = infer_missing_essentials(acting_team)
+
+        # Our picks are limited to heroes some open player can still take
+        open_players = 0
+        if assignment is not None and phase == "pick" and side_to_act == "ally":
+            open_players = assignment.open_players()
+            allowed = assignment.allowed(open_players)
+            index = self.bits.index
+            candidates = [h for h in candidates if allowed >> index[h.hero_id] & 1]
+
+        recs: List[Dict[str, Any]] = []
+        win_prob = None
+        pareto_fronts_count = None
+
+        if phase == "pick":
+            base_team_score = composition_score(acting_team)
+
+            scored = []
+            for h in candidates:
+                s, contribs = pick_score(
+                    h,
+                    acting_team,
+                    opposing_team,
+                    acting_missing,
+                    preset,
+                    simple,
+                    early_pick_window,
+                    map_bonus,
+                )
+                scored.append((s, h, contribs))
+
+            scored.sort(key=lambda x: x[0], reverse=True)
+
+            all_scores = [x[0] for x in scored] if scored else [0.0]
+            s_min, s_max = min(all_scores), max(all_scores)
+
+            def pick_recs(
+                scored: List[Tuple[float, HeroProfile, List[Tuple[str, float]]]], lookahead: Dict[str, float]
+            ) -> Tuple[List[Dict[str, Any]], float | None, int | None]:
+                recs: List[Dict[str, Any]] = []
+                win_prob = None
+                pareto_fronts_count = None
+
+                # Expectimax over the enemy's next pick
+                replies: Dict[str, Tuple[float, str, float]] = {}
+                # Picks go 1-2-2-2-2-1, so the other side picks next after an even count
+                picks_done = len(our.picks) + len(enemy.picks)
+                next_is_enemy = picks_done % 2 == 0 and picks_done < 9
+                if settings.get("anticipateEnemy") and side_to_act == "ally" and next_is_enemy and scored:
+                    early_next = early_pick_window and picks_done + 1 < 5
+                    for s, h, _ in scored[:REPLY_BEAM]:
+                        our_after = copy_team_state(our)
+                        add_hero(our_after, h)
+                        probs, enemy_scores = self._reply(
+                            our_after, enemy, bans, preset, simple, early_next, map_name, map_bonus, profile
+                        )
+                        expected = sum(p * enemy_scores[hid] for hid, p in probs.items())
+                        likely = max(probs, key=probs.get) if probs else ""
+                        replies[h.hero_id] = (s - REPLY_WEIGHT * expected, likely, probs.get(likely, 0.0))
+                    head = sorted(scored[:REPLY_BEAM], key=lambda x: replies[x[1].hero_id][0], reverse=True)
+                    scored = head + scored[REPLY_BEAM:]
+
+                pick_probs: Dict[str, float] = {}
+                if side_to_act == "enemy":
+                    pick_probs, _ = self.opponent.distribution(
+                        state_key(
+                            enemy.picks, our.picks, bans, preset.name, simple, early_pick_window, map_name, profile
+                        ),
+                        lambda: {h.hero_id: s for s, h, _ in scored},
+                        map_name,
+                        acting_team,
+                        profile,
+                    )
+
+                top = []
+                seen_roles = set()
+                objectives: Dict[str, List[float]] = {}
+
+                if pareto:
+                    for _s, h, _contribs in scored:
+                        feats = pick_features(
+                            h, acting_team, opposing_team, acting_missing, preset, simple, early_pick_window, map_bonus
+                        )
+                        objectives[h.hero_id] = objective_vector(feats, preset.coefficients)
+                    fronts = pareto_fronts([objectives[h.hero_id] for _, h, _ in scored])
+                    top = [x for x, front in zip(scored, fronts) if front == 0]
+                    pareto_fronts_count = max(fronts) + 1 if fronts else 0
+                else:
+                    for s, h, contribs in scored:
+                        role_key = ",".join(sorted(h.role))
+
+                        top.append((s, h, contribs))
+                        seen_roles.add(role_key)
+
+                        # Stop when we have 5 OR at least 3 different roles represented
+                        if len(top) >= 5 and len(seen_roles) >= 3:
+                            break
+
+                teams_after = []
+                for _s, h, _contribs in top:
+                    new_team = copy_team_state(acting_team)
+                    add_hero(new_team, h)
+                    teams_after.append((h, new_team))
+
+                win_deltas: Dict[str, float] = {}
+                if self.win_model is not None:
+                    win_prob, win_deltas = self.win_model.pick_deltas(
+                        acting_team, opposing_team, teams_after, map_name, side_to_act == "ally"
+                    )
+
+                for (s, h, contribs), (_h, new_team) in zip(top, teams_after):
+                    tags = []
+                    if early_pick_window and simple:
+                        tags.append("safe early")
+                    if h.contested == "H":
+                        tags.append("must lock now")
+                    if pick_probs.get(h.hero_id, 0.0) >= LIKELY_PICK_PROB:
+                        tags.append("enemy likely")
+
+                    # Team score delta if we add this hero
+                    team_after = composition_score(new_team)
+                    team_delta = team_after - base_team_score
+
+                    reason = _reason_from_contribs(contribs)
+
+                    norm = normalize_score(s, s_min, s_max)
+                    grade = norm_to_grade(norm)
+
+                    rec = {
+                        "hero_id": h.hero_id,
+                        "hero_name": h.hero_name,
+                        "score": round(s, 1),              # keep raw for debugging
+                        "scoreNorm": round(norm, 1),       # 0..100 relative scale
+                        "grade": grade,                    # S..E
+                        "teamScoreAfter": round(team_after, 1),
+                        "teamScoreDelta": round(team_delta, 1),
+                        "tags": tags,
+                        "reason": reason,
+                    }
+                    if h.hero_id in lookahead:
+                        rec["lookaheadScore"] = round(lookahead[h.hero_id], 1)
+                    if h.hero_id in pick_probs:
+                        rec["pickProb"] = round(pick_probs[h.hero_id], 4)
+                    if h.hero_id in replies:
+                        value, reply, reply_prob = replies[h.hero_id]
+                        rec["anticipatedScore"] = round(value, 1)
+                        rec["likelyReply"] = {"hero_id": reply, "pickProb": round(reply_prob, 4)}
+                    if h.hero_id in win_deltas:
+                        rec["winProbDelta"] = round(win_deltas[h.hero_id], 4)
+                    if open_players:
+                        rec["players"] = assignment.players_for(h.hero_id, open_players)
+                    if h.hero_id in objectives:
+                        rec["objectives"] = {
+                            name: round(v, 1) for name, v in zip(OBJECTIVE_NAMES, objectives[h.hero_id])
+                        }
+                    recs.append(rec)
+                return recs, win_prob, pareto_fronts_count
+
+            def reranked(lookahead: Dict[str, float]) -> List[Tuple[float, HeroProfile, List[Tuple[str, float]]]]:
+                head = sorted(scored[:LOOKAHEAD_BEAM], key=lambda x: lookahead[x[1].hero_id], reverse=True)
+                return head + scored[LOOKAHEAD_BEAM:]
+
+            def depth_done(values: Dict[str, float], depth: int) -> None:
+                partial = {
+                    "phase": phase,
+                    "sideToAct": side_to_act,
+                    "mapName": map_name,
+                    "recommendations": pick_recs(reranked(values), values)[0],
+                    "depthReached": depth,
+                    "completed": False,
+                }
+                if assignment is not None:
+                    partial["playerAssignment"] = assignment.describe()
+                on_depth(partial)
+
+            # Anytime refinement: the greedy order above is always available;
+            # deeper lookahead re-ranks the beam only for depths that finish in time
+            lookahead: Dict[str, float] = {}
+            if deadline_ms > 0 and scored:
+                beam = [h.hero_id for _, h, _ in scored[:LOOKAHEAD_BEAM]]
+                lookahead, depth_reached, completed = lookahead_values(
+                    self.bits,
+                    self.bits.team(acting_team.picks),
+                    {h.hero_id: s for s, h, _ in scored},
+                    beam,
+                    started + deadline_ms / 1000.0,
+                    depth_done if on_depth is not None else None,
+                )
+                if lookahead:
+                    scored = reranked(lookahead)
+
+            recs, win_prob, pareto_fronts_count = pick_recs(scored, lookahead)
+
+        ban_mode = settings.get("banMode", "threat")  # threat or denial
+
+        if phase == "ban":
+            scored = self._ban_scored(
+                candidates,
+                acting_team,
+                opposing_team,
+                preset,
+                simple,
+                early_pick_window,
+                map_name,
+                map_bonus,
+                ban_mode,
+                side_to_act,
+                profile,
+            )
+
+            all_scores = [x[0] for x in scored] if scored else [0.0]
+            s_min, s_max = min(all_scores), max(all_scores)
+
+            for s, h, contribs in scored[:5]:
+                norm = normalize_score(s, s_min, s_max)
+                grade = norm_to_grade(norm)
+
+                recs.append(
+                    {
+                        "hero_id": h.hero_id,
+                        "hero_name": h.hero_name,
+                        "score": round(s, 1),
+                        "scoreNorm": round(norm, 1),
+                        "grade": grade,
+                        "reason": _reason_from_contribs(contribs),
+                    }
+                )
+
+        warnings = build_warnings(our, enemy)
+        plan = build_plan_lines(our)
+
+        result = {
+            "phase": phase,
+            "sideToAct": side_to_act,
+            "recommendations": recs,
+            "warnings": warnings,
+            "endPlan": plan,
+            "missing": sorted(list(missing)),
+            "ourTeamScore": our_team_score,
+            "enemyTeamScore": enemy_team_score,
+            "mapName": map_name,
+            "banMode": ban_mode,
+        }
+        if pareto_fronts_count is not None:
+            result["objectives"] = OBJECTIVE_NAMES
+            result["paretoFronts"] = pareto_fronts_count
+        if assignment is not None:
+            result["playerAssignment"] = assignment.describe()
+        if profile is not None:
+            result["opponentProfile"] = {"team": profile.team, "drafts": profile.drafts, "revision": profile.revision}
+        if win_prob is not None:
+            # Acting side's predicted win probability before this pick
+            result["winProb"] = round(win_prob, 4)
+        if deadline_ms > 0:
+            result["depthReached"] = depth_reached
+            result["completed"] = completed
+        return result
+
+    def _reply(
+        self,
+        our: TeamState,
+        enemy: TeamState,
+        bans: Set[str],
+        preset: WeightPreset,
+        simple: bool,
+        early_pick_window: bool,
+        map_name: str,
+        map_bonus: MapBonus,
+        profile: ScoutingProfile | None = None,
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        # Opponent model for the enemy picking next in this state
+        def enemy_scores() -> Dict[str, float]:
+            unavailable = set(our.picks) | set(enemy.picks) | bans
+            missing = infer_missing_essentials(enemy)
+            return {
+                h.hero_id: pick_score(h, enemy, our, missing, preset, simple, early_pick_window, map_bonus)[0]
+                for h in self.heroes
+                if h.hero_id not in unavailable
+            }
+
+        return self.opponent.distribution(
+            state_key(enemy.picks, our.picks, bans, preset.name, simple, early_pick_window, map_name, profile),
+            enemy_scores,
+            map_name,
+            enemy,
+            profile,
+        )
+
+    def _ban_scored(
+        self,
+        candidates: List[HeroProfile],
+        acting_team: TeamState,
+        opposing_team: TeamState,
+        preset: WeightPreset,
+        simple: bool,
+        early_pick_window: bool,
+        map_name: str,
+        map_bonus: MapBonus,
+        ban_mode: str,
+        side_to_act: str,
+        profile: ScoutingProfile | None,
+    ) -> List[Tuple[float, HeroProfile, List[Tuple[str, float]]]]:
+        # Every candidate as a ban for the acting side, best first
+        enemy_has_stealth = opposing_team.provides.get("Stealth", 0) > 0
+        we_lack_reveal = (not acting_team.has_reveal) and enemy_has_stealth
+
+        denial: Dict[str, Tuple[float, float]] = {}
+        if ban_mode == "denial":
+            # Score every candidate as the opposing side's next pick
+            opposing_missing = infer_missing_essentials(opposing_team)
+            enemy_scores = {
+                h.hero_id: pick_score(
+                    h,
+                    opposing_team,
+                    acting_team,
+                    opposing_missing,
+                    preset,
+                    simple,
+                    early_pick_window,
+                    map_bonus,
+                )[0]
+                for h in candidates
+            }
+            denial = ban_denial_scores(enemy_scores)
+
+        scored = []
+        for h in candidates:
+            s, contribs = ban_score(
+                h,
+                acting_team,
+                preset,
+                we_lack_reveal,
+                map_bonus,
+            )
+            if h.hero_id in denial:
+                best_drop, fallback_drop = denial[h.hero_id]
+                if best_drop:
+                    s += best_drop
+                    contribs.append(("Denies enemy's best pick", best_drop))
+                if fallback_drop:
+                    s += 0.5 * fallback_drop
+                    contribs.append(("Denies enemy's fallback pick", 0.5 * fallback_drop))
+            if profile is not None:
+                # Their habits: what they pick when we ban, what they ban when they do
+                if side_to_act == "ally":
+                    label, share = "Opponent picks often", profile.pick_share(h.hero_id, map_name)
+                else:
+                    label, share = "Opponent bans often", profile.ban_share(h.hero_id, map_name)
+                if share:
+                    s += SCOUT_BAN_WEIGHT * share
+                    contribs.append((label, SCOUT_BAN_WEIGHT * share))
+            scored.append((s, h, contribs))
+
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return scored
+
+    def complete(self, draft: Dict[str, Any], settings: Dict[str, Any], top_k: int = 10) -> Dict[str, Any]:
+        # Best reachable final five for the side to act
+        preset, simple, map_name, map_bonus = self._resolve_settings(settings)
+        side_to_act = draft.get("sideToAct", "ally")
+        early_pick_window = bool(draft.get("earlyPickWindow", True))
+
+        our = build_team_state(self.hero_by_id, draft.get("ourPicks", []) or [])
+        enemy = build_team_state(self.hero_by_id, draft.get("enemyPicks", []) or [])
+        bans = set(draft.get("bans", []) or [])
+
+        acting_team = our if side_to_act == "ally" else enemy
+        opposing_team = enemy if side_to_act == "ally" else our
+        acting_missing = infer_missing_essentials(acting_team)
+
+        unavailable = set(our.picks) | set(enemy.picks) | bans
+        # Player pools constrain our side only
+        assignment = self.pool_assignment(settings, our.picks) if side_to_act == "ally" else None
+        allowed = assignment.allowed() if assignment is not None else -1
+        pick_values = {
+            h.hero_id: pick_score(
+                h,
+                acting_team,
+                opposing_team,
+                acting_missing,
+                preset,
+                simple,
+                early_pick_window,
+                map_bonus,
+            )[0]
+            for h in self.heroes
+            if h.hero_id not in unavailable and allowed >> self.bits.index[h.hero_id] & 1
+        }
+
+        result = best_completions(
+            self.bits, self.bits.team(acting_team.picks), pick_values, top_k, assignment=assignment
+        )
+        result["sideToAct"] = side_to_act
+        result["mapName"] = map_name
+        if assignment is not None:
+            result["playerAssignment"] = assignment.describe()
+        return result
+
+    def sensitivity(
+        self,
+        draft: Dict[str, Any],
+        settings: Dict[str, Any],
+        grid: Any,
+        preset_names: List[str] | None = None,
+        top_n: int = 5,
+    ) -> Dict[str, Any]:
+        # Pick-candidate ranks across presets and a grid of preset fields
+        if draft.get("phase", "pick") != "pick":
+            raise SweepError("sensitivity sweeps cover pick recommendations")
+        # Each preset once, in the order given
+        names = list(self.presets) if not preset_names else list(dict.fromkeys(preset_names))
+        unknown = [n for n in names if n not in self.presets]
+        if unknown:
+            raise SweepError(f"unknown presets: {', '.join(unknown)}")
+        parsed = parse_grid(grid)
+
+        started = time.perf_counter()
+        preset, simple, map_name, map_bonus = self._resolve_settings(settings)
+        side_to_act = draft.get("sideToAct", "ally")
+        early_pick_window = bool(draft.get("earlyPickWindow", True))
+
+        our = build_team_state(self.hero_by_id, draft.get("ourPicks", []) or [])
+        enemy = build_team_state(self.hero_by_id, draft.get("enemyPicks", []) or [])
+        bans = set(draft.get("bans", []) or [])
+        acting_team = our if side_to_act == "ally" else enemy
+        opposing_team = enemy if side_to_act == "ally" else our
+        acting_missing = infer_missing_essentials(acting_team)
+
+        unavailable = set(our.picks) | set(enemy.picks) | bans
+        candidates = [h for h in self.heroes if h.hero_id not in unavailable]
+        features = []
+        for h in candidates:
+            row: Dict[str, float] = {}
+            for _label, key, amount in pick_features(
+                h, acting_team, opposing_team, acting_missing, preset, simple, early_pick_window, map_bonus
+            ):
+                if key != DEPENDENCY_KEY:
+                    row[key] = row.get(key, 0.0) + amount
+            features.append(row)
+
+        excess_by_cap: Dict[int, List[float]] = {}
+
+        def excess(cap: int) -> List[float]:
+            if cap not in excess_by_cap:
+                excess_by_cap[cap] = [dependency_excess(h, cap, simple, early_pick_window) for h in candidates]
+            return excess_by_cap[cap]
+
+        result = sweep(candidates, features, excess, [self.presets[n] for n in names], parsed, top_n)
+        result["sideToAct"] = side_to_act
+        result["mapName"] = map_name
+        result["elapsedMs"] = round((time.perf_counter() - started) * 1000.0, 2)
+        return result
+
+    def whatif(self, history: Any, settings: Dict[str, Any], top_k: int = 3) -> Dict[str, Any]:
+        # Best swaps for each of our picks, in the state each pick was made in
+        actions = parse_history(history, self.hero_by_id)
+        started = time.perf_counter()
+        preset, simple, map_name, map_bonus = self._resolve_settings(settings)
+        final_our = [a["hero_id"] for a in actions if a["type"] == "pick" and a["side"] == "ally"]
+
+        our, enemy = TeamState(), TeamState()
+        taken: Set[str] = set()
+        picks_done = 0
+        slots = []
+        for step, action in enumerate(actions):
+            hid = action["hero_id"]
+            if hid is None:
+                continue
+            h = self.hero_by_id[hid]
+            if action["type"] == "pick" and action["side"] == "ally":
+                slot = len(our.picks)
+                missing = infer_missing_essentials(our)
+                early_pick_window = picks_done < 5
+                # Rank among every hero still available; our own later picks
+                # count there but cannot move into this slot as a swap
+                available = [c for c in self.heroes if c.hero_id not in taken]
+                pool = [c for c in available if c.hero_id not in final_our]
+                values = {
+                    c.hero_id: pick_score(c, our, enemy, missing, preset, simple, early_pick_window, map_bonus)[0]
+                    for c in available
+                }
+                actual = values[hid]
+                comp = composition_deltas(self.bits, final_our, slot, [c.hero_id for c in pool])
+                swaps = sorted(
+                    ((values[c.hero_id] - actual + comp[c.hero_id], values[c.hero_id] - actual, c) for c in pool),
+                    key=lambda x: (-x[0], x[2].hero_id),
+                )
+                slots.append(
+                    {
+                        "slot": slot,
+                        "step": step,
+                        "hero_id": hid,
+                        "hero_name": h.hero_name,
+                        "pickValue": round(actual, 1),
+                        "rankAtPick": 1 + sum(1 for v in values.values() if v > actual),
+                        "alternatives": [
+                            {
+                                "hero_id": c.hero_id,
+                                "hero_name": c.hero_name,
+                                "pickValueDelta": round(value_delta, 1),
+                                "compositionDelta": round(comp[c.hero_id], 1),
+                                "delta": round(delta, 1),
+                            }
+                            for delta, value_delta, c in swaps[:top_k]
+                        ],
+                    }
+                )
+
+            taken.add(hid)
+            if action["type"] == "pick":
+                add_hero(our if action["side"] == "ally" else enemy, h)
+                picks_done += 1
+
+        # The weakest pick is the one with the most to gain from a swap
+        gains = [(s["alternatives"][0]["delta"], s["slot"]) for s in slots if s["alternatives"]]
+        best_gain = max(gains, key=lambda g: g[0]) if gains else None
+        return {
+            "slots": slots,
+            "weakestSlot": best_gain[1] if best_gain and best_gain[0] > 0 else None,
+            "ourTeamScore": round(composition_score(our), 1),
+            "mapName": map_name,
+            "elapsedMs": round((time.perf_counter() - started) * 1000.0, 2),
+        }
+
+    def review(
+        self,
+        history: Any,
+        settings: Dict[str, Any],
+        recommend: Callable[[TeamState, TeamState, Set[str], Dict[str, Any]], Dict[str, Any]] | None = None,
+    ) -> Dict[str, Any]:
+        # Replays a draft and grades every action against what was recommended
+        # in its state. recommend(our, enemy, bans, draft) defaults to
+        # recommend_teams; the server routes it through its recommendation
+        # cache, so states already seen live cost nothing here.
+        actions = parse_history(history, self.hero_by_id)
+        if recommend is None:
+            def recommend(our, enemy, bans, draft):
+                return self.recommend_teams(our, enemy, bans, draft, settings)
+
+        started = time.perf_counter()
+        preset, simple, map_name, map_bonus = self._resolve_settings(settings)
+        profile = self._profile(settings)
+        ban_mode = settings.get("banMode", "threat")
+
+        our, enemy = TeamState(), TeamState()
+        bans: Set[str] = set()
+        picks_done = 0
+        steps = []
+        totals = {
+            side: {"actions": 0, "scoreLost": 0.0, "rankSum": 0, "top1": 0, "top5": 0} for side in ("ally", "enemy")
+        }
+        for step, action in enumerate(actions):
+            phase, side, hid = action["type"], action["side"], action["hero_id"]
+            draft = {
+                "phase": phase,
+                "sideToAct": side,
+                "earlyPickWindow": picks_done < 5,
+                "ourPicks": list(our.picks),
+                "enemyPicks": list(enemy.picks),
+                "bans": sorted(bans),
+            }
+            result = recommend(our, enemy, bans, draft)
+            row: Dict[str, Any] = {
+                "step": step,
+                "type": phase,
+                "side": side,
+                "hero_id": hid,
+                "recommended": [
+                    {k: r[k] for k in ("hero_id", "hero_name", "score", "grade")} for r in result["recommendations"][:5]
+                ],
+            }
+
+            if hid is None:
+                row["skipped"] = True
+            else:
+                # Grade the actual choice against the full candidate pool on the
+                # base pick/ban scores (no lookahead or anticipation re-ranking)
+                unavailable = set(our.picks) | set(enemy.picks) | bans
+                candidates = [h for h in self.heroes if h.hero_id not in unavailable]
+                acting, opposing = (our, enemy) if side == "ally" else (enemy, our)
+                if phase == "pick":
+                    missing = infer_missing_essentials(acting)
+                    scores = {
+                        h.hero_id: pick_score(
+                            h, acting, opposing, missing, preset, simple, draft["earlyPickWindow"], map_bonus
+                        )[0]
+                        for h in candidates
+                    }
+                else:
+                    scores = {
+                        h.hero_id: sc
+                        for sc, h, _ in self._ban_scored(
+                            candidates,
+                            acting,
+                            opposing,
+                            preset,
+                            simple,
+                            draft["earlyPickWindow"],
+                            map_name,
+                            map_bonus,
+                            ban_mode,
+                            side,
+                            profile,
+                        )
+                    }
+                actual = scores[hid]
+                best = max(scores.values())
+                rank = 1 + sum(1 for v in scores.values() if v > actual)
+                row.update(
+                    {
+                        "hero_name": self.hero_by_id[hid].hero_name,
+                        "score": round(actual, 1),
+                        "rank": rank,
+                        "grade": norm_to_grade(normalize_score(actual, min(scores.values()), best)),
+                        "scoreLost": round(best - actual, 1),
+                    }
+                )
+                t = totals[side]
+                t["actions"] += 1
+                t["scoreLost"] += best - actual
+                t["rankSum"] += rank
+                t["top1"] += rank == 1
+                t["top5"] += rank <= 5
+
+                h = self.hero_by_id[hid]
+                if phase == "ban":
+                    bans.add(hid)
+                else:
+                    add_hero(our if side == "ally" else enemy, h)
+                    picks_done += 1
+            steps.append(row)
+
+        summary = {
+            side: {
+                "actions": t["actions"],
+                "scoreLost": round(t["scoreLost"], 1),
+                "meanRank": round(t["rankSum"] / t["actions"], 2) if t["actions"] else None,
+                "top1": t["top1"],
+                "top5": t["top5"],
+            }
+            for side, t in totals.items()
+        }
+        return {
+            "steps": steps,
+            "summary": summary,
+            "ourTeamScore": round(composition_score(our), 1),
+            "enemyTeamScore": round(composition_score(enemy), 1),
+            "mapName": map_name,
+            "elapsedMs": round((time.perf_counter() - started) * 1000.0, 2),
+        }
+
+    def compare_maps(
+        self, our_picks: List[str], enemy_picks: List[str], settings: Dict[str, Any] | None = None
+    ) -> Dict[str, Any]:
+        preset = self._resolve_settings(settings or {})[0]
+        our = build_team_state(self.hero_by_id, our_picks)
+        enemy = build_team_state(self.hero_by_id, enemy_picks)
+        return {
+            "ourTeamScore": round(composition_score(our), 1),
+            "enemyTeamScore": round(composition_score(enemy), 1),
+            "missing": sorted(infer_missing_essentials(our)),
+            "maps": self.map_table.compare(our.picks, enemy.picks, preset),
+        }
+
+
+def _reason_from_contribs(contribs):
+    # pick top 2 positives and top 1 negative
+    pos = sorted([c for c in contribs if c[1] > 0], key=lambda x: x[1], reverse=True)[:2]
+    neg = sorted([c for c in contribs if c[1] < 0], key=lambda x: x[1])[:1]
+
+    parts = []
+
+    if pos:
+        seen = set()
+        pos_labels = []
+        for label, _val in pos:
+            if label in seen:
+                continue
+            seen.add(label)
+            pos_labels.append(label)
+        parts.append(" + ".join(pos_labels))
+
+    if neg:
+        parts.append(f"Warning: {neg[0][0]}")
+
+    return " | ".join(parts) if parts else "No strong signal"
+
+
+def build_plan_lines(our):
+    who_starts = "Start fights with your engage"
+    if our.provides.get("Engage", 0) == 0:
+        who_starts = "Look for picks, avoid hard 5v5 starts"
+
+    kill_pattern = "Burst the first target caught by CC"
+    if our.provides.get("SustainDmg", 0) > our.provides.get("Burst", 0):
+        kill_pattern = "Wear down frontline then collapse"
+    if our.provides.get("Pick", 0) > 0:
+        kill_pattern = "Play for picks, then convert to objective"
+
+    macro_rule = "Keep lanes soaked and take camps on cooldown"
+    if our.provides.get("Macro", 0) == 0:
+        macro_rule = "Group earlier and avoid losing soak"
+
+    return [who_starts, kill_pattern, macro_rule]
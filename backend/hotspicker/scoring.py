@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from .hero_loader import HeroProfile
+from .matrices import (
+    PEEL,
+    STEALTH,
+    counter_features,
+    hero_masks,
+    low_mobility_stacked,
+    synergy_hits,
+    tag_mask,
+    threat_contribs,
+)
+from .presets import WeightPreset
+
+
+CORE_PROVIDES = {"Frontline", "Engage", "Waveclear", "Peel", "Save", "Disengage"}
+
+FUNCTIONAL_TAGS = ("Waveclear", "Engage", "Peel", "Disengage", "Save", "CampClear", "Macro")
+PRIMARY_FUNCTIONAL_TAGS = ("Waveclear", "Engage", "Peel")
+
+# Fixed shape multipliers inside pick features (the calibrated weights scale these)
+HEALER_LATE_MULT = 1.15
+MISSING_LATE_MULT = 1.25
+MISSING_EARLY_MULT = 0.9
+
+
+@dataclass
+class TeamState:
+    picks: List[str] = field(default_factory=list)
+    roles: Dict[str, int] = field(default_factory=dict)
+    provides: Dict[str, int] = field(default_factory=dict)
+    weaknesses: Dict[str, int] = field(default_factory=dict)
+    damage_counts: Dict[str, int] = field(default_factory=dict)
+    has_reveal: bool = False
+    reveal_count: int = 0
+    # OR of the picks' matrices.hero_masks provides (tags with a count > 0)
+    provide_mask: int = 0
+
+
+def _inc(d: Dict[str, int], k: str, n: int = 1) -> None:
+    v = d.get(k, 0) + n
+    if v:
+        d[k] = v
+    else:
+        d.pop(k, None)
+
+
+def _apply_hero(ts: TeamState, h: HeroProfile, n: int) -> None:
+    for r in h.role:
+        _inc(ts.roles, r, n)
+    for p in h.provides:
+        _inc(ts.provides, p, n)
+    for w in h.weaknesses:
+        _inc(ts.weaknesses, w, n)
+
+    if h.dmg:
+        _inc(ts.damage_counts, h.dmg, n)
+
+    if h.reveal == "Y":
+        ts.reveal_count += n
+        ts.has_reveal = ts.reveal_count > 0
+
+    if h.stealth == "Y":
+        _inc(ts.provides, "Stealth", n)
+
+    if n > 0:
+        ts.provide_mask |= hero_masks(h).provides
+    else:
+        ts.provide_mask = tag_mask(ts.provides)
+
+
+def add_hero(ts: TeamState, h: HeroProfile) -> None:
+    ts.picks.append(h.hero_id)
+    _apply_hero(ts, h, 1)
+
+
+def remove_hero(ts: TeamState, h: HeroProfile) -> None:
+    ts.picks.remove(h.hero_id)
+    _apply_hero(ts, h, -1)
+
+
+def copy_team_state(ts: TeamState) -> TeamState:
+    return TeamState(
+        picks=list(ts.picks),
+        roles=dict(ts.roles),
+        provides=dict(ts.provides),
+        weaknesses=dict(ts.weaknesses),
+        damage_counts=dict(ts.damage_counts),
+        has_reveal=ts.has_reveal,
+        reveal_count=ts.reveal_count,
+        provide_mask=ts.provide_mask,
+    )
+
+
+def build_team_state(hero_by_id: Dict[str, HeroProfile], picks: List[str]) -> TeamState:
+    ts = TeamState(picks=list(picks))
+    for hid in picks:
+        h = hero_by_id.get(hid)
+        if not h:
+            continue
+        _apply_hero(ts, h, 1)
+
+    return ts
+
+
+# -------------------------
+# PER-MAP HERO BONUSES
+# -------------------------
+# Everything map-dependent in pick_score/ban_score, precomputed per hero when
+# maps.json loads so scoring only does dictionary lookups.
+@dataclass
+class MapBonus:
+    name: str
+    weights: Dict[str, float]
+    # hero_id -> [(functional tag, map multiplier)]
+    functional: Dict[str, List[Tuple[str, float]]] = field(default_factory=dict)
+    # hero_id -> sum of (multiplier - 1) over provided tags the map boosts
+    fit: Dict[str, float] = field(default_factory=dict)
+
+
+def _hero_functional(hero: HeroProfile, map_weights: Dict[str, float] | None) -> List[Tuple[str, float]]:
+    out = []
+    for tag in FUNCTIONAL_TAGS:
+        if tag in hero.provides:
+            mult = 1.0
+            if map_weights:
+                mult *= float(map_weights.get(tag, 1.0))
+            out.append((tag, mult))
+    return out
+
+
+def _hero_map_fit(hero: HeroProfile, map_weights: Dict[str, float] | None) -> float:
+    fit = 0.0
+    if map_weights:
+        for k, mult in map_weights.items():
+            if mult > 1.0 and k in hero.provides:
+                fit += mult - 1.0
+    return fit
+
+
+def build_map_bonus(
+    name: str,
+    map_weights: Dict[str, float],
+    heroes: List[HeroProfile],
+    residuals: Dict[str, float] | None = None,
+) -> MapBonus:
+    # residuals: learned per-hero map fit on top of the tag multipliers
+    residuals = residuals or {}
+    return MapBonus(
+        name=name,
+        weights=dict(map_weights),
+        functional={h.hero_id: _hero_functional(h, map_weights) for h in heroes},
+        fit={h.hero_id: _hero_map_fit(h, map_weights) + residuals.get(h.hero_id, 0.0) for h in heroes},
+    )
+
+
+def infer_missing_essentials(team: TeamState) -> Set[str]:
+    missing = set()
+    pick_count = len(team.picks)
+
+    # HARD requirements only after early draft
+    if pick_count >= 3:
+        if team.roles.get("Tank", 0) == 0:
+            missing.add("Tank")
+        if team.roles.get("Healer", 0) == 0:
+            missing.add("Healer")
+
+    # Offlane later still
+    if pick_count >= 4:
+        if team.roles.get("Bruiser", 0) == 0 and team.roles.get("Tank", 0) < 2:
+            missing.add("Offlane")
+
+    # Always evaluate functional needs
+    if team.provides.get("Waveclear", 0) == 0:
+        missing.add("Waveclear")
+    if team.provides.get("Engage", 0) == 0:
+        missing.add("Engage")
+    if team.provides.get("Peel", 0) == 0:
+        missing.add("Peel")
+
+    return missing
+
+
+
+def composition_score(team: TeamState) -> float:
+    # Simple 0-100 team completeness score for UI
+    missing = infer_missing_essentials(team)
+    score = 100.0
+
+    if "Tank" in missing:
+        score -= 18
+    if "Healer" in missing:
+        score -= 18
+    if "Offlane" in missing:
+        score -= 10
+
+    if "Waveclear" in missing:
+        score -= 12
+    if "Engage" in missing:
+        score -= 10
+    if "Peel" in missing:
+        score -= 10
+
+    for _, c in team.weaknesses.items():
+        if c >= 3:
+            score -= 8
+        elif c == 2:
+            score -= 4
+
+    if score < 0:
+        score = 0
+    if score > 100:
+        score = 100
+
+    return score
+
+
+def dependency_index(hero: HeroProfile) -> int:
+    needs_count = len(hero.needs)
+    needs_setup = 1 if "NeedsSetup" in hero.weaknesses else 0
+    gated_core = 0
+
+    if hero.cleanse in ("S", "Y") and hero.gate_cleanse != "B":
+        gated_core += 1
+    if "Engage" in hero.provides and hero.gate_engage != "B":
+        gated_core += 1
+    if "Global" in hero.provides and hero.gate_global != "B":
+        gated_core += 1
+
+    return needs_count + needs_setup + gated_core
+
+
+def dependency_excess(hero: HeroProfile, cap: int, simple_comps: bool, early_pick_window: bool) -> float:
+    # How far over the preset's early-pick dependency cap a hero sits
+    if simple_comps and early_pick_window:
+        dep = dependency_index(hero)
+        if dep > cap:
+            return float(dep - cap)
+    return 0.0
+
+
+def _quality_score(reliability: str) -> int:
+    if reliability == "H":
+        return 10
+    if reliability == "M":
+        return 5
+    return 0
+
+
+def pick_features(
+    hero: HeroProfile,
+    our: TeamState,
+    enemy: TeamState,
+    missing: Set[str],
+    preset: WeightPreset,
+    simple_comps: bool,
+    early_pick_window: bool,
+    map_bonus: MapBonus | None = None,
+) -> List[Tuple[str, str, float]]:
+    # pick_score as (label, weight key, amount): the score is the sum of
+    # preset.coefficients[key] * amount, which is what calibration fits
+    feats: List[Tuple[str, str, float]] = []
+    masks = hero_masks(hero)
+
+    pick_count = len(our.picks)
+
+    if map_bonus is not None and hero.hero_id in map_bonus.functional:
+        functional = map_bonus.functional[hero.hero_id]
+        map_fit = map_bonus.fit[hero.hero_id]
+    else:
+        weights = map_bonus.weights if map_bonus is not None else None
+        functional = _hero_functional(hero, weights)
+        map_fit = _hero_map_fit(hero, weights)
+
+    # -------------------------
+    # ROLE IMPORTANCE RAMP
+    # -------------------------
+    # Picks 0–2: no role forcing
+    # Picks 3–4: partial pressure
+    # Picks 5+: full pressure
+    if pick_count <= 2:
+        role_mult = 0.0
+    elif pick_count <= 4:
+        role_mult = 0.6
+    else:
+        role_mult = 1.0
+
+    # -------------------------
+    # ROLE FIT (NON-DOMINANT)
+    # -------------------------
+    if "Tank" in missing and "Tank" in hero.role and role_mult:
+        feats.append(("Fills Tank", "role_fill", role_mult))
+
+    if "Healer" in missing and "Healer" in hero.role:
+        healer_mult = role_mult if pick_count <= 4 else HEALER_LATE_MULT
+        if healer_mult:
+            feats.append(("Fills Healer", "role_fill", healer_mult))
+
+    if "Offlane" in missing and (
+        hero.role_detail == "Offlane"
+        or ("Bruiser" in hero.role and hero.lane == "Offlane")
+    ):
+        offlane_mult = 0.0 if pick_count <= 2 else 0.6 if pick_count <= 4 else 1.0
+        if offlane_mult:
+            feats.append(("Fills Offlane", "offlane_fill", offlane_mult))
+
+    # -------------------------
+    # FUNCTIONAL CONTRIBUTIONS
+    # -------------------------
+    # Amount already carries the map multiplier (see build_map_bonus)
+    for tag, mult in functional:
+        key = "functional_primary" if tag in PRIMARY_FUNCTIONAL_TAGS else "functional_secondary"
+
+        # Missing functions matter more after early draft
+        if tag in missing:
+            mult *= MISSING_LATE_MULT if pick_count >= 3 else MISSING_EARLY_MULT
+
+        feats.append((f"Provides {tag}", key, mult))
+
+    # -------------------------
+    # HERO NEEDS SYNERGY
+    # -------------------------
+    # One feature per covered need, so the total is popcount(needs & provides)
+    covered = synergy_hits(masks, our.provide_mask)
+    if covered:
+        for need, bit in masks.need_bits:
+            if covered & bit:
+                feats.append((f"Synergy with team {need}", "synergy", 1.0))
+
+    # -------------------------
+    # CORE PROVIDES (ANTI MULTI-DIP)
+    # -------------------------
+    for p in hero.provides:
+        if p in CORE_PROVIDES and our.provides.get(p, 0) == 0:
+            feats.append((f"Adds core {p}", "core_early" if pick_count <= 2 else "core_late", 1.0))
+
+    # -------------------------
+    # RELIABILITY (RANK AWARE)
+    # -------------------------
+    reliability_bonus = 0
+
+    if "Engage" in hero.provides:
+        reliability_bonus += _quality_score(hero.quality_eng.reliability)
+    if "Peel" in hero.provides:
+        reliability_bonus += _quality_score(hero.quality_cc.reliability)
+    if "Save" in hero.provides:
+        reliability_bonus += _quality_score(hero.quality_save.reliability)
+
+    if reliability_bonus:
+        feats.append(("Reliable execution", "reliability", float(reliability_bonus)))
+
+    # -------------------------
+    # WEAKNESS STACKING
+    # -------------------------
+    for w in hero.weaknesses:
+        count = our.weaknesses.get(w, 0)
+        if count >= 2:
+            key = "weakness_stack_3" if count >= 3 else "weakness_stack_2"
+            feats.append((f"Stacks weakness {w}", key, -1.0))
+
+    # -------------------------
+    # GATED TOOLS PENALTY
+    # -------------------------
+    if pick_count >= 3:
+        if "Cleanse" in missing and hero.cleanse in ("S", "Y") and hero.gate_cleanse != "B":
+            feats.append(("Cleanse gated", "gate", -1.0))
+
+        if "Engage" in missing and "Engage" in hero.provides and hero.gate_engage != "B":
+            feats.append(("Engage gated", "gate", -1.0))
+
+    # -------------------------
+    # EARLY PICK DEPENDENCY CHECK
+    # -------------------------
+    excess = dependency_excess(hero, preset.early_pick_dependency_cap, simple_comps, early_pick_window)
+    if excess:
+        feats.append(("Too dependent early", "dependency_penalty", -excess))
+
+    # -------------------------
+    # ENEMY CONTEXT
+    # -------------------------
+    feats.extend(counter_features(masks, enemy.provides))
+
+    # -------------------------
+    # MAP FIT (LATE WEIGHT)
+    # -------------------------
+    if map_fit:
+        feats.append(("Map fit", "map_fit_early" if pick_count <= 2 else "map_fit_late", map_fit))
+
+    return feats
+
+
+def pick_score(
+    hero: HeroProfile,
+    our: TeamState,
+    enemy: TeamState,
+    missing: Set[str],
+    preset: WeightPreset,
+    simple_comps: bool,
+    early_pick_window: bool,
+    map_bonus: MapBonus | None = None,
+) -> Tuple[float, List[Tuple[str, float]]]:
+    coef = preset.coefficients
+    contribs: List[Tuple[str, float]] = []
+    score = 0.0
+    for label, key, amount in pick_features(
+        hero, our, enemy, missing, preset, simple_comps, early_pick_window, map_bonus
+    ):
+        value = coef[key] * amount
+        score += value
+        contribs.append((label, value))
+    return score, contribs
+
+
+
+def ban_score(
+    hero: HeroProfile,
+    our: TeamState,
+    preset: WeightPreset,
+    we_lack_reveal: bool,
+    map_bonus: MapBonus | None = None,
+) -> Tuple[float, List[Tuple[str, float]]]:
+
+
+    contribs = threat_contribs(hero_masks(hero), we_lack_reveal, our.weaknesses)
+    score = sum((v for _label, v in contribs), 0.0)
+
+    # Map threat: if the map values something highly, ban heroes who bring it.
+    if map_bonus is not None:
+        map_fit = map_bonus.fit.get(hero.hero_id)
+        if map_fit is None:
+            map_fit = _hero_map_fit(hero, map_bonus.weights)
+        if map_fit:
+            threat = map_fit * 18.0
+            score += threat
+            contribs.append(("Strong on this map", threat))
+
+    # Meta pressure (reduced so map and matchup can matter)
+    if hero.contested == "H":
+        score += 6
+        contribs.append(("Highly contested", 6))
+    elif hero.contested == "M":
+        score += 3
+        contribs.append(("Contested", 3))
+
+
+
+    return score, contribs
+
+
+def ban_denial_scores(enemy_scores: Dict[str, float]) -> Dict[str, Tuple[float, float]]:
+    # For each candidate ban: how far the enemy's best available pick_score
+    # drops, and how far their second-best fallback drops. Pick scores do not
+    # depend on the other candidates, so only the current top two can lose
+    # anything and the whole pool is handled from the sorted top three.
+    ranked = sorted(enemy_scores.items(), key=lambda x: x[1], reverse=True)[:3]
+    values = [s for _, s in ranked] + [0.0] * (3 - len(ranked))
+
+    denial: Dict[str, Tuple[float, float]] = {}
+    if len(ranked) >= 1:
+        denial[ranked[0][0]] = (values[0] - values[1], values[1] - values[2])
+    if len(ranked) >= 2:
+        denial[ranked[1][0]] = (0.0, values[1] - values[2])
+    return denial
+
+
+def build_warnings(our: TeamState, enemy: TeamState) -> List[str]:
+    warnings: List[str] = []
+    missing = infer_missing_essentials(our)
+
+    if "Waveclear" in missing:
+        warnings.append("No waveclear")
+    if "Engage" in missing:
+        warnings.append("No engage")
+    if "Peel" in missing:
+        warnings.append("No peel")
+    pick_count = len(our.picks)
+
+    if pick_count >= 3:
+        if "Tank" in missing:
+            warnings.append("No tank")
+        if "Healer" in missing:
+            warnings.append("No healer")
+
+    if pick_count >= 4:
+        if "Offlane" in missing:
+            warnings.append("No offlane")
+
+
+    if low_mobility_stacked(our.weaknesses) and not our.provide_mask & PEEL:
+        warnings.append("Backline low mobility with no peel")
+
+    if enemy.provide_mask & STEALTH and not our.has_reveal:
+        warnings.append("Enemy stealth threat and no reveal")
+
+    aa = our.damage_counts.get("AA", 0)
+    spell = our.damage_counts.get("Spell", 0)
+    if aa >= 3 and spell == 0:
+        warnings.append("Damage skew: mostly AA")
+    if spell >= 3 and aa == 0:
+        warnings.append("Damage skew: mostly Spell")
+
+    return warnings
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .data import DATA_DIR, write_json_atomic
+
+
+# Scouting profiles: what one opponent team picks, bans and first-picks,
+# overall and per map, counted from logs of their past drafts.
+#
+#   python -m hotspicker.scouting ingest --team "Team X" drafts.jsonl ...
+#   python -m hotspicker.scouting show "Team X"
+#
+# Log lines use the draft-session history shape (see hotspicker.calibrate)
+# plus "opponent" (the scouted team, unless --team is given) and
+# "opponentSide" (which side of the history they were; default "enemy").
+#
+# A profile is plain counts plus a short fingerprint per ingested draft, so
+# new logs merge by addition and a draft seen twice is skipped. One compact
+# JSON file per team under data/scouting/.
+
+PROFILE_VERSION = 1
+SCOUTING_DIR = os.path.join(DATA_DIR, "scouting")
+
+# Drafts on a map before its own counts are trusted as much as the overall ones
+MAP_DRAFTS_PRIOR = 5.0
+
+
+class ScoutingError(ValueError):
+    pass
+
+
+def profile_slug(team: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", team.lower()).strip("-") or "team"
+
+
+def draft_fingerprint(record: Dict[str, Any]) -> str:
+    data = json.dumps(
+        [record.get("mapName") or "", record.get("history") or []], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _inc(d: Dict[str, int], k: str) -> None:
+    d[k] = d.get(k, 0) + 1
+
+
+@dataclass
+class MapHabits:
+    drafts: int = 0
+    picks: Dict[str, int] = field(default_factory=dict)
+    bans: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class ScoutingProfile:
+    team: str
+    drafts: int = 0
+    picks: Dict[str, int] = field(default_factory=dict)
+    bans: Dict[str, int] = field(default_factory=dict)
+    first_picks: Dict[str, int] = field(default_factory=dict)
+    # Drafts in which they made the first pick of the draft
+    first_pick_drafts: int = 0
+    maps: Dict[str, MapHabits] = field(default_factory=dict)
+    fingerprints: Set[str] = field(default_factory=set)
+    # Content hash of the file it was loaded from; part of cache keys
+    revision: str = ""
+
+    def merge_draft(self, record: Dict[str, Any], side: str, known: Set[str]) -> bool:
+        # Adds one draft; False when it was already ingested
+        fp = draft_fingerprint(record)
+        if fp in self.fingerprints:
+            return False
+        self.fingerprints.add(fp)
+
+        map_name = (record.get("mapName") or "").strip()
+        habits = self.maps.setdefault(map_name, MapHabits()) if map_name else None
+        self.drafts += 1
+        if habits is not None:
+            habits.drafts += 1
+
+        first_pick_seen = False
+        own_first = True
+        for action in record.get("history") or []:
+            hid = action.get("hero_id")
+            if not hid or hid not in known:
+                continue
+            ours = action.get("side") == side
+            if action.get("type") == "pick":
+                if not first_pick_seen:
+                    first_pick_seen = True
+                    if ours:
+                        self.first_pick_drafts += 1
+                if not ours:
+                    continue
+                if own_first:
+                    _inc(self.first_picks, hid)
+                    own_first = False
+                _inc(self.picks, hid)
+                if habits is not None:
+                    _inc(habits.picks, hid)
+            elif action.get("type") == "ban" and ours:
+                _inc(self.bans, hid)
+                if habits is not None:
+                    _inc(habits.bans, hid)
+        return True
+
+    # -------------------------
+    # RATES
+    # -------------------------
+    def _share(self, overall: Dict[str, int], per_map: Optional[Dict[str, int]], map_drafts: int, hid: str) -> float:
+        # Share of drafts featuring hid, leaning on the map's own counts as
+        # they accumulate
+        base = overall.get(hid, 0) / self.drafts if self.drafts else 0.0
+        if not per_map or not map_drafts:
+            return base
+        w = map_drafts / (map_drafts + MAP_DRAFTS_PRIOR)
+        return (1.0 - w) * base + w * per_map.get(hid, 0) / map_drafts
+
+    def pick_share(self, hid: str, map_name: str) -> float:
+        habits = self.maps.get(map_name)
+        return self._share(self.picks, habits.picks if habits else None, habits.drafts if habits else 0, hid)
+
+    def ban_share(self, hid: str, map_name: str) -> float:
+        habits = self.maps.get(map_name)
+        return self._share(self.bans, habits.bans if habits else None, habits.drafts if habits else 0, hid)
+
+    def pick_distribution(self, available: Iterable[str], map_name: str, picks_made: int) -> Dict[str, float]:
+        # Their next pick among `available`: first-pick habits for their first
+        # hero, overall/map pick shares after that
+        available = list(available)
+        if picks_made == 0 and self.first_picks:
+            total = sum(self.first_picks.get(hid, 0) for hid in available)
+            if total:
+                return {hid: self.first_picks.get(hid, 0) / total for hid in available}
+        shares = {hid: self.pick_share(hid, map_name) for hid in available}
+        total = sum(shares.values())
+        return {hid: v / total for hid, v in shares.items()} if total else {}
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        def ranked(counts: Dict[str, int], n: int) -> List[Dict[str, Any]]:
+            rows = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:top]
+            return [{"hero_id": hid, "count": c, "share": round(c / n, 3) if n else 0.0} for hid, c in rows]
+
+        return {
+            "team": self.team,
+            "drafts": self.drafts,
+            "revision": self.revision,
+            "firstPickDraftShare": round(self.first_pick_drafts / self.drafts, 3) if self.drafts else 0.0,
+            "picks": ranked(self.picks, self.drafts),
+            "bans": ranked(self.bans, self.drafts),
+            "firstPicks": ranked(self.first_picks, self.drafts),
+            "maps": {
+                m: {"drafts": h.drafts, "picks": ranked(h.picks, h.drafts), "bans": ranked(h.bans, h.drafts)}
+                for m, h in sorted(self.maps.items())
+            },
+        }
+
+
+def profile_to_dict(p: ScoutingProfile) -> Dict[str, Any]:
+    return {
+        "version": PROFILE_VERSION,
+        "team": p.team,
+        "drafts": p.drafts,
+        "picks": p.picks,
+        "bans": p.bans,
+        "firstPicks": p.first_picks,
+        "firstPickDrafts": p.first_pick_drafts,
+        "maps": {m: {"drafts": h.drafts, "picks": h.picks, "bans": h.bans} for m, h in sorted(p.maps.items())},
+        "fingerprints": sorted(p.fingerprints),
+    }
+
+
+def profile_from_dict(raw: Dict[str, Any], revision: str = "") -> ScoutingProfile:
+    if raw.get("version") != PROFILE_VERSION:
+        raise ValueError(f"unsupported scouting profile version: {raw.get('version')!r}")
+    return ScoutingProfile(
+        team=str(raw.get("team") or ""),
+        drafts=int(raw.get("drafts", 0)),
+        picks=dict(raw.get("picks") or {}),
+        bans=dict(raw.get("bans") or {}),
+        first_picks=dict(raw.get("firstPicks") or {}),
+        first_pick_drafts=int(raw.get("firstPickDrafts", 0)),
+        maps={
+            m: MapHabits(int(h.get("drafts", 0)), dict(h.get("picks") or {}), dict(h.get("bans") or {}))
+            for m, h in (raw.get("maps") or {}).items()
+        },
+        fingerprints=set(raw.get("fingerprints") or []),
+        revision=revision,
+    )
+
+
+class ScoutingStore:
+    # Profiles are read on first use and re-read when their file changes, so
+    # an ingest run shows up in a running server without a restart
+
+    def __init__(self, directory: str = SCOUTING_DIR):
+        self.directory = directory
+        self._loaded: Dict[str, Tuple[float, Optional[ScoutingProfile]]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, team: str) -> str:
+        return os.path.join(self.directory, profile_slug(team) + ".json")
+
+    def get(self, team: str) -> Optional[ScoutingProfile]:
+        path = self.path(team)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            hit = self._loaded.get(path)
+            if hit is not None and hit[0] == mtime:
+                return hit[1]
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            profile = profile_from_dict(json.loads(data), hashlib.sha1(data).hexdigest()[:12])
+        except (AttributeError, TypeError) as e:
+            # Valid JSON in the wrong shape; callers only handle ValueError
+            raise ValueError(f"malformed scouting profile ({e})") from None
+        with self._lock:
+            self._loaded[path] = (mtime, profile)
+        return profile
+
+    def teams(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                profile = self.get(name[:-5])
+            except (OSError, ValueError):
+                # Corrupt or from another profile version: not listed
+                continue
+            if profile is not None:
+                out.append(profile.team)
+        return out
+
+    def save(self, profile: ScoutingProfile) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_json_atomic(self.path(profile.team), profile_to_dict(profile), indent=None)
+
+
+# -------------------------
+# CLI
+# -------------------------
+def _records(paths: List[str]) -> Iterable[Tuple[str, int, Dict[str, Any]]]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield path, n, json.loads(line)
+                except ValueError:
+                    raise SystemExit(f"{path}:{n}: not valid JSON")
+
+
+def ingest(store: ScoutingStore, paths: List[str], team: str, side: str, known: Set[str]) -> Dict[str, Dict[str, int]]:
+    profiles: Dict[str, ScoutingProfile] = {}
+    counts: Dict[str, Dict[str, int]] = {}
+    for path, n, rec in _records(paths):
+        name = team or (rec.get("opponent") or "").strip()
+        if not name:
+            raise SystemExit(f"{path}:{n}: no opponent named; pass --team")
+        key = profile_slug(name)
+        if key not in profiles:
+            profiles[key] = store.get(name) or ScoutingProfile(team=name)
+            counts[profiles[key].team] = {"added": 0, "skipped": 0}
+        profile = profiles[key]
+        added = profile.merge_draft(rec, rec.get("opponentSide") or side, known)
+        counts[profile.team]["added" if added else "skipped"] += 1
+
+    for profile in profiles.values():
+        if counts[profile.team]["added"]:
+            store.save(profile)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="hotspicker.scouting", description="Opponent scouting profiles")
+    parser.add_argument("--dir", default=SCOUTING_DIR, help="profile directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="merge draft logs into profiles")
+    p_ingest.add_argument("logs", nargs="+")
+    p_ingest.add_argument("--team", default="", help="profile for every draft (default: each line's opponent)")
+    p_ingest.add_argument("--side", default="enemy", choices=["ally", "enemy"], help="the opponent's side in the logs")
+    p_ingest.add_argument("--data-dir", default=DATA_DIR)
+    p_show = sub.add_parser("show", help="print a profile summary")
+    p_show.add_argument("team")
+    args = parser.parse_args(argv)
+
+    store = ScoutingStore(args.dir)
+    if args.command == "show":
+        profile = store.get(args.team)
+        if profile is None:
+            print(f"hotspicker.scouting: no profile for {args.team}", file=sys.stderr)
+            return 1
+        json.dump(profile.summary(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+
+    from .hero_loader import load_heroes_from_txt
+
+    known = {h.hero_id for h in load_heroes_from_txt(os.path.join(args.data_dir, "heroes.txt"))}
+    for name, c in ingest(store, args.logs, args.team, args.side, known).items():
+        print(f"{name}: {c['added']} drafts added, {c['skipped']} already ingested", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import fields, replace
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from .hero_loader import HeroProfile
+from .presets import ScoringWeights, WeightPreset
+
+
+# Sensitivity sweeps: rank the pick candidates of one draft state under many
+# weight presets and report how stable each candidate's rank is.
+#
+# pick_score is linear in preset.coefficients apart from the dependency cap
+# (scoring.pick_features), so the features of every candidate are computed
+# once and a preset is just a coefficient vector. The grid is a cartesian
+# product over preset fields; fields that touch disjoint coefficients add up
+# independently, so each group of coupled fields (gate_penalty with
+# gate_penalty_weight, the dependency cap with dependency_penalty) gets a
+# small table of per-candidate score changes and a grid point's score is the
+# base score plus one entry per group. Candidates whose best case over the
+# grid cannot beat the topN-th best worst case are dropped before the points
+# are enumerated.
+
+MAX_SWEEP_POINTS = 5000
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 20
+
+PRESET_FIELDS = [f.name for f in fields(WeightPreset) if f.name not in ("name", "weights")]
+WEIGHT_FIELDS = [f.name for f in fields(ScoringWeights)]
+DEPENDENCY_KEY = "dependency_penalty"
+
+
+class SweepError(ValueError):
+    pass
+
+
+def parse_grid(raw: Any) -> List[Tuple[str, List[float]]]:
+    if raw is None:
+        return []
+    if not isinstance(raw, dict):
+        raise SweepError("grid must be an object of field -> list of values")
+    grid = []
+    for name, values in raw.items():
+        if name not in PRESET_FIELDS and name not in WEIGHT_FIELDS:
+            raise SweepError(f"unknown grid field: {name}")
+        if not isinstance(values, list) or not values:
+            raise SweepError(f"grid field {name} needs a non-empty list of values")
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+            raise SweepError(f"grid field {name} takes numbers")
+        cast = int if name == "early_pick_dependency_cap" else float
+        grid.append((name, list(dict.fromkeys(cast(v) for v in values))))
+    return grid
+
+
+def parse_top_n(raw: Any) -> int:
+    if raw is None:
+        return DEFAULT_TOP_N
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)) or (isinstance(raw, float) and not raw.is_integer()):
+        raise SweepError("topN must be a whole number")
+    return max(1, min(int(raw), MAX_TOP_N))
+
+
+def apply_fields(preset: WeightPreset, values: Dict[str, float]) -> WeightPreset:
+    top = {k: v for k, v in values.items() if k in PRESET_FIELDS}
+    weights = {k: v for k, v in values.items() if k in WEIGHT_FIELDS}
+    if weights:
+        top["weights"] = replace(preset.weights, **weights)
+    return replace(preset, **top) if top else preset
+
+
+def _touched_keys(name: str, values: List[float], presets: List[WeightPreset]) -> Set[str]:
+    # Coefficient keys a grid field can change (the cap acts through the
+    # dependency feature's amount)
+    if name == "early_pick_dependency_cap":
+        return {DEPENDENCY_KEY}
+    keys: Set[str] = set()
+    for p in presets:
+        base = p.coefficients
+        for v in values:
+            changed = apply_fields(p, {name: v}).coefficients
+            keys.update(k for k in base if changed[k] != base[k])
+    return keys or {f"field:{name}"}
+
+
+def _group_fields(grid: List[Tuple[str, List[float]]], presets: List[WeightPreset]) -> List[Tuple[List[str], Set[str]]]:
+    groups: List[Tuple[List[str], Set[str]]] = []
+    for name, values in grid:
+        names, keys = [name], _touched_keys(name, values, presets)
+        for g in [g for g in groups if g[1] & keys]:
+            groups.remove(g)
+            names = g[0] + names
+            keys |= g[1]
+        groups.append((names, keys))
+    return groups
+
+
+def sweep(
+    candidates: List[HeroProfile],
+    features: List[Dict[str, float]],
+    excess: Callable[[int], List[float]],
+    presets: List[WeightPreset],
+    grid: List[Tuple[str, List[float]]],
+    top_n: int,
+) -> Dict[str, Any]:
+    # features: per candidate, pick_features summed by key without the
+    # dependency term; excess(cap): per candidate dependency excess
+    n = len(candidates)
+    values = dict(grid)
+    combos_per_preset = 1
+    for _name, vals in grid:
+        combos_per_preset *= len(vals)
+    points = combos_per_preset * len(presets)
+    if points > MAX_SWEEP_POINTS:
+        raise SweepError(f"sweep has {points} points; the limit is {MAX_SWEEP_POINTS}")
+
+    keys = sorted({k for row in features for k in row})
+    cols = {k: [row.get(k, 0.0) for row in features] for k in keys}
+
+    def scores(coef: Dict[str, float], cap: int, only: Set[str] | None = None) -> List[float]:
+        out = [0.0] * n
+        for k in keys:
+            if only is not None and k not in only:
+                continue
+            c = coef[k]
+            if c:
+                col = cols[k]
+                for i in range(n):
+                    out[i] += c * col[i]
+        if only is None or DEPENDENCY_KEY in only:
+            c = coef[DEPENDENCY_KEY]
+            for i, x in enumerate(excess(cap)):
+                out[i] -= c * x
+        return out
+
+    groups = _group_fields(grid, presets)
+    top_n = max(1, min(top_n, n)) if n else 0
+
+    # Ranks are only tracked inside the top N
+    rank_sum = [0] * n
+    best = [0] * n
+    worst = [0] * n
+    in_top = [0] * n
+    first = [0] * n
+    by_preset: Dict[str, List[str]] = {}
+    top_share_by_preset: Dict[str, Dict[int, int]] = {}
+    firsts: Set[int] = set()
+
+    for preset in presets:
+        base = scores(preset.coefficients, preset.early_pick_dependency_cap)
+        order = sorted(range(n), key=base.__getitem__, reverse=True)
+        by_preset[preset.name] = [candidates[i].hero_id for i in order[:top_n]]
+
+        # Per group: for each combination of its fields, the change to every
+        # candidate's score relative to the base preset
+        tables: List[List[List[float]]] = []
+        for names, touched in groups:
+            base_part = scores(preset.coefficients, preset.early_pick_dependency_cap, touched)
+            table = []
+            for combo in itertools.product(*(values[name] for name in names)):
+                variant = apply_fields(preset, dict(zip(names, combo)))
+                part = scores(variant.coefficients, variant.early_pick_dependency_cap, touched)
+                table.append([a - b for a, b in zip(part, base_part)])
+            tables.append(table)
+
+        lo = list(base)
+        hi = list(base)
+        for table in tables:
+            for i in range(n):
+                col = [row[i] for row in table]
+                lo[i] += min(col)
+                hi[i] += max(col)
+        threshold = sorted(lo, reverse=True)[top_n - 1] if n else 0.0
+        survivors = [i for i in range(n) if hi[i] >= threshold]
+
+        # Scores of each survivor at every grid point, as outer sums
+        per_point: List[List[float]] = []
+        for i in survivors:
+            acc = [base[i]]
+            for table in tables:
+                acc = [a + row[i] for a in acc for row in table]
+            per_point.append(acc)
+
+        # Most neighbouring points agree on the top N, so count distinct
+        # rankings first and fold each into the totals once
+        rankings: Dict[Tuple[int, ...], int] = {}
+        m = len(survivors)
+        for column in zip(*per_point):
+            ranked = tuple(sorted(range(m), key=column.__getitem__, reverse=True)[:top_n])
+            rankings[ranked] = rankings.get(ranked, 0) + 1
+
+        counts = top_share_by_preset.setdefault(preset.name, {})
+        for ranked, times in rankings.items():
+            for r, j in enumerate(ranked, 1):
+                i = survivors[j]
+                rank_sum[i] += r * times
+                in_top[i] += times
+                counts[i] = counts.get(i, 0) + times
+                if not best[i] or r < best[i]:
+                    best[i] = r
+                if r > worst[i]:
+                    worst[i] = r
+            first[survivors[ranked[0]]] += times
+            firsts.add(survivors[ranked[0]])
+
+    rows = []
+    for i in range(n):
+        if not in_top[i]:
+            continue
+        # Points outside the top N count as rank topN + 1
+        outside = points - in_top[i]
+        rows.append(
+            {
+                "hero_id": candidates[i].hero_id,
+                "hero_name": candidates[i].hero_name,
+                "topShare": round(in_top[i] / points, 4),
+                "firstShare": round(first[i] / points, 4),
+                "bestRank": best[i],
+                "worstRank": worst[i] if not outside else None,
+                "meanRank": round((rank_sum[i] + outside * (top_n + 1)) / points, 2),
+                "topShareByPreset": {
+                    name: round(top_share_by_preset[name].get(i, 0) / combos_per_preset, 4) for name in by_preset
+                },
+            }
+        )
+    rows.sort(key=lambda r: (-r["topShare"], r["meanRank"], r["hero_id"]))
+
+    return {
+        "points": points,
+        "topN": top_n,
+        "presets": [p.name for p in presets],
+        "grid": {name: vals for name, vals in grid},
+        "byPreset": by_preset,
+        "stable": len(firsts) <= 1,
+        "candidates": rows,
+    }
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, NamedTuple
+
+from .hero_loader import HeroProfile
+
+
+# Team state packed into Python ints. Every role/provide/weakness tag gets a
+# bit; "once", "twice" and "three times" masks replace the per-tag counters of
+# TeamState for everything composition_score looks at. heroes.txt never lists
+# a tag twice for the same hero, so per-hero tag lists are treated as sets.
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+class TeamBits(NamedTuple):
+    # NamedTuple rather than a dataclass: search code builds these per node
+    heroes: int = 0       # bit per hero index
+    count: int = 0
+    roles1: int = 0
+    roles2: int = 0
+    provides: int = 0
+    weak1: int = 0
+    weak2: int = 0
+    weak3: int = 0
+
+
+class HeroBits:
+    def __init__(self, heroes: List[HeroProfile]):
+        self.heroes = heroes
+        self.index: Dict[str, int] = {h.hero_id: i for i, h in enumerate(heroes)}
+
+        self.role_bit = self._assign(r for h in heroes for r in h.role)
+        self.provide_bit = self._assign(p for h in heroes for p in h.provides)
+        self.weak_bit = self._assign(w for h in heroes for w in h.weaknesses)
+
+        self.role_mask = [self._mask(self.role_bit, h.role) for h in heroes]
+        self.provide_mask = [self._mask(self.provide_bit, h.provides) for h in heroes]
+        self.weak_mask = [self._mask(self.weak_bit, h.weaknesses) for h in heroes]
+
+        self.TANK = self.role_bit.get("Tank", 0)
+        self.HEALER = self.role_bit.get("Healer", 0)
+        self.BRUISER = self.role_bit.get("Bruiser", 0)
+        self.WAVECLEAR = self.provide_bit.get("Waveclear", 0)
+        self.ENGAGE = self.provide_bit.get("Engage", 0)
+        self.PEEL = self.provide_bit.get("Peel", 0)
+        self.LOW_MOBILITY = self.weak_bit.get("LowMobility", 0)
+        self.dmg = [h.dmg for h in heroes]
+
+    @staticmethod
+    def _assign(tags: Iterable[str]) -> Dict[str, int]:
+        bits: Dict[str, int] = {}
+        for t in tags:
+            if t not in bits:
+                bits[t] = 1 << len(bits)
+        return bits
+
+    @staticmethod
+    def _mask(bits: Dict[str, int], tags: Iterable[str]) -> int:
+        m = 0
+        for t in tags:
+            m |= bits.get(t, 0)
+        return m
+
+    def add(self, team: TeamBits, i: int) -> TeamBits:
+        rm = self.role_mask[i]
+        wm = self.weak_mask[i]
+        return TeamBits(
+            heroes=team.heroes | (1 << i),
+            count=team.count + 1,
+            roles1=team.roles1 | rm,
+            roles2=team.roles2 | (team.roles1 & rm),
+            provides=team.provides | self.provide_mask[i],
+            weak1=team.weak1 | wm,
+            weak2=team.weak2 | (team.weak1 & wm),
+            weak3=team.weak3 | (team.weak2 & wm),
+        )
+
+    def team(self, hero_ids: Iterable[str]) -> TeamBits:
+        t = TeamBits()
+        for hid in hero_ids:
+            i = self.index.get(hid)
+            if i is not None:
+                t = self.add(t, i)
+        return t
+
+    def team_of(self, idxs: Iterable[int]) -> TeamBits:
+        # add() folded over idxs without building a TeamBits per hero
+        heroes = count = roles1 = roles2 = provides = weak1 = weak2 = weak3 = 0
+        role_mask, provide_mask, weak_mask = self.role_mask, self.provide_mask, self.weak_mask
+        for i in idxs:
+            rm = role_mask[i]
+            wm = weak_mask[i]
+            heroes |= 1 << i
+            count += 1
+            roles2 |= roles1 & rm
+            roles1 |= rm
+            provides |= provide_mask[i]
+            weak3 |= weak2 & wm
+            weak2 |= weak1 & wm
+            weak1 |= wm
+        return TeamBits(heroes, count, roles1, roles2, provides, weak1, weak2, weak3)
+
+    def missing(self, team: TeamBits) -> List[str]:
+        # Same rules as scoring.infer_missing_essentials
+        missing = []
+        if team.count >= 3:
+            if not team.roles1 & self.TANK:
+                missing.append("Tank")
+            if not team.roles1 & self.HEALER:
+                missing.append("Healer")
+        if team.count >= 4:
+            if not team.roles1 & self.BRUISER and not team.roles2 & self.TANK:
+                missing.append("Offlane")
+        if not team.provides & self.WAVECLEAR:
+            missing.append("Waveclear")
+        if not team.provides & self.ENGAGE:
+            missing.append("Engage")
+        if not team.provides & self.PEEL:
+            missing.append("Peel")
+        return missing
+
+    @staticmethod
+    def weakness_penalty(team: TeamBits) -> int:
+        return 8 * _popcount(team.weak3) + 4 * _popcount(team.weak2 & ~team.weak3)
+
+    def composition_score(self, team: TeamBits) -> float:
+        # Same numbers as scoring.composition_score
+        score = 100.0
+        if team.count >= 3:
+            if not team.roles1 & self.TANK:
+                score -= 18
+            if not team.roles1 & self.HEALER:
+                score -= 18
+        if team.count >= 4:
+            if not team.roles1 & self.BRUISER and not team.roles2 & self.TANK:
+                score -= 10
+        if not team.provides & self.WAVECLEAR:
+            score -= 12
+        if not team.provides & self.ENGAGE:
+            score -= 10
+        if not team.provides & self.PEEL:
+            score -= 10
+
+        score -= self.weakness_penalty(team)
+        return min(max(score, 0.0), 100.0)
+
+    def warnings(self, team: TeamBits, idxs: Iterable[int]) -> List[str]:
+        # Same rules as scoring.build_warnings minus the enemy stealth check
+        warnings = []
+        if not team.provides & self.WAVECLEAR:
+            warnings.append("No waveclear")
+        if not team.provides & self.ENGAGE:
+            warnings.append("No engage")
+        if not team.provides & self.PEEL:
+            warnings.append("No peel")
+        if team.count >= 3:
+            if not team.roles1 & self.TANK:
+                warnings.append("No tank")
+            if not team.roles1 & self.HEALER:
+                warnings.append("No healer")
+        if team.count >= 4:
+            if not team.roles1 & self.BRUISER and not team.roles2 & self.TANK:
+                warnings.append("No offlane")
+        if team.weak2 & self.LOW_MOBILITY and not team.provides & self.PEEL:
+            warnings.append("Backline low mobility with no peel")
+
+        aa = spell = 0
+        for i in idxs:
+            d = self.dmg[i]
+            if d == "AA":
+                aa += 1
+            elif d == "Spell":
+                spell += 1
+        if aa >= 3 and spell == 0:
+            warnings.append("Damage skew: mostly AA")
+        if spell >= 3 and aa == 0:
+            warnings.append("Damage skew: mostly Spell")
+        return warnings
+
+    def ids(self, team: TeamBits) -> List[str]:
+        out = []
+        m = team.heroes
+        while m:
+            low = m & -m
+            out.append(self.heroes[low.bit_length() - 1].hero_id)
+            m ^= low
+        return out
+
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from .team_bits import HeroBits
+
+
+# What-if analysis of a finished (or partial) draft: for each of our picks,
+# what every hero still available at that step would have changed.
+#
+#   pick value   pick_score of the alternative minus that of the actual pick,
+#                both in the draft state the pick was made in
+#   composition  composition_score of our final team with the alternative in
+#                the slot, minus that of the actual final team
+#
+# Alternatives are ranked by the sum of the two; later picks of our own are
+# not alternatives, heroes the enemy took later are.
+#
+# The draft is replayed once with incremental team states. Composition
+# deltas come from HeroBits: the other four picks are packed once per slot
+# and each alternative is one add() on top.
+
+TEAM_SIZE = 5
+
+
+class WhatIfError(ValueError):
+    pass
+
+
+def parse_history(raw: Any, known: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not isinstance(raw, list) or not raw:
+        raise WhatIfError("history must be a non-empty list of draft actions")
+    seen = set()
+    out = []
+    for n, action in enumerate(raw, 1):
+        if not isinstance(action, dict):
+            raise WhatIfError(f"action {n} must be an object")
+        kind, side, hid = action.get("type"), action.get("side"), action.get("hero_id")
+        if kind not in ("pick", "ban") or side not in ("ally", "enemy"):
+            raise WhatIfError(f"action {n} needs type pick/ban and side ally/enemy")
+        if not hid:
+            if kind == "pick" or not action.get("skipped"):
+                raise WhatIfError(f"action {n} has no hero_id")
+            out.append({"type": kind, "side": side, "hero_id": None, "skipped": True})
+            continue
+        if hid not in known:
+            raise WhatIfError(f"action {n} names an unknown hero: {hid}")
+        if hid in seen:
+            raise WhatIfError(f"action {n} repeats {hid}")
+        seen.add(hid)
+        out.append({"type": kind, "side": side, "hero_id": hid})
+    if sum(1 for a in out if a["type"] == "pick" and a["side"] == "ally") > TEAM_SIZE:
+        raise WhatIfError(f"history has more than {TEAM_SIZE} ally picks")
+    return out
+
+
+def composition_deltas(bits: HeroBits, final_our: List[str], slot: int, alternatives: List[str]) -> Dict[str, float]:
+    # Alternative -> change in our final composition score with it in slot
+    others = bits.team(hid for n, hid in enumerate(final_our) if n != slot)
+    base = bits.composition_score(bits.add(others, bits.index[final_our[slot]]))
+    index = bits.index
+    return {hid: bits.composition_score(bits.add(others, index[hid])) - base for hid in alternatives}
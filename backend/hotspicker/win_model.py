@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .hero_loader import HeroProfile
+from .scoring import TeamState, build_team_state
+
+
+# Logistic win-probability model over draft features, trained offline by
+# hotspicker.win_train and loaded from data/win_model.json.
+#
+# A match is scored from our side as
+#   bias + s(our) - s(enemy) + sum of w["vs:a|b"] over our a, enemy b
+# where s(team) sums the weights of its team features (role/provide/weakness
+# buckets from build_team_state, damage mix, per-hero terms, map x provide
+# terms) and of its same-team hero pairs. Matchup keys are stored once per
+# unordered pair with the sign carrying the direction, so the model is
+# antisymmetric: swapping the teams turns p into 1 - p.
+#
+# Recommendations only need s(acting + hero) for each candidate; the rest of
+# the margin is computed once per request, so a batch of candidates costs a
+# few dictionary lookups each.
+
+WIN_MODEL_VERSION = 1
+
+
+def pair_key(prefix: str, a: str, b: str) -> str:
+    return f"{prefix}:{a}|{b}" if a < b else f"{prefix}:{b}|{a}"
+
+
+def team_features(team: TeamState, map_name: str) -> Dict[str, float]:
+    x: Dict[str, float] = {}
+    for r, n in team.roles.items():
+        x[f"role:{r}"] = 1.0
+        if n >= 2:
+            x[f"role2:{r}"] = 1.0
+    for p in team.provides:
+        x[f"provides:{p}"] = 1.0
+        if map_name:
+            x[f"map:{map_name}:{p}"] = 1.0
+    for w, n in team.weaknesses.items():
+        if n >= 2:
+            x[f"weak2:{w}"] = 1.0
+        if n >= 3:
+            x[f"weak3:{w}"] = 1.0
+    for d, n in team.damage_counts.items():
+        x[f"dmg:{d}"] = float(n)
+    if team.has_reveal:
+        x["reveal"] = 1.0
+    for hid in team.picks:
+        x[f"hero:{hid}"] = 1.0
+    return x
+
+
+def team_pairs(hero_ids: List[str]) -> List[str]:
+    return [pair_key("with", a, b) for i, a in enumerate(hero_ids) for b in hero_ids[i + 1:]]
+
+
+def match_features(our: TeamState, enemy: TeamState, map_name: str) -> Dict[str, float]:
+    # Training row: everything the margin is linear in, from our side
+    x = team_features(our, map_name)
+    for k in team_pairs(our.picks):
+        x[k] = x.get(k, 0.0) + 1.0
+    for k, v in team_features(enemy, map_name).items():
+        x[k] = x.get(k, 0.0) - v
+    for k in team_pairs(enemy.picks):
+        x[k] = x.get(k, 0.0) - 1.0
+    for a in our.picks:
+        for b in enemy.picks:
+            k = pair_key("vs", a, b)
+            x[k] = x.get(k, 0.0) + (1.0 if a < b else -1.0)
+    return {k: v for k, v in x.items() if v}
+
+
+def sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class WinModel:
+    def __init__(self, bias: float, weights: Dict[str, float], meta: Dict[str, Any] | None = None):
+        self.bias = bias
+        self.weights = weights
+        self.meta = meta or {}
+
+    def _team_value(self, team: TeamState, map_name: str) -> float:
+        w = self.weights
+        s = 0.0
+        for k, v in team_features(team, map_name).items():
+            s += w.get(k, 0.0) * v
+        for k in team_pairs(team.picks):
+            s += w.get(k, 0.0)
+        return s
+
+    def _vs(self, hero_id: str, opposing: Iterable[str]) -> float:
+        # Matchup value of hero_id against each opposing hero, from hero_id's side
+        w = self.weights
+        s = 0.0
+        for b in opposing:
+            v = w.get(pair_key("vs", hero_id, b), 0.0)
+            s += v if hero_id < b else -v
+        return s
+
+    def margin(self, our: TeamState, enemy: TeamState, map_name: str) -> float:
+        return (
+            self.bias
+            + self._team_value(our, map_name)
+            - self._team_value(enemy, map_name)
+            + sum(self._vs(a, enemy.picks) for a in our.picks)
+        )
+
+    def win_prob(self, our: TeamState, enemy: TeamState, map_name: str) -> float:
+        return sigmoid(self.margin(our, enemy, map_name))
+
+    def predict_batch(
+        self,
+        hero_by_id: Dict[str, HeroProfile],
+        matches: Iterable[Tuple[List[str], List[str], str]],
+    ) -> List[float]:
+        return [
+            self.win_prob(build_team_state(hero_by_id, our), build_team_state(hero_by_id, enemy), map_name)
+            for our, enemy, map_name in matches
+        ]
+
+    def pick_deltas(
+        self,
+        acting: TeamState,
+        opposing: TeamState,
+        candidates: List[Tuple[HeroProfile, TeamState]],
+        map_name: str,
+        ally: bool,
+    ) -> Tuple[float, Dict[str, float]]:
+        # Win probability of the acting side now, and its change per candidate.
+        # candidates pairs each hero with the acting team after adding it (the
+        # recommender builds those for teamScoreAfter anyway).
+        sign = 1.0 if ally else -1.0
+        acting_value = self._team_value(acting, map_name)
+        rest = sign * self.bias - self._team_value(opposing, map_name)
+        vs = sum(self._vs(a, opposing.picks) for a in acting.picks)
+        p_now = sigmoid(rest + acting_value + vs)
+
+        deltas: Dict[str, float] = {}
+        for h, team_after in candidates:
+            m = rest + self._team_value(team_after, map_name) + vs + self._vs(h.hero_id, opposing.picks)
+            deltas[h.hero_id] = sigmoid(m) - p_now
+        return p_now, deltas
+
+
+def win_model_to_dict(model: WinModel) -> Dict[str, Any]:
+    return {
+        "version": WIN_MODEL_VERSION,
+        "bias": model.bias,
+        "weights": {k: model.weights[k] for k in sorted(model.weights)},
+        "meta": model.meta,
+    }
+
+
+def load_win_model(path: str) -> Optional[WinModel]:
+    # No file means no model: recommendations simply omit winProbDelta
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if raw.get("version") != WIN_MODEL_VERSION:
+        raise ValueError(f"{path}: unsupported win model version {raw.get('version')!r}")
+    weights = {str(k): float(v) for k, v in (raw.get("weights") or {}).items()}
+    return WinModel(float(raw.get("bias", 0.0)), weights, raw.get("meta") or {})
+
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data import DATA_DIR, load_data
+from .scoring import build_team_state
+from .win_model import WinModel, match_features, sigmoid, win_model_to_dict
+
+
+# Train the win-probability model from a local match file.
+#
+#   python -m hotspicker.win_train matches.jsonl --out data/win_model.json
+#
+# One match per line, either final teams
+#   {"ourPicks": [...], "enemyPicks": [...], "mapName": "...", "win": true}
+# or a draft-session history as read by hotspicker.calibrate.
+#
+# L2-regularised logistic regression fitted with AdaGrad over the sparse
+# rows. Hero-pair keys seen in fewer than --min-count matches are dropped
+# first: with a few thousand matches most pairs are too rare to estimate and
+# would only memorise the training set. Every fifth match is held out.
+
+VALIDATION_EVERY = 5
+
+
+def match_teams(record: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    if "history" not in record:
+        return list(record.get("ourPicks") or []), list(record.get("enemyPicks") or [])
+    our: List[str] = []
+    enemy: List[str] = []
+    for action in record.get("history") or []:
+        if action.get("type") == "pick" and action.get("hero_id"):
+            (our if action.get("side") == "ally" else enemy).append(action["hero_id"])
+    return our, enemy
+
+
+def load_matches(path: str) -> List[Dict[str, Any]]:
+    matches = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                raise SystemExit(f"{path}:{n}: not valid JSON")
+            if "win" in rec:
+                matches.append(rec)
+    return matches
+
+
+def _is_pair(key: str) -> bool:
+    return key.startswith("with:") or key.startswith("vs:")
+
+
+def prune_rare_pairs(rows: List[Dict[str, float]], min_count: int) -> List[Dict[str, float]]:
+    counts: Dict[str, int] = {}
+    for x in rows:
+        for k in x:
+            if _is_pair(k):
+                counts[k] = counts.get(k, 0) + 1
+    return [{k: v for k, v in x.items() if not _is_pair(k) or counts[k] >= min_count} for x in rows]
+
+
+def fit(
+    rows: List[Dict[str, float]],
+    y: List[float],
+    train: List[int],
+    epochs: int,
+    l2: float,
+    rate: float,
+    seed: int,
+) -> WinModel:
+    w: Dict[str, float] = {}
+    g2: Dict[str, float] = {}
+    bias, bias_g2 = 0.0, 0.0
+    order = list(train)
+    rng = random.Random(seed)
+    for _ in range(epochs):
+        rng.shuffle(order)
+        for i in order:
+            x = rows[i]
+            z = bias
+            for k, v in x.items():
+                z += w.get(k, 0.0) * v
+            err = sigmoid(z) - y[i]
+
+            bias_g2 += err * err
+            bias -= rate * err / math.sqrt(bias_g2 + 1e-8)
+            for k, v in x.items():
+                wk = w.get(k, 0.0)
+                g = err * v + l2 * wk
+                acc = g2.get(k, 0.0) + g * g
+                g2[k] = acc
+                w[k] = wk - rate * g / math.sqrt(acc + 1e-8)
+    return WinModel(bias, w)
+
+
+def evaluate(model: WinModel, rows: List[Dict[str, float]], y: List[float], idx: List[int]) -> Dict[str, float]:
+    loss = brier = correct = 0.0
+    for i in idx:
+        z = model.bias + sum(model.weights.get(k, 0.0) * v for k, v in rows[i].items())
+        p = min(max(sigmoid(z), 1e-12), 1 - 1e-12)
+        loss -= y[i] * math.log(p) + (1 - y[i]) * math.log(1 - p)
+        brier += (p - y[i]) ** 2
+        correct += (p > 0.5) == (y[i] > 0.5)
+    n = max(len(idx), 1)
+    return {"logLoss": round(loss / n, 4), "brier": round(brier / n, 4), "accuracy": round(correct / n, 4)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="hotspicker.win_train", description="Train the win-probability model")
+    parser.add_argument("matches", help="NDJSON file of matches with outcomes")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", default="win_model.json", help="model file to write")
+    parser.add_argument("--report", default="", help="write the training report here as JSON")
+    parser.add_argument("--epochs", type=int, default=12)
+    parser.add_argument("--l2", type=float, default=0.5)
+    parser.add_argument("--rate", type=float, default=0.1)
+    parser.add_argument("--min-count", type=int, default=20, help="drop hero pairs seen in fewer matches")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    heroes, _maps = load_data(args.data_dir)
+    hero_by_id = {h.hero_id: h for h in heroes}
+
+    t0 = time.perf_counter()
+    matches = load_matches(args.matches)
+    if len(matches) < 2 * VALIDATION_EVERY:
+        print(f"hotspicker.win_train: need at least {2 * VALIDATION_EVERY} matches with outcomes", file=sys.stderr)
+        return 2
+
+    rows = []
+    for rec in matches:
+        our_ids, enemy_ids = match_teams(rec)
+        our = build_team_state(hero_by_id, [hid for hid in our_ids if hid in hero_by_id])
+        enemy = build_team_state(hero_by_id, [hid for hid in enemy_ids if hid in hero_by_id])
+        rows.append(match_features(our, enemy, (rec.get("mapName") or "").strip()))
+    rows = prune_rare_pairs(rows, args.min_count)
+    y = [1.0 if rec["win"] else 0.0 for rec in matches]
+    feature_seconds = time.perf_counter() - t0
+
+    train = [i for i in range(len(rows)) if i % VALIDATION_EVERY]
+    validation = [i for i in range(len(rows)) if not i % VALIDATION_EVERY]
+
+    t_fit = time.perf_counter()
+    model = fit(rows, y, train, args.epochs, args.l2, args.rate, args.seed)
+    fit_seconds = time.perf_counter() - t_fit
+
+    # Near-zero weights only cost lookups at serve time
+    model.weights = {k: round(v, 5) for k, v in model.weights.items() if abs(v) >= 1e-4}
+    model.bias = round(model.bias, 5)
+
+    base_rate = sum(y[i] for i in train) / len(train)
+    baseline = WinModel(math.log(base_rate / (1 - base_rate)) if 0 < base_rate < 1 else 0.0, {})
+    report = {
+        "matches": len(rows),
+        "validationEvery": VALIDATION_EVERY,
+        "features": len(model.weights),
+        "baseline": evaluate(baseline, rows, y, validation),
+        "train": evaluate(model, rows, y, train),
+        "validation": evaluate(model, rows, y, validation),
+        "featureSeconds": round(feature_seconds, 3),
+        "fitSeconds": round(fit_seconds, 3),
+    }
+    model.meta = {"matches": len(rows), "validation": report["validation"]}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(win_model_to_dict(model), f, indent=1)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    b, v = report["baseline"], report["validation"]
+    print(
+        f"{len(rows)} matches, {len(model.weights)} weights, validation log loss {b['logLoss']} -> {v['logLoss']}, "
+        f"accuracy {b['accuracy']} -> {v['accuracy']}; wrote {args.out}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
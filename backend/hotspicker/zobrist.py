@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable
+
+
+# Zobrist hashing of draft states: every (hero, slot) and every setting value
+# gets a fixed 64-bit key and a state hashes to the XOR of its keys. Order of
+# picks and bans does not matter, and adding or removing a hero is one XOR.
+#
+# Keys come from blake2b of the field name and value rather than a seeded
+# random table, so they are the same in every process and do not shift when
+# heroes.txt gains a hero. Clients get the hash as 16 hex digits (stateHash).
+
+SLOTS = ("our", "enemy", "ban")
+
+
+@lru_cache(maxsize=8192)
+def zobrist_key(*parts: Any) -> int:
+    data = "\x1f".join(str(p) for p in parts).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def hero_key(slot: str, hero_id: str) -> int:
+    return zobrist_key("hero", slot, hero_id)
+
+
+def heroes_hash(slot: str, hero_ids: Iterable[str]) -> int:
+    h = 0
+    for hid in set(hero_ids):
+        h ^= zobrist_key("hero", slot, hid)
+    return h
+
+
+def flags_hash(phase: str, side_to_act: str, early_pick_window: bool) -> int:
+    return (
+        zobrist_key("phase", phase)
+        ^ zobrist_key("side", side_to_act)
+        ^ zobrist_key("early", bool(early_pick_window))
+    )
+
+
+def settings_hash(settings: Dict[str, Any]) -> int:
+    # Same fields and defaults as rec_cache.canonical_draft_key
+    return (
+        zobrist_key("rank", settings.get("rankPreset", "Silver"))
+        ^ zobrist_key("simple", bool(settings.get("simpleComps", True)))
+        ^ zobrist_key("map", (settings.get("mapName") or "").strip())
+        ^ zobrist_key("banMode", settings.get("banMode", "threat"))
+        ^ zobrist_key("lookahead", bool(settings.get("deadlineMs")))
+        ^ zobrist_key("anticipate", bool(settings.get("anticipateEnemy")))
+        ^ zobrist_key("opponent", (settings.get("opponentProfile") or "").strip())
+        ^ zobrist_key("pools", *(",".join(sorted(set(p))) for p in settings.get("playerPools") or []))
+        ^ zobrist_key("mode", settings.get("responseMode", "top"))
+    )
+
+
+def draft_hash(draft: Dict[str, Any], settings: Dict[str, Any]) -> int:
+    # Full computation; draft sessions keep the hero part up to date with XORs
+    return (
+        heroes_hash("our", draft.get("ourPicks", []) or [])
+        ^ heroes_hash("enemy", draft.get("enemyPicks", []) or [])
+        ^ heroes_hash("ban", draft.get("bans", []) or [])
+        ^ flags_hash(
+            draft.get("phase", "pick"),
+            draft.get("sideToAct", "ally"),
+            draft.get("earlyPickWindow", True),
+        )
+        ^ settings_hash(settings)
+    )
+
+
+def hash_hex(h: int) -> str:
+    return f"{h:016x}"
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def data_version(*paths: str) -> str:
+    # Content hash of the data files, so edits to heroes.txt/maps.json invalidate old entries
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(os.path.basename(p).encode("utf-8"))
+        if os.path.exists(p):
+            with open(p, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def pools_key(pools: Any) -> List[List[str]]:
+    # Player order is kept (results name players by index); pool order is not
+    return [sorted(set(p)) for p in pools] if pools else []
+
+
+def canonical_draft_key(draft: Dict[str, Any], settings: Dict[str, Any]) -> str:
+    # Pick order and ban order do not change the scoring, so lists are sorted
+    state = {
+        "phase": draft.get("phase", "pick"),
+        "side": draft.get("sideToAct", "ally"),
+        "early": bool(draft.get("earlyPickWindow", True)),
+        "our": sorted(draft.get("ourPicks", []) or []),
+        "enemy": sorted(draft.get("enemyPicks", []) or []),
+        "bans": sorted(set(draft.get("bans", []) or [])),
+        "rank": settings.get("rankPreset", "Silver"),
+        "simple": bool(settings.get("simpleComps", True)),
+        "map": (settings.get("mapName") or "").strip(),
+        "banMode": settings.get("banMode", "threat"),
+        # Deadline runs add lookahead fields; only completed ones are cached
+        "lookahead": bool(settings.get("deadlineMs")),
+        "anticipate": bool(settings.get("anticipateEnemy")),
+        # Profile revision is filled in by the server, so a re-ingested
+        # profile gets fresh entries
+        "opponent": [(settings.get("opponentProfile") or "").strip(), settings.get("opponentRevision", "")],
+        "pools": pools_key(settings.get("playerPools")),
+        "mode": settings.get("responseMode", "top"),
+    }
+    return json.dumps(state, sort_keys=True, separators=(",", ":"))
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCacheStore:
+    # Writes go through a queue drained by one background thread so request
+    # handlers never wait on disk. Reads open a short-lived connection.
+    # Opening with a version drops the rows of every other data version.
+
+    def __init__(self, path: str, version: Optional[str] = None, max_pending: int = 1024, batch_size: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: "queue.Queue[Optional[Tuple[str, str, str]]]" = queue.Queue(maxsize=max_pending)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS recommendations ("
+                " version TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " PRIMARY KEY (version, key))"
+            )
+            if version is not None:
+                conn.execute("DELETE FROM recommendations WHERE version != ?", (version,))
+
+        self._writer = threading.Thread(target=self._write_loop, name="rec-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _hash_key(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, version: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT payload FROM recommendations WHERE version = ? AND key = ?",
+                    (version, self._hash_key(key)),
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        if not row:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put(self, version: str, key: str, value: Dict[str, Any]) -> None:
+        item = (version, self._hash_key(key), json.dumps(value, separators=(",", ":")))
+        try:
+            self._pending.put_nowait(item)
+        except queue.Full:
+            # Disk is behind; dropping a cache write is always safe
+            pass
+
+    def close(self) -> None:
+        self._pending.put(None)
+        self._writer.join(timeout=5.0)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        running = True
+        while running:
+            item = self._pending.get()
+            batch: List[Tuple[str, str, str]] = []
+            if item is None:
+                running = False
+            else:
+                batch.append(item)
+
+            while running and len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            if not batch:
+                continue
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO recommendations (version, key, payload) VALUES (?, ?, ?)",
+                    batch,
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+        conn.close()
+
+
+class RecommendationCache:
+    def __init__(self, version: str, memory: MemoryCache, store: Optional[SqliteCacheStore] = None):
+        self.version = version
+        self.memory = memory
+        self.store = store
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.store is None:
+            return None
+
+        value = self.store.get(self.version, key)
+        if value is not None:
+            self.memory.put(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.put(key, value)
+        if self.store is not None:
+            self.store.put(self.version, key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            # A search cut short by its deadline may finish next time
+            if value.get("completed", True):
+                self.put(key, value)
+        return value
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from events import EventChannel
+from rec_cache import RecommendationCache, canonical_draft_key
+from hotspicker.hero_loader import HeroProfile
+from hotspicker.player_pools import PoolAssignment
+from hotspicker.recommender import Recommender
+from hotspicker.scoring import TeamState, add_hero, remove_hero
+from hotspicker.zobrist import flags_hash, hash_hex, hero_key, settings_hash
+
+
+# Storm League order, same as SEQUENCE_FIRST_SECOND in frontend/app.js
+DRAFT_SEQUENCE: List[Tuple[str, str]] = [
+    ("ban", "first"),
+    ("ban", "second"),
+    ("ban", "first"),
+    ("ban", "second"),
+    ("pick", "first"),
+    ("pick", "second"),
+    ("pick", "second"),
+    ("pick", "first"),
+    ("pick", "first"),
+    ("ban", "second"),
+    ("ban", "first"),
+    ("pick", "second"),
+    ("pick", "second"),
+    ("pick", "first"),
+    ("pick", "first"),
+    ("pick", "second"),
+]
+
+
+def draft_sequence(first_ban_side: str) -> List[Tuple[str, str]]:
+    first = "enemy" if first_ban_side == "enemy" else "ally"
+    second = "ally" if first == "enemy" else "enemy"
+    return [(t, first if team == "first" else second) for t, team in DRAFT_SEQUENCE]
+
+
+# Result fields grouped into the events pushed to streaming clients
+EVENT_GROUPS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("teamScores", ("ourTeamScore", "enemyTeamScore", "missing")),
+    ("warnings", ("warnings", "endPlan")),
+    ("recommendations", ("phase", "sideToAct", "mapName", "recommendations", "playerAssignment", "depthReached")),
+]
+RECOMMENDATION_KEYS = dict(EVENT_GROUPS)["recommendations"]
+
+
+class DraftActionError(ValueError):
+    pass
+
+
+def _hash_slot(step_type: str, side: str) -> str:
+    if step_type == "ban":
+        return "ban"
+    return "our" if side == "ally" else "enemy"
+
+
+@dataclass
+class DraftSession:
+    session_id: str
+    settings: Dict[str, Any]
+    # Read-only id handed to stream overlays; it cannot be used to post actions
+    spectate_id: str = field(default_factory=lambda: secrets.token_urlsafe(9))
+    first_ban_side: str = "ally"
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    our: TeamState = field(default_factory=TeamState)
+    enemy: TeamState = field(default_factory=TeamState)
+    bans: Set[str] = field(default_factory=set)
+    # Zobrist hash of the picks and bans, updated by apply_action/undo_last
+    heroes_hash: int = 0
+    # Our picks matched to settings["playerPools"], built on the first refresh
+    # and then updated by apply_action/undo_last
+    assignment: Optional[PoolAssignment] = None
+    last_result: Dict[str, Any] = field(default_factory=dict)
+    # Set when lookahead depths were streamed since the last publish_changes
+    depths_published: bool = False
+    last_access: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    channel: EventChannel = field(default_factory=EventChannel, repr=False)
+
+    @property
+    def sequence(self) -> List[Tuple[str, str]]:
+        return draft_sequence(self.first_ban_side)
+
+    def current_step(self) -> Optional[Tuple[str, str]]:
+        seq = self.sequence
+        idx = len(self.history)
+        return seq[idx] if idx < len(seq) else None
+
+    def draft_flags(self) -> Dict[str, Any]:
+        step = self.current_step()
+        picks_done = sum(1 for a in self.history if a["type"] == "pick")
+        return {
+            "phase": step[0] if step else "pick",
+            "sideToAct": step[1] if step else "ally",
+            "earlyPickWindow": picks_done < 5,
+        }
+
+    def draft_payload(self) -> Dict[str, Any]:
+        # Same shape the frontend posts to /api/recommendations
+        payload = self.draft_flags()
+        payload["ourPicks"] = list(self.our.picks)
+        payload["enemyPicks"] = list(self.enemy.picks)
+        payload["bans"] = sorted(self.bans)
+        return payload
+
+    def apply_action(self, hero_by_id: Dict[str, HeroProfile], action: Dict[str, Any]) -> Dict[str, Any]:
+        step = self.current_step()
+        if step is None:
+            raise DraftActionError("Draft is already complete")
+        step_type, side = step
+
+        hero_id = action.get("hero_id")
+        skipped = bool(action.get("skipped")) or not hero_id
+        if skipped:
+            if step_type != "ban":
+                raise DraftActionError("Only bans can be skipped")
+            entry = {"hero_id": None, "side": side, "type": step_type, "skipped": True}
+            self.history.append(entry)
+            return entry
+
+        h = hero_by_id.get(hero_id)
+        if h is None:
+            raise DraftActionError(f"Unknown hero: {hero_id}")
+        if hero_id in self.bans or hero_id in self.our.picks or hero_id in self.enemy.picks:
+            raise DraftActionError(f"Hero already taken: {hero_id}")
+
+        if step_type == "ban":
+            self.bans.add(hero_id)
+        else:
+            add_hero(self.our if side == "ally" else self.enemy, h)
+            if side == "ally" and self.assignment is not None:
+                self.assignment.add(hero_id)
+        self.heroes_hash ^= hero_key(_hash_slot(step_type, side), hero_id)
+
+        entry = {"hero_id": hero_id, "side": side, "type": step_type}
+        self.history.append(entry)
+        return entry
+
+    def undo_last(self, hero_by_id: Dict[str, HeroProfile]) -> Dict[str, Any]:
+        if not self.history:
+            raise DraftActionError("Nothing to undo")
+        entry = self.history.pop()
+        if entry.get("skipped"):
+            return entry
+
+        hero_id = entry["hero_id"]
+        if entry["type"] == "ban":
+            self.bans.discard(hero_id)
+        else:
+            remove_hero(self.our if entry["side"] == "ally" else self.enemy, hero_by_id[hero_id])
+            if entry["side"] == "ally" and self.assignment is not None:
+                self.assignment.remove(hero_id)
+        self.heroes_hash ^= hero_key(_hash_slot(entry["type"], entry["side"]), hero_id)
+        return entry
+
+    def state_hash(self) -> str:
+        # Equal to zobrist.draft_hash(self.draft_payload(), self.settings)
+        flags = self.draft_flags()
+        h = self.heroes_hash ^ settings_hash(self.settings)
+        h ^= flags_hash(flags["phase"], flags["sideToAct"], flags["earlyPickWindow"])
+        return hash_hex(h)
+
+    def refresh(
+        self, recommender: Recommender, cache: Optional[RecommendationCache] = None, stream_depths: bool = False
+    ) -> Dict[str, Any]:
+        # Recompute from the incrementally maintained team states and return
+        # only the top-level fields whose value changed since the last refresh.
+        # With a cache, states precomputed by speculation are picked up here.
+        # stream_depths: with deadlineMs, publish the recommendations of each
+        # lookahead depth as it finishes
+        if self.assignment is None and self.settings.get("playerPools"):
+            self.assignment = recommender.pool_assignment(self.settings, self.our.picks)
+
+        def compute() -> Dict[str, Any]:
+            return recommender.recommend_teams(
+                self.our,
+                self.enemy,
+                self.bans,
+                self.draft_flags(),
+                self.settings,
+                self.assignment,
+                self.publish_depth if stream_depths else None,
+            )
+
+        if cache is None:
+            result = compute()
+        else:
+            result = cache.get_or_compute(canonical_draft_key(self.draft_payload(), self.settings), compute)
+        changes = {k: v for k, v in result.items() if self.last_result.get(k) != v}
+        self.last_result = result
+        return changes
+
+    def step_event(self) -> Dict[str, Any]:
+        return {"step": len(self.history), "history": list(self.history), "stateHash": self.state_hash()}
+
+    def publish_step(self) -> None:
+        self.channel.publish("step", self.step_event())
+
+    def publish_depth(self, partial: Dict[str, Any]) -> None:
+        self.channel.publish("recommendations", {k: partial.get(k) for k in RECOMMENDATION_KEYS})
+        self.depths_published = True
+
+    def publish_changes(self, changes: Dict[str, Any]) -> None:
+        # After publish_step and refresh; the final recommendations always go
+        # out when depths were streamed, even if they match the last result
+        for event, keys in EVENT_GROUPS:
+            if any(k in changes for k in keys) or (event == "recommendations" and self.depths_published):
+                self.channel.publish(event, {k: self.last_result.get(k) for k in keys})
+        self.depths_published = False
+
+    def snapshot_events(self) -> List[Tuple[str, Dict[str, Any]]]:
+        events: List[Tuple[str, Dict[str, Any]]] = [("step", self.step_event())]
+        for event, keys in EVENT_GROUPS:
+            events.append((event, {k: self.last_result.get(k) for k in keys}))
+        return events
+
+    def describe(self) -> Dict[str, Any]:
+        step = self.current_step()
+        return {
+            "sessionId": self.session_id,
+            "spectateId": self.spectate_id,
+            "subscribers": len(self.channel),
+            "firstBanSide": self.first_ban_side,
+            "settings": self.settings,
+            "history": self.history,
+            "step": len(self.history),
+            "stateHash": self.state_hash(),
+            "done": step is None,
+        }
+
+
+class SessionStore:
+    # Bounded LRU with idle expiry; the oldest session is evicted first.
+
+    def __init__(self, max_sessions: int = 512, ttl_seconds: float = 3 * 60 * 60):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, DraftSession]" = OrderedDict()
+        self._by_spectate_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def create(self, settings: Dict[str, Any], first_ban_side: str = "ally") -> DraftSession:
+        session = DraftSession(
+            session_id=secrets.token_urlsafe(9),
+            settings=dict(settings),
+            first_ban_side="enemy" if first_ban_side == "enemy" else "ally",
+        )
+        with self._lock:
+            self._evict(time.monotonic())
+            self._sessions[session.session_id] = session
+            self._by_spectate_id[session.spectate_id] = session.session_id
+            while len(self._sessions) > self.max_sessions:
+                self._drop_oldest()
+        return session
+
+    def get(self, session_id: str) -> Optional[DraftSession]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_by_spectate_id(self, spectate_id: str) -> Optional[DraftSession]:
+        # Spectators do not refresh the session's idle timer; only the captain does
+        with self._lock:
+            session_id = self._by_spectate_id.get(spectate_id)
+            return self._sessions.get(session_id) if session_id else None
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._forget(session)
+            return True
+
+    def _drop_oldest(self) -> None:
+        _, session = self._sessions.popitem(last=False)
+        self._forget(session)
+
+    def _forget(self, session: DraftSession) -> None:
+        self._by_spectate_id.pop(session.spectate_id, None)
+        session.channel.close()
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access < self.ttl_seconds:
+                break
+            self._drop_oldest()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
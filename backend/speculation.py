@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+# Speculative precomputation for draft sessions. After a session answers, the
+# next action is almost always one of its top recommendations, so a
+# background worker computes (and thereby caches) those states, then the
+# opponent's most likely replies to each.
+#
+# One worker thread with a CPU share: after each state it sleeps long enough
+# that speculation uses at most `cpu_share` of a core. A thread rather than a
+# process pool because the point is to fill the in-process recommendation
+# cache. Any real action on the session cancels its pending work.
+
+
+@dataclass
+class SpecState:
+    sequence: List[Tuple[str, str]]
+    step: int
+    draft: Dict[str, Any]
+
+
+def advance(state: SpecState, hero_id: str) -> Optional[SpecState]:
+    # The state after hero_id is used at the current step, or None once the
+    # draft is over (nothing left to recommend)
+    step_type, side = state.sequence[state.step]
+    draft = dict(state.draft)
+    if step_type == "ban":
+        draft["bans"] = sorted(set(draft.get("bans", [])) | {hero_id})
+    else:
+        key = "ourPicks" if side == "ally" else "enemyPicks"
+        draft[key] = list(draft.get(key, [])) + [hero_id]
+
+    nxt = state.step + 1
+    if nxt >= len(state.sequence):
+        return None
+    draft["phase"], draft["sideToAct"] = state.sequence[nxt]
+    draft["earlyPickWindow"] = len(draft.get("ourPicks", [])) + len(draft.get("enemyPicks", [])) < 5
+    return SpecState(state.sequence, nxt, draft)
+
+
+def _top_heroes(result: Dict[str, Any], k: int) -> List[str]:
+    return [r["hero_id"] for r in result.get("recommendations", [])[:k]]
+
+
+# (owner, generation, state, settings, replies to expand)
+Job = Tuple[str, int, SpecState, Dict[str, Any], int]
+
+
+class Speculator:
+    def __init__(
+        self,
+        compute: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+        top_k: int = 3,
+        reply_k: int = 2,
+        cpu_share: float = 0.25,
+        max_pending: int = 256,
+    ):
+        self.compute = compute
+        self.top_k = top_k
+        self.reply_k = reply_k
+        self.cpu_share = min(max(cpu_share, 0.01), 1.0)
+        self.max_pending = max_pending
+
+        self._jobs: Deque[Job] = deque()
+        self._generation: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.computed = 0
+        self.cancelled = 0
+
+        self._worker = threading.Thread(target=self._run, name="speculator", daemon=True)
+        self._worker.start()
+
+    def schedule(self, owner: str, root: SpecState, root_result: Dict[str, Any], settings: Dict[str, Any]) -> None:
+        # Replaces whatever was pending for owner
+        with self._cond:
+            gen = self._bump(owner)
+            for hid in _top_heroes(root_result, self.top_k):
+                state = advance(root, hid)
+                if state is not None and len(self._jobs) < self.max_pending:
+                    self._jobs.append((owner, gen, state, settings, self.reply_k))
+            self._cond.notify()
+
+    def cancel(self, owner: str) -> None:
+        with self._cond:
+            self._bump(owner)
+
+    def _bump(self, owner: str) -> int:
+        gen = self._generation.get(owner, 0) + 1
+        self._generation[owner] = gen
+        return gen
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._jobs)
+        return {"pending": pending, "computed": self.computed, "cancelled": self.cancelled}
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._jobs.clear()
+            self._cond.notify()
+        self._worker.join(timeout=5.0)
+
+    def _next_job(self) -> Optional[Job]:
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                while self._jobs:
+                    job = self._jobs.popleft()
+                    if self._generation.get(job[0]) == job[1]:
+                        return job
+                    self.cancelled += 1
+                # Nothing pending, so no generation can be stale; keeps the map bounded
+                self._generation.clear()
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            owner, gen, state, settings, replies = job
+
+            started = time.thread_time()
+            try:
+                result = self.compute(state.draft, settings)
+            except Exception:
+                # Speculation is best effort; the real request will report errors
+                continue
+            self.computed += 1
+
+            if replies:
+                with self._cond:
+                    if self._generation.get(owner) == gen:
+                        for hid in _top_heroes(result, replies):
+                            nxt = advance(state, hid)
+                            if nxt is not None and len(self._jobs) < self.max_pending:
+                                self._jobs.append((owner, gen, nxt, settings, 0))
+
+            spent = time.thread_time() - started
+            time.sleep(spent * (1.0 - self.cpu_share) / self.cpu_share)
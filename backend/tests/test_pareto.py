@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import random
+from typing import List
+
+from hotspicker.pareto import OBJECTIVE_NAMES, pareto_fronts
+
+
+# pareto_fronts against a brute-force non-dominated sort: peel off the
+# candidates no remaining candidate dominates, one front at a time. Values
+# come from a small set so ties and duplicate vectors are common.
+#
+#   python -m pytest tests/test_pareto.py
+
+TRIALS = 200
+MAX_CANDIDATES = 90
+VALUES = [0.0, 1.0, 2.0, 3.5]
+
+
+def _dominates(a: List[float], b: List[float]) -> bool:
+    return all(x >= y for x, y in zip(a, b)) and any(x > y for x, y in zip(a, b))
+
+
+def _brute_fronts(vectors: List[List[float]]) -> List[int]:
+    fronts = [-1] * len(vectors)
+    remaining = list(range(len(vectors)))
+    front = 0
+    while remaining:
+        current = [i for i in remaining if not any(_dominates(vectors[j], vectors[i]) for j in remaining)]
+        for i in current:
+            fronts[i] = front
+        remaining = [i for i in remaining if fronts[i] < 0]
+        front += 1
+    return fronts
+
+
+def test_fronts_match_brute_force():
+    rng = random.Random(48)
+    k = len(OBJECTIVE_NAMES)
+    for _ in range(TRIALS):
+        n = rng.randint(0, MAX_CANDIDATES)
+        vectors = [[rng.choice(VALUES) for _ in range(k)] for _ in range(n)]
+        assert pareto_fronts(vectors) == _brute_fronts(vectors)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import itertools
+import os
+import random
+from typing import List
+
+from hotspicker.data import DATA_DIR
+from hotspicker.hero_loader import load_heroes_from_txt
+from hotspicker.player_pools import TEAM_SIZE, PoolAssignment
+from hotspicker.team_bits import HeroBits
+
+
+# PoolAssignment against brute force: a hero is allowed when some way of
+# giving our picks plus that hero to distinct players fits every pool.
+#
+#   python -m pytest tests/test_player_pools.py
+
+POOL_SETS = 300
+
+
+def _open_union(pools: List[int], bits: HeroBits, picks: List[str]) -> int:
+    # Every way of giving the picks to distinct players; the heroes some
+    # player left over could take
+    idx = [bits.index[hid] for hid in picks]
+    union = 0
+    for players in itertools.permutations(range(TEAM_SIZE), len(idx)):
+        if all(pools[p] >> i & 1 for p, i in zip(players, idx)):
+            for p in set(range(TEAM_SIZE)) - set(players):
+                union |= pools[p]
+    return union
+
+
+def test_allowed_matches_brute_force():
+    heroes = load_heroes_from_txt(os.path.join(DATA_DIR, "heroes.txt"))
+    bits = HeroBits(heroes)
+    ids = [h.hero_id for h in heroes]
+    everyone = (1 << len(ids)) - 1
+    rng = random.Random(47)
+
+    for _ in range(POOL_SETS):
+        # Small pools so some picks close off others; an empty pool is anyone
+        raw = [rng.sample(ids, rng.randint(0, 8)) for _ in range(TEAM_SIZE)]
+        masks = [sum(1 << bits.index[hid] for hid in pool) or everyone for pool in raw]
+        assignment = PoolAssignment(bits, raw)
+        picks: List[str] = []
+
+        while len(picks) < TEAM_SIZE:
+            allowed = assignment.allowed()
+            union = _open_union(masks, bits, picks)
+            expected = [hid for hid in ids if hid not in picks and union >> bits.index[hid] & 1]
+            assert [hid for hid in ids if hid not in picks and allowed >> bits.index[hid] & 1] == expected
+            if not expected:
+                break
+            if picks and rng.random() < 0.3:
+                undone = picks.pop(rng.randrange(len(picks)))
+                assignment.remove(undone)
+            else:
+                hid = rng.choice(expected)
+                picks.append(hid)
+                assert assignment.add(hid)
+            assert not assignment.unassigned
+            assert sorted(h for h in assignment.hero_of if h) == sorted(picks)
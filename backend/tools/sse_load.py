@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+
+# Load test for draft broadcasts: N spectators on one session's SSE stream
+# while the captain posts actions.
+#
+#   python tools/sse_load.py --clients 3000 --actions 8
+#
+# Without --external the server is started in a subprocess (werkzeug, threaded),
+# so it does not share a GIL with the clients. Each client is a raw asyncio
+# connection that records when it sees every "step" event (or a later one
+# that replaced it in its queue); latency is that time minus the time the
+# action was posted. Needs a file descriptor limit above the client count
+# (the script raises the soft limit when it can).
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ban, ban, ban, ban, then picks; enough for the first 8 steps of any draft
+ACTIONS = ["maiev", "tyrael", "qhira", "valeera", "thrall", "muradin", "li_ming", "uther", "valla", "anduin"]
+
+
+def _post(url: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    req = urllib.request.Request(
+        url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _client(host: str, port: int, path: str, seen: Dict[int, float], ready: asyncio.Event, stop: asyncio.Event):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode("ascii"))
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    ready.set()
+    event = ""
+    try:
+        while not stop.is_set():
+            try:
+                line = await asyncio.wait_for(reader.readline(), 1.0)
+            except asyncio.TimeoutError:
+                continue
+            if not line:
+                break
+            line = line.strip()
+            # Chunked transfer: size lines are hex-only and carry no field
+            if line.startswith(b"event: "):
+                event = line[7:].decode()
+            elif line.startswith(b"data: ") and event == "step":
+                # A coalesced step event is covered by the later one
+                now = time.perf_counter()
+                for n in range(1, json.loads(line[6:])["step"] + 1):
+                    seen.setdefault(n, now)
+    finally:
+        writer.close()
+
+
+async def _run(args: argparse.Namespace, base: str) -> Dict[str, Any]:
+    session = _post(base + "/api/drafts", {"settings": {}})
+    host, port = args.host, args.port
+    path = f"/api/broadcasts/{session['spectateId']}/events"
+
+    stop = asyncio.Event()
+    seen: List[Dict[int, float]] = [{} for _ in range(args.clients)]
+    readies = [asyncio.Event() for _ in range(args.clients)]
+    tasks = []
+    for i in range(args.clients):
+        tasks.append(asyncio.create_task(_client(host, port, path, seen[i], readies[i], stop)))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)
+    await asyncio.wait_for(asyncio.gather(*(r.wait() for r in readies)), 120)
+
+    loop = asyncio.get_running_loop()
+    posted: Dict[int, float] = {}
+    for n, hero in enumerate(ACTIONS[: args.actions], 1):
+        posted[n] = time.perf_counter()
+        await loop.run_in_executor(None, _post, f"{base}/api/drafts/{session['sessionId']}/actions", {"hero_id": hero})
+        await asyncio.sleep(args.interval)
+
+    deadline = time.perf_counter() + args.drain_seconds
+    expected = args.clients * args.actions
+    while time.perf_counter() < deadline:
+        if sum(1 for s in seen for n in posted if n in s) >= expected:
+            break
+        await asyncio.sleep(0.1)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [(s[n] - posted[n]) * 1000.0 for s in seen for n in posted if n in s]
+    return {
+        "clients": args.clients,
+        "actions": args.actions,
+        "stepEventsExpected": expected,
+        "stepEventsReceived": len(latencies),
+        "latencyMs": {
+            "p50": round(_percentile(latencies, 0.5), 1),
+            "p99": round(_percentile(latencies, 0.99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+    }
+
+
+def _start_server(host: str, port: int) -> subprocess.Popen:
+    code = (
+        "from werkzeug.serving import run_simple\n"
+        "import app\n"
+        f"run_simple({host!r}, {port}, app.app, threaded=True)\n"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://{host}:{port}/api/maps", timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("sse_load: server did not start")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="sse_load", description="Broadcast SSE load test")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--actions", type=int, default=8, choices=range(1, len(ACTIONS) + 1))
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between actions")
+    parser.add_argument("--drain-seconds", type=float, default=10.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--external", action="store_true", help="use a server already running on --host/--port")
+    args = parser.parse_args(argv)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    want = args.clients + 256
+    if soft < want:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(want, hard), hard))
+
+    proc = None if args.external else _start_server(args.host, args.port)
+    try:
+        report = asyncio.run(_run(args, f"http://{args.host}:{args.port}"))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if report["stepEventsReceived"] == report["stepEventsExpected"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,8 @@ const state = {
   settings: {
     rankPreset: "Silver",
     simpleComps: true,
-    mapName: ""
+    mapName: "",
+    banMode: "threat"
   }
 };
 
@@ -502,6 +503,96 @@ async function apiPostRecs(draftPayload) {
   return res.json();
 }
 
+async function apiCreateDraft() {
+  const res = await fetch("/api/drafts", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      settings: state.settings,
+      firstBanSide: state.draft.firstBanSide,
+      history: state.draft.history
+    })
+  });
+  if (!res.ok) throw new Error(`create draft failed: ${res.status}`);
+  return res.json();
+}
+
+async function apiPostAction(sessionId, action) {
+  return fetch(`/api/drafts/${sessionId}/actions`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(action)
+  });
+}
+
+async function apiUndoAction(sessionId) {
+  return fetch(`/api/drafts/${sessionId}/actions/last`, { method: "DELETE" });
+}
+
+/* =======================
+   LIVE SESSION (SERVER-SENT EVENTS)
+   The server keeps the draft, we send actions and it pushes
+   recommendations, warnings and team scores back. Falls back to
+   POST /api/recommendations when streaming is unavailable.
+======================= */
+const live = {
+  sessionId: null,
+  source: null,
+  data: {}
+};
+
+function closeLiveSession() {
+  if (live.source) live.source.close();
+  live.sessionId = null;
+  live.source = null;
+  live.data = {};
+}
+
+async function openLiveSession() {
+  closeLiveSession();
+  if (!window.EventSource) return false;
+
+  try {
+    const created = await apiCreateDraft();
+    live.sessionId = created.sessionId;
+    live.data = { ...(created.state || {}) };
+  } catch (e) {
+    return false;
+  }
+
+  const source = new EventSource(`/api/drafts/${live.sessionId}/events`);
+  ["teamScores", "warnings", "recommendations"].forEach((ev) => {
+    source.addEventListener(ev, (e) => {
+      if (live.source !== source) return;
+      Object.assign(live.data, JSON.parse(e.data));
+      renderServerData(live.data);
+    });
+  });
+  source.onerror = () => {
+    // Session expired or server restarted: drop to request/response mode
+    if (source.readyState === EventSource.CLOSED && live.source === source) {
+      closeLiveSession();
+      update();
+    }
+  };
+  live.source = source;
+  return true;
+}
+
+async function resyncSession() {
+  await openLiveSession();
+  update();
+}
+
+async function sendLiveAction(request) {
+  if (!live.sessionId) return;
+  const res = await request(live.sessionId);
+  if (!res.ok) {
+    // Server and client disagree (for example an evicted session): rebuild from our history
+    await resyncSession();
+  }
+}
+
 /* =======================
    DRAFT LIST DERIVATION
 ======================= */
@@ -713,6 +804,7 @@ function assignHeroToCurrentSlot(hero_id) {
   });
 
   update();
+  sendLiveAction((id) => apiPostAction(id, { hero_id }));
 }
 
 function skipCurrentSlot() {
@@ -728,17 +820,19 @@ function skipCurrentSlot() {
   });
 
   update();
+  sendLiveAction((id) => apiPostAction(id, { skipped: true }));
 }
 
 function undo() {
   if (state.draft.history.length === 0) return;
   state.draft.history.pop();
   update();
+  sendLiveAction((id) => apiUndoAction(id));
 }
 
 function resetDraft() {
   state.draft.history = [];
-  update();
+  resyncSession();
 }
 
 /* =======================
@@ -865,25 +959,9 @@ async function loadMaps() {
 /* =======================
    UPDATE LOOP
 ======================= */
-async function update() {
-  const lists = deriveDraftLists();
-
-  renderTimeline();
-  renderCurrentAction();
-  renderRoleFilters();
-
-
-  renderChips("allyBans", lists.ui.allyBans, "ban");
-  renderChips("enemyBans", lists.ui.enemyBans, "ban");
-  renderChips("ourPicks", lists.ui.ourPicks, "pick");
-  renderChips("enemyPicks", lists.ui.enemyPicks, "pick");
-
-  const qEl = document.getElementById("searchBox");
-  const q = qEl ? qEl.value : "";
-  renderHeroList(q);
-
+function buildDraftPayload(lists) {
   const cs = currentStep();
-  const draftPayload = {
+  return {
     phase: cs.step ? cs.step.type : "pick",
     sideToAct: cs.step ? cs.step.side : "ally",
     earlyPickWindow: earlyPickWindow(),
@@ -891,21 +969,48 @@ async function update() {
     enemyPicks: lists.enemyPicks,
     bans: lists.bans
   };
+}
 
-  const data = await apiPostRecs(draftPayload);
+function renderServerData(data) {
   // Store hero scores for sorting the hero list
   heroScores = {};
   (data.recommendations || []).forEach(r => {
     heroScores[r.hero_id] = r.score;
   });
 
+  const qEl = document.getElementById("searchBox");
+  renderHeroList(qEl ? qEl.value : "");
 
   renderScoreSummary(data);
 
   renderWarnings(data);
   renderPlan(data);
+}
+
+async function update() {
+  const lists = deriveDraftLists();
+
+  renderTimeline();
+  renderCurrentAction();
+  renderRoleFilters();
+
+
+  renderChips("allyBans", lists.ui.allyBans, "ban");
+  renderChips("enemyBans", lists.ui.enemyBans, "ban");
+  renderChips("ourPicks", lists.ui.ourPicks, "pick");
+  renderChips("enemyPicks", lists.ui.enemyPicks, "pick");
+
+  const qEl = document.getElementById("searchBox");
+  const q = qEl ? qEl.value : "";
+  renderHeroList(q);
 
   savePrefs();
+
+  // With a live session the server pushes the results over the event stream
+  if (live.sessionId) return;
+
+  const data = await apiPostRecs(buildDraftPayload(lists));
+  renderServerData(data);
 }
 
 /* =======================
@@ -915,7 +1020,7 @@ function wireUI() {
   document.getElementById("firstBanSelect").addEventListener("change", (e) => {
     state.draft.firstBanSide = e.target.value;
     state.draft.history = [];
-    update();
+    resyncSession();
   });
 
   document.getElementById("skipBtn").addEventListener("click", () => {
@@ -924,19 +1029,27 @@ function wireUI() {
 
   document.getElementById("rankSelect").addEventListener("change", (e) => {
     state.settings.rankPreset = e.target.value;
-    update();
+    resyncSession();
   });
 
   document.getElementById("simpleToggle").addEventListener("change", (e) => {
     state.settings.simpleComps = e.target.checked;
-    update();
+    resyncSession();
   });
 
+  const banModeSel = document.getElementById("banModeSelect");
+  if (banModeSel) {
+    banModeSel.addEventListener("change", (e) => {
+      state.settings.banMode = e.target.value;
+      resyncSession();
+    });
+  }
+
   const mapSel = document.getElementById("mapSelect");
   if (mapSel) {
     mapSel.addEventListener("change", (e) => {
       state.settings.mapName = e.target.value;
-      update();
+      resyncSession();
     });
   }
 
@@ -967,6 +1080,9 @@ async function init() {
   if (simp) simp.checked = !!state.settings.simpleComps;
   if (first) first.value = state.draft.firstBanSide || "ally";
 
+  const banModeSel = document.getElementById("banModeSelect");
+  if (banModeSel) banModeSel.value = state.settings.banMode || "threat";
+
   state.heroes = await apiGetHeroes();
   await loadMaps();
 
@@ -974,7 +1090,7 @@ async function init() {
   wireUI();
   renderRoleFilters();
   renderHeroList("");
-  update();
+  resyncSession();
 }
 
 init();